@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+
+from healing import compute_replacements_with_healing
+from linehash import compute_line_hash
+from normalize import normalize_for_hash
+
+CONTEXT_PREFIX = re.compile(r"^\d+:[a-f]{2}\|")
+SPIRAL = 100
+
+
+@lru_cache(maxsize=1 << 20)
+def line_hash(line):
+    return compute_line_hash(line)
+
+
+@lru_cache(maxsize=1 << 20)
+def canonical(line):
+    return normalize_for_hash(line, False)
+
+
+def sanitize_context(context):
+    return CONTEXT_PREFIX.sub("", context, count=1)
+
+
+def find_context(lines, context, start):
+    target = canonical(sanitize_context(context))
+    for index in range(max(0, start), len(lines)):
+        if canonical(lines[index]) == target:
+            return index
+    raise ValueError(f"Failed to find context '{sanitize_context(context)}'.")
+
+
+def lines_equal(file_line, expected, expected_hash):
+    if line_hash(file_line) == expected_hash:
+        return True
+    return canonical(file_line) == canonical(expected)
+
+
+def match_chunk_at(lines, chunk, start):
+    old = chunk["old_lines"]
+    if not old:
+        return True
+    if start < 0 or start + len(old) > len(lines):
+        return False
+    anchors = chunk["old_anchors"]
+    return all(lines_equal(lines[start + i], old[i], anchors[i]["hash"]) for i in range(len(old)))
+
+
+def spiral(seed, limit, radius=SPIRAL):
+    out = [seed] if 0 <= seed < limit else []
+    for delta in range(1, radius + 1):
+        if 0 <= seed + delta < limit:
+            out.append(seed + delta)
+        if 0 <= seed - delta < limit:
+            out.append(seed - delta)
+    return out
+
+
+def build_unique_line_by_hash(lines):
+    unique = {}
+    duplicate = set()
+    for i, line in enumerate(lines):
+        h = line_hash(line)
+        if h in duplicate:
+            continue
+        if h in unique:
+            del unique[h]
+            duplicate.add(h)
+        else:
+            unique[h] = i + 1
+    return unique
+
+
+def locate(lines, chunk, seed, unique):
+    old = chunk["old_lines"]
+    if not old:
+        return max(0, min(seed, len(lines)))
+    limit = max(0, len(lines) - len(old) + 1)
+    if chunk.get("is_end_of_file"):
+        start = len(lines) - len(old)
+        if match_chunk_at(lines, chunk, start):
+            return start
+        raise ValueError("EOF chunk did not match file tail.")
+    first = chunk["old_anchors"][0] if chunk["old_anchors"] else None
+    target = seed if first else 0
+    if target < 0 or target >= limit:
+        raise ValueError("Adjusted target is out of bounds.")
+    hits = [candidate for candidate in spiral(target, limit) if match_chunk_at(lines, chunk, candidate)]
+    if not hits:
+        if first:
+            relocated = unique.get(first["hash"])
+            if relocated is not None and match_chunk_at(lines, chunk, relocated - 1):
+                return relocated - 1
+        raise ValueError(f"No anchor match found in +/-{SPIRAL} spiral window.")
+    best = hits[0]
+    distance = abs(best - target)
+    tie = next((value for value in hits[1:] if abs(value - target) == distance), None)
+    if tie is not None:
+        raise ValueError(f"Equidistant anchor collision at lines {best + 1} and {tie + 1}.")
+    return best
+
+
+def apply_replacements(lines, replacements):
+    result = list(lines)
+    for replacement in sorted(replacements, key=lambda r: -r["start"]):
+        result[replacement["start"] : replacement["start"] + replacement["old_length"]] = replacement["new_lines"]
+    return result
+
+
+def apply_chunks(lines, chunks, path="file"):
+    noops = []
+    replacements = compute_replacements_with_healing(
+        lines, path, chunks, noops, locate, find_context, build_unique_line_by_hash
+    )
+    return apply_replacements(lines, replacements), noops
+
+
+def anchor_chunk(lines, start, count, new_lines, change_context=None, end_of_file=False):
+    old = lines[start : start + count]
+    return {
+        "change_context": change_context,
+        "old_lines": old,
+        "old_anchors": [{"line": start + i + 1, "hash": line_hash(line)} for i, line in enumerate(old)],
+        "new_lines": list(new_lines),
+        "is_end_of_file": end_of_file,
+    }
+
+
+def render_chunk(chunk):
+    out = ["@@ " + chunk["change_context"] if chunk.get("change_context") else "@@"]
+    out.extend(f"-{a['line']}:{a['hash']}|{line}" for a, line in zip(chunk["old_anchors"], chunk["old_lines"]))
+    out.extend(f"+{line}" for line in chunk["new_lines"])
+    if chunk.get("is_end_of_file"):
+        out.append("*** End of File")
+    return out
+
+
+def render_patch(path, chunks):
+    body = [line for chunk in chunks for line in render_chunk(chunk)]
+    return "\n".join(["*** Begin Patch", f"*** Edit File: {path}"] + body + ["*** End Patch"]) + "\n"
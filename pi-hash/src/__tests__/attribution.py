@@ -0,0 +1,154 @@
+import argparse
+import os
+import re
+import sys
+
+from corpus import read_lines, walk
+from linehash import ALPHABETS, HASHES, encode_batch, hash_batch, residues
+from results import record
+from tokens import DEFAULT_MODEL, count_batch, encoder
+
+CLASSES = ("blank", "import", "bracket", "indented", "other")
+IMPORT_RE = re.compile(r"^(?:import\b|from\s+\S+\s+import\b|export\s.*\bfrom\s|const\s.*=\s*require\(|#include\b|use\s)")
+BRACKET_RE = re.compile(r"^[\s{}\[\]()<>;,]*$")
+BUCKETS = 6
+
+
+def classify(line):
+    stripped = line.strip()
+    if not stripped:
+        return "blank"
+    if IMPORT_RE.match(stripped):
+        return "import"
+    if BRACKET_RE.match(stripped):
+        return "bracket"
+    if line[0] in " \t":
+        return "indented"
+    return "other"
+
+
+def boundary(model, tokens, split):
+    enc = encoder(model)
+    offset = 0
+    for token in tokens:
+        size = len(enc.decode_single_token_bytes(token))
+        if offset < split < offset + size:
+            return enc.decode_single_token_bytes(token).decode("utf-8", errors="replace")
+        offset += size
+    return None
+
+
+def attribute(paths, model=DEFAULT_MODEL, algorithm="fnv1a", alphabet="hex", length=2, sep=":", end="|", space=""):
+    enc = encoder(model)
+    radix = len(ALPHABETS[alphabet])
+    for path in paths:
+        lines = read_lines(path)
+        if not lines:
+            continue
+        values, empty = hash_batch(lines, algorithm)
+        anchors = encode_batch(residues(values, empty, radix, length), alphabet, length)
+        prefixes = [f"{index + 1}{sep}{anchor}{end}{space}" for index, anchor in enumerate(anchors)]
+        texts = [prefix + content + "\n" for prefix, content in zip(prefixes, lines)]
+        anchored = count_batch(texts, model, fmt="anchored line")
+        bare = count_batch([content + "\n" for content in lines], model, fmt="bare line")
+        alones = count_batch(prefixes, model, fmt="prefix")
+        for index, (content, prefix, alone) in enumerate(zip(lines, prefixes, alones)):
+            marginal = anchored[index] - bare[index]
+            row = {
+                "path": path,
+                "line": index + 1,
+                "class": classify(content),
+                "prefix": alone,
+                "marginal": marginal,
+                "merge": None,
+            }
+            if marginal != alone:
+                tokens = enc.encode_ordinary(texts[index])
+                row["merge"] = boundary(model, tokens, len(prefix.encode("utf-8")))
+            yield row
+
+
+def histogram(rows, show=20):
+    stats = {name: {"lines": 0, "marginal": 0, "prefix": 0, "saved": 0, "extra": 0, "buckets": [0] * BUCKETS} for name in CLASSES}
+    flagged = []
+    nonadditive = 0
+    for row in rows:
+        entry = stats[row["class"]]
+        entry["lines"] += 1
+        entry["marginal"] += row["marginal"]
+        entry["prefix"] += row["prefix"]
+        entry["buckets"][min(BUCKETS - 1, max(0, row["marginal"]))] += 1
+        if row["marginal"] < row["prefix"]:
+            entry["saved"] += 1
+        if row["marginal"] > row["prefix"]:
+            entry["extra"] += 1
+        if row["marginal"] != row["prefix"]:
+            nonadditive += 1
+            if len(flagged) < show:
+                flagged.append(row)
+    return stats, flagged, nonadditive
+
+
+def report(stats, flagged, nonadditive, model):
+    total = sum(entry["lines"] for entry in stats.values())
+    cost = sum(entry["marginal"] for entry in stats.values()) or 1
+    print(f"\n--- Marginal Anchor Attribution for {model} ({total} Lines) ---")
+    print(
+        f"{'Class':<9} | {'Lines':<8} | {'Marg/line':<9} | {'Alone':<6} | {'Share':<6} | "
+        f"{'Merged':<7} | {'Extra':<6} | {'Histogram 0..' + str(BUCKETS - 1) + '+'}"
+    )
+    print("-" * 100)
+    for name in CLASSES:
+        entry = stats[name]
+        lines = entry["lines"] or 1
+        buckets = " ".join(f"{count / lines * 100:.0f}%" for count in entry["buckets"])
+        cells = [
+            f"{entry['marginal'] / cost * 100:.1f}%",
+            f"{entry['saved'] / lines * 100:.1f}%",
+            f"{entry['extra'] / lines * 100:.1f}%",
+        ]
+        record("marginal tokens/line", entry["marginal"] / lines, "overhead", "tokens", line=name, tokenizer=model)
+        print(
+            f"{name:<9} | {entry['lines']:<8} | {entry['marginal'] / lines:<9.3f} | {entry['prefix'] / lines:<6.2f} | "
+            f"{cells[0]:<6} | {cells[1]:<7} | {cells[2]:<6} | {buckets}"
+        )
+    print("-" * 100)
+    record("marginal tokens/line", cost / (total or 1), "overhead", "tokens", line="all", tokenizer=model)
+    print("Marg/line: anchor tokens attributed per line. Alone: tokens of the prefix tokenized on its own.")
+    print("Merged/Extra: lines where the prefix fused with content (cheaper) or split it (costlier) than Alone.")
+    if flagged:
+        print(f"\n--- Non-Additive Lines (first {len(flagged)} of {nonadditive}) ---")
+        for item in flagged:
+            delta = item["marginal"] - item["prefix"]
+            print(f"{item['path']}:{item['line']} [{item['class']}] {delta:+d} token(s) via {item['merge']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Attribute exact marginal tokens to each line's anchor prefix and flag BPE boundary merges.",
+    )
+    parser.add_argument("roots", nargs="+", help="Directories or files to scan.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="Anchor hash. Default fnv1a.")
+    parser.add_argument("--alphabet", choices=sorted(ALPHABETS), default="hex", help="Anchor alphabet. Default hex.")
+    parser.add_argument("--length", type=int, default=2, help="Anchor length. Default 2.")
+    parser.add_argument("--sep", default=":", help="Separator between line number and anchor. Default ':'.")
+    parser.add_argument("--end", default="|", help="Terminator after the anchor. Default '|'.")
+    parser.add_argument("--space", default="", help="Text between terminator and content. Default none, as prefixLine.")
+    parser.add_argument("--ext", action="append", help="Only scan files with this extension. MAY be repeated.")
+    parser.add_argument("--show", type=int, default=20, help="Non-additive lines to print. Default 20.")
+    args = parser.parse_args(argv)
+    for root in args.roots:
+        if not os.path.exists(root):
+            parser.error(f"path does not exist: {root}")
+    exts = set(args.ext) if args.ext else None
+    for model in args.model or [DEFAULT_MODEL]:
+        paths = (path for root in args.roots for path in walk(root, exts))
+        rows = attribute(paths, model, args.hash, args.alphabet, args.length, args.sep, args.end, args.space)
+        stats, flagged, nonadditive = histogram(rows, args.show)
+        report(stats, flagged, nonadditive, model)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+import argparse
+import math
+import random
+import re
+import sys
+import time
+
+from healing import WS
+from patchparse import JS_SPACE
+from results import record
+
+S = WS
+NS = "[^" + WS[1:]
+LINE = r"[^\n\r\u2028\u2029]"
+SINGLE_QUOTED = re.compile(r"'[^']*'")
+DOUBLE_QUOTED = re.compile(r'"(?:[^"\\]|\\' + LINE + r')*"')
+BACKTICKS = re.compile(r"`[^`]*`")
+REDIRECT = re.compile(r"(?<![<&0-9])>{1,2}" + S + "*(" + NS + "+)|<<" + S + "*(" + NS + "+)")
+SEGMENTS = re.compile(S + r"*(?:\|(?!\|)|\|\||&&|;|\$\(|\(|\))" + S + "*")
+ENV = re.compile(r"\A[A-Za-z0-9_]+=" + NS + "*" + S + "+")
+PREFIX = re.compile(r"\A(?:sudo|env|command|exec|nice|nohup|time|xargs)" + S + "+")
+COMMAND = re.compile(r"\A(" + NS + "+)")
+DIRNAME = re.compile(r"\A" + LINE + "*/")
+SED_IN_PLACE = re.compile(S + "-" + NS + "*i")
+DD_OUTPUT = re.compile(r"\bof=", re.A)
+FORBIDDEN = {"tee", "truncate"}
+CHAINS = re.compile(r"&&|\|\||;")
+READ_PATTERNS = (
+    ("cat-family", re.compile(r"\A(?:" + S + r"*(?:[A-Za-z_][A-Za-z0-9_]*=" + NS + "+" + S + r"+)*)?"
+                              r"(?:cat|head|tail|less|more|nl)\b", re.A)),
+    ("sed -n p", re.compile(r"\A(?:" + S + r"*(?:[A-Za-z_][A-Za-z0-9_]*=" + NS + "+" + S + r"+)*)?sed\b"
+                            r"(?=" + LINE + r"*(?:^|" + S + r")-n(?:" + S + r"|\Z))"
+                            r"(?=" + LINE + r"*\bp(?:" + S + r"|\Z|'|\"))", re.A)),
+)
+RULES = ("redirect", "tee/truncate", "sed -i", "dd of=", "cat-family", "sed -n p")
+TARGETS = {
+    "redirect": "redirect",
+    "tee/truncate": "tee/truncate",
+    "sed -i": "in-place",
+    "dd of=": "dd of=",
+    "cat-family": "cat read",
+    "sed -n p": "sed read",
+}
+WRITES = ("redirect", "tee/truncate", "in-place", "dd of=", "other write")
+READS = ("cat read", "sed read")
+SIZES = (1_000, 4_000, 16_000, 64_000)
+BUDGET = 1.0
+
+
+def _trim(text):
+    return text.strip(JS_SPACE)
+
+
+def write_violation(command):
+    stripped = DOUBLE_QUOTED.sub('""', SINGLE_QUOTED.sub('""', command))
+    stripped = BACKTICKS.sub('""', stripped)
+    match = REDIRECT.search(stripped)
+    if match:
+        target = match.group(1) or match.group(2)
+        if target and target not in ("/dev/null", "&1", "&2"):
+            return "redirect", (
+                "Output redirection (> or >>) or Heredoc (<<) detected. You SHALL NOT use bash to write files. "
+                "You MUST use apply_patch for all file modifications."
+            )
+    for segment in SEGMENTS.split(stripped):
+        rest = _trim(segment)
+        if not rest:
+            continue
+        while True:
+            prefix = ENV.match(rest) or PREFIX.match(rest)
+            if not prefix:
+                break
+            rest = rest[prefix.end() :]
+        name = COMMAND.match(rest)
+        if not name:
+            continue
+        name = DIRNAME.sub("", name.group(1), count=1)
+        if name in FORBIDDEN:
+            return "tee/truncate", (
+                f"Command '{name}' writes to files. You MUST use apply_patch for all file modifications. "
+                f"You MUST NOT use '{name}' in bash."
+            )
+        if name == "sed" and SED_IN_PLACE.search(rest):
+            return "sed -i", (
+                "Command 'sed -i' edits files in-place. You MUST use apply_patch instead. "
+                "'sed' without '-i' (print-only) is allowed."
+            )
+        if name == "dd" and DD_OUTPUT.search(rest):
+            return "dd of=", "Command 'dd of=' writes to files. You MUST use apply_patch for all file modifications."
+    return None
+
+
+def detect_bash_write_violation(command):
+    found = write_violation(command)
+    return found[1] if found else None
+
+
+def read_rule(command):
+    for chain in CHAINS.split(_trim(command)):
+        chain = _trim(chain)
+        if not chain:
+            continue
+        first = _trim(chain.split("|")[0])
+        for name, pattern in READ_PATTERNS:
+            if pattern.match(first):
+                return name
+    return None
+
+
+def matches_bash_read(command):
+    return read_rule(command) is not None
+
+
+ATOMS = (
+    ("ls -la src", ()),
+    ("git status --short", ()),
+    ("git diff --stat HEAD~3", ()),
+    ("npm test -- --runInBand", ()),
+    ("rg -n 'TODO|FIXME' src", ()),
+    ("grep -rn \"a > b\" src/apply", ()),
+    ("find . -name '*.ts' -not -path './node_modules/*'", ()),
+    ("echo 'done > ok'", ()),
+    ("node -e \"console.log(1 >> 0)\"", ()),
+    ("ls missing 2>&1", ()),
+    ("npm run build > /dev/null", ()),
+    ("make check >&2", ()),
+    ("python - <<'EOF'\nimport sys\nprint(sys.version)\nEOF", ()),
+    ("wc -l < src/index.ts", ("cat read",)),
+    ("cat src/index.ts", ("cat read",)),
+    ("cat 'docs/My Notes.md'", ("cat read",)),
+    ("head -n 40 README.md", ("cat read",)),
+    ("tail -n 100 logs/app.log", ("cat read",)),
+    ("nl -ba src/apply/parser.ts", ("cat read",)),
+    ("less +G CHANGELOG.md", ("cat read",)),
+    ("more package.json", ("cat read",)),
+    ("/bin/cat src/index.ts", ("cat read",)),
+    ("sed -n '10,40p' src/bash-guard.ts", ("sed read",)),
+    ("sed -n 5p package.json", ("sed read",)),
+    ("sed --quiet '1,20p' tsconfig.json", ("sed read",)),
+    ("sed -E 's/(a|b)/c/g' input.txt", ()),
+    ("sed --expression='s/a/b/' input.txt", ()),
+    ("sed --posix -e 's/x/y/' notes.txt", ()),
+    ("cat <<'EOF' | kubectl apply -f -\nkind: Pod\nEOF", ()),
+    ("echo hello > out.txt", ("redirect",)),
+    ("printf '%s\\n' line >> notes.md", ("redirect",)),
+    ("npm test 2> errors.log", ("redirect",)),
+    ("make &> build.log", ("redirect",)),
+    ("echo ok >| forced.txt", ("redirect",)),
+    ("cat <<EOF > src/generated.ts\nexport const x = 1;\nEOF", ("redirect",)),
+    ("cat > config.json <<'EOF'\n{}\nEOF", ("redirect",)),
+    ("echo data | tee out.log", ("tee/truncate",)),
+    ("ls | tee -a listing.txt", ("tee/truncate",)),
+    ("echo x | /usr/bin/tee copy.txt", ("tee/truncate",)),
+    ("truncate -s 0 logs/app.log", ("tee/truncate",)),
+    ("sed -i 's/foo/bar/g' src/index.ts", ("in-place",)),
+    ("sed -i.bak -e 's/x/y/' README.md", ("in-place",)),
+    ("sed --in-place 's/a/b/' file.ts", ("in-place",)),
+    ("sed -Ei 's/a+/b/' file.ts", ("in-place",)),
+    ("perl -pi -e 's/a/b/' file.ts", ("in-place",)),
+    ("dd if=/dev/zero of=disk.img bs=1M count=4", ("dd of=",)),
+    ("dd if=disk.img of=/dev/null bs=1M", ()),
+    ("cp src/a.ts src/b.ts", ("other write",)),
+    ("mv notes.md docs/notes.md", ("other write",)),
+    ("touch src/new.ts", ("other write",)),
+    ("python -c \"open('x.txt', 'w').write('hi')\"", ("other write",)),
+    ("curl -sSo page.html https://example.com", ("other write",)),
+)
+WRAPPERS = (
+    ("{}", True),
+    ("cd src && {}", True),
+    ("{} | wc -l", True),
+    ("git log -1 --format=%H && {}", True),
+    ("( {} )", True),
+    ("echo $({})", True),
+    ("sudo {}", True),
+    ("time {}", True),
+    ("LANG=C {}", True),
+    ("if [ -d src ]; then {}; fi", True),
+    ("for f in *.ts; do {}; done", True),
+    ("set -e\n{}\necho done", True),
+    ("bash -c '{}'", True),
+    ("echo '{}'", False),
+)
+
+
+def _labels(atom, live):
+    return set(atom[1]) if live else set()
+
+
+def corpus(count, seed=0, script=(20, 200), script_share=0.05):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        if rng.random() < script_share:
+            picked = [rng.choice(ATOMS) for _ in range(rng.randint(*script))]
+            glue = rng.choice(("\n", " && ", "; "))
+            out.append((glue.join(atom[0] for atom in picked), set().union(*(atom[1] for atom in picked)), "script"))
+            continue
+        atom = rng.choice(ATOMS)
+        wrapper, live = rng.choice(WRAPPERS)
+        if "'" in wrapper and "'" in atom[0]:
+            wrapper, live = WRAPPERS[0]
+        out.append((wrapper.format(atom[0]), _labels(atom, live), wrapper))
+    return out
+
+
+def evaluate(commands):
+    stats = {rule: {"tp": 0, "fp": 0, "fn": 0, "shadowed": 0, "misses": {}, "false": {}} for rule in RULES}
+    totals = {"write": {"tp": 0, "fp": 0, "fn": 0}, "read": {"tp": 0, "fp": 0, "fn": 0}}
+    uncovered = 0
+    started = time.perf_counter()
+    fired = [(write_violation(command), read_rule(command)) for command, _, _ in commands]
+    seconds = time.perf_counter() - started
+    for (command, labels, wrapper), (write, read) in zip(commands, fired):
+        hits = {write[0]} if write else set()
+        hits |= {read} if read else set()
+        shadowed = set(WRITES) if write and len(labels & set(WRITES)) > 1 else set()
+        shadowed |= set(READS) if read and len(labels & set(READS)) > 1 else set()
+        for rule in RULES:
+            target = TARGETS[rule]
+            if rule in hits:
+                key = "tp" if target in labels else "fp"
+                stats[rule][key] += 1
+                if key == "fp":
+                    stats[rule]["false"].setdefault(wrapper, command)
+            elif target in labels and target in shadowed:
+                stats[rule]["shadowed"] += 1
+            elif target in labels and not any(TARGETS[other] == target for other in hits):
+                stats[rule]["fn"] += 1
+                stats[rule]["misses"].setdefault(wrapper, command)
+        truth = {"write": bool(labels & set(WRITES)), "read": bool(labels & set(READS))}
+        guessed = {"write": write is not None, "read": read is not None}
+        for side in totals:
+            if guessed[side]:
+                totals[side]["tp" if truth[side] else "fp"] += 1
+            elif truth[side]:
+                totals[side]["fn"] += 1
+        uncovered += "other write" in labels and write is None
+    return stats, totals, uncovered, seconds
+
+
+FAMILIES = {
+    "whitespace run": lambda n: "echo" + " " * n + "x",
+    "escaped quotes, unclosed": lambda n: 'echo "' + '\\"' * (n // 2),
+    "env assignments": lambda n: "A=1 " * (n // 4) + "cat f",
+    "redirect run": lambda n: "> " * (n // 2),
+    "long pipeline": lambda n: "cat a | " * (n // 8) + "wc",
+    "nested subshells": lambda n: "(" * (n // 2) + "ls" + ")" * (n // 2),
+    "sed without -n": lambda n: "sed " + "-x " * (n // 3),
+    "one long word": lambda n: "x" * n,
+}
+
+
+def _best(run, repeat=3):
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def backtracking(sizes=SIZES, budget=BUDGET):
+    rows = []
+    for family, build in FAMILIES.items():
+        for guard, check in (("write", write_violation), ("read", read_rule)):
+            timings = []
+            for size in sizes:
+                command = build(size)
+                seconds = _best(lambda: check(command), 1 if timings and timings[-1][1] > budget / 10 else 3)
+                timings.append((len(command), seconds))
+                if seconds > budget:
+                    break
+            (n1, t1), (n2, t2) = timings[-2], timings[-1]
+            growth = math.log(max(t2, 1e-9) / max(t1, 1e-9)) / math.log(n2 / n1)
+            rows.append({"family": family, "guard": guard, "chars": n2, "ms": t2 * 1000, "growth": growth})
+    return rows
+
+
+def _ratio(a, b):
+    return f"{a / b * 100:.1f}%" if b else "-"
+
+
+def report(stats, totals, uncovered, seconds, commands, rows, show):
+    chars = sum(len(command) for command, _, _ in commands)
+    print(f"\n--- bash-guard Rules ({len(commands):,} Labeled Commands, {chars / 1e6:.1f} MB) ---")
+    print(f"{'Rule':<14} | {'Target':<12} | {'TP':<6} | {'FP':<6} | {'FN':<6} | {'Precision':<9} | {'Recall'}")
+    print("-" * 76)
+    for rule in RULES:
+        s = stats[rule]
+        precision, recall = _ratio(s["tp"], s["tp"] + s["fp"]), _ratio(s["tp"], s["tp"] + s["fn"])
+        if s["tp"] + s["fp"]:
+            record("precision", s["tp"] / (s["tp"] + s["fp"]) * 100, "quality", "%", rule=rule)
+        if s["tp"] + s["fn"]:
+            record("recall", s["tp"] / (s["tp"] + s["fn"]) * 100, "quality", "%", rule=rule)
+        print(
+            f"{rule:<14} | {TARGETS[rule]:<12} | {s['tp']:<6,} | {s['fp']:<6,} | {s['fn']:<6,} | "
+            f"{precision:<9} | {recall}"
+        )
+    print("-" * 76)
+    for side, name in (("write", "detectBashWriteViolation"), ("read", "read nudge (matchesBashRead)")):
+        t = totals[side]
+        print(f"{name:<30} precision {_ratio(t['tp'], t['tp'] + t['fp'])}, recall {_ratio(t['tp'], t['tp'] + t['fn'])}")
+    shadowed = sum(stats[rule]["shadowed"] for rule in RULES)
+    print(f"Script labels not scored per rule because the guard already fired on an earlier match: {shadowed:,}.")
+    print(f"Writes through cp/mv/touch/interpreters/curl -o that no rule covers: {uncovered:,}.")
+    print(f"Both guards over the corpus: {seconds * 1000:.1f} ms, {len(commands) / seconds:,.0f} commands/sec.")
+    record("throughput", len(commands) / seconds, "throughput", "commands/s")
+    if show:
+        for rule in RULES:
+            for kind, title in (("false", "false positives"), ("misses", "misses")):
+                examples = list(stats[rule][kind].items())[:show]
+                if examples:
+                    print(f"\n{rule} {title} by wrapper:")
+                    for wrapper, command in examples:
+                        print(f"  {wrapper!r:<34} {command[:90]!r}")
+    print("\n--- Long-Command Growth (Python re, a backtracking engine like V8 Irregexp) ---")
+    print(f"{'Input family':<26} | {'Guard':<6} | {'Chars':<8} | {'ms':<10} | {'Growth':<7} | {'Flag'}")
+    print("-" * 76)
+    for row in rows:
+        flag = "SUPERLINEAR" if row["growth"] > 1.5 and row["ms"] > 1 else ""
+        record("longest input", row["ms"], "time", "ms", family=row["family"], guard=row["guard"])
+        print(
+            f"{row['family']:<26} | {row['guard']:<6} | {row['chars']:<8,} | {row['ms']:<10.3f} | "
+            f"{row['growth']:<7.2f} | {flag}"
+        )
+    print("-" * 76)
+    print(f"Growth is the time exponent between the two largest sizes; runs stop growing past {BUDGET:.0f} s.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Labeled shell-command corpus benchmark for bash-guard.ts and the read nudge in read/guard.ts. "
+        "Ports both guards, reports precision and recall per rule over pipelines, heredocs, subshells, quoted "
+        "paths and long generated scripts, and times adversarial long commands for pathological backtracking.",
+    )
+    parser.add_argument("commands", nargs="*", help="Commands to check instead of running the benchmark.")
+    parser.add_argument("--count", type=int, default=50_000, help="Labeled commands to generate.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated long-command sizes.")
+    parser.add_argument("--show", type=int, default=3, help="Example false positives and misses per rule.")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed.")
+    args = parser.parse_args(argv)
+    if args.commands:
+        for command in args.commands:
+            write, read = write_violation(_trim(command)), read_rule(command)
+            print(f"{command!r}: write={write[0] if write else '-'} read={read or '-'}")
+        return 0
+    commands = corpus(args.count, args.seed)
+    stats, totals, uncovered, seconds = evaluate(commands)
+    rows = backtracking(tuple(int(size) for size in args.sizes.split(",")))
+    report(stats, totals, uncovered, seconds, commands, rows, args.show)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
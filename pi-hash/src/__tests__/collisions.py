@@ -0,0 +1,185 @@
+import argparse
+import csv
+import math
+import os
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from corpus import percentile, read_lines, walk
+from linehash import ALPHABETS, HASHES, hash_table, residues
+from results import record
+
+LENGTHS = (2, 3, 4)
+ORDER = ("hex", "b26", "b36", "dec")
+SCHEMES = [(alphabet, length) for length in LENGTHS for alphabet in ORDER]
+FIELDS = ("lines", "subjects", "collide", "duplicate", "ambiguous", "local", "windows", "hit")
+
+
+def label(alphabet, length):
+    return f"{length}-char {alphabet}"
+
+
+def bits(alphabet, length):
+    return length * math.log2(len(ALPHABETS[alphabet]))
+
+
+def _collide(anchors, ids, subjects):
+    pairs = np.unique(np.stack([anchors[subjects], ids[subjects]], axis=1), axis=0)
+    buckets, counts = np.unique(pairs[:, 0], return_counts=True)
+    shared = buckets[counts > 1]
+    return np.isin(anchors, shared) & subjects
+
+
+def measure(anchors, ids, empty, radius, window, stride):
+    size = len(anchors)
+    subjects = ~empty
+    collide = _collide(anchors, ids, subjects)
+    _, inverse, counts = np.unique(np.where(subjects, ids, -1), return_inverse=True, return_counts=True)
+    duplicate = (counts[inverse] > 1) & subjects
+    ambiguous = np.zeros(size, bool)
+    local = np.zeros(size, bool)
+    marks = np.zeros(size + 1, np.int64)
+    for delta in range(1, min(size, max(radius, window - 1) + 1)):
+        same = anchors[:-delta] == anchors[delta:]
+        distinct = same & (ids[:-delta] != ids[delta:]) & subjects[:-delta] & subjects[delta:]
+        if delta <= radius:
+            ambiguous[:-delta] |= same
+            ambiguous[delta:] |= same
+            local[:-delta] |= distinct
+            local[delta:] |= distinct
+        if delta < window:
+            left = np.flatnonzero(distinct)
+            if len(left):
+                np.add.at(marks, np.maximum(0, left + delta - window + 1), 1)
+                np.add.at(marks, left + 1, -1)
+    starts = np.arange(0, max(1, size - window + 1), stride)
+    covered = np.cumsum(marks)[starts] > 0
+    return {
+        "lines": size,
+        "subjects": int(subjects.sum()),
+        "collide": int(collide.sum()),
+        "duplicate": int(duplicate.sum()),
+        "ambiguous": int((ambiguous & subjects).sum()),
+        "local": int((local & subjects).sum()),
+        "windows": len(starts),
+        "hit": int(covered.sum()),
+    }
+
+
+def analyze(path, algorithm="fnv1a", radius=100, window=200, stride=100):
+    try:
+        lines = read_lines(path)
+    except OSError:
+        return None
+    if not lines:
+        return None
+    values, empty, ids = hash_table(lines, algorithm)
+    schemes = {}
+    for alphabet, length in SCHEMES:
+        anchors = residues(values, empty, len(ALPHABETS[alphabet]), length)
+        schemes[label(alphabet, length)] = measure(anchors, ids, empty, radius, window, stride)
+    return {"path": path, "schemes": schemes}
+
+
+def expected(alphabet, length, radius):
+    return 1 - (1 - 1 / len(ALPHABETS[alphabet]) ** length) ** (2 * radius)
+
+
+def run(roots, algorithm="fnv1a", radius=100, window=200, stride=100, workers=None, exts=None, chunk=8):
+    paths = (path for root in roots for path in walk(root, exts))
+    totals = {label(a, n): dict.fromkeys(FIELDS, 0) for a, n in SCHEMES}
+    rates = {label(a, n): [] for a, n in SCHEMES}
+    files = []
+    task = partial(analyze, algorithm=algorithm, radius=radius, window=window, stride=stride)
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(task, paths, chunksize=chunk):
+            if result is None:
+                continue
+            files.append(result)
+            for name, counts in result["schemes"].items():
+                for field in FIELDS:
+                    totals[name][field] += counts[field]
+                if counts["subjects"]:
+                    rates[name].append(counts["collide"] / counts["subjects"])
+    return {"files": files, "totals": totals, "rates": rates}
+
+
+def report(result, radius, window):
+    files = len(result["files"])
+    lines = sum(f["schemes"][label(*SCHEMES[0])]["lines"] for f in result["files"])
+    print(f"\n--- Anchor Collision Report ({files} Files, {lines} Lines, +/-{radius} Lines, {window}-Line Windows) ---")
+    print(
+        f"{'Scheme':<12} | {'Bits':<5} | {'File coll':<9} | {'p90 file':<8} | {'Local coll':<10} | "
+        f"{'Expected':<8} | {'Unique':<7} | {'Windows':<7} | {'Dupes'}"
+    )
+    print("-" * 102)
+    for alphabet, length in sorted(SCHEMES, key=lambda s: bits(*s)):
+        name = label(alphabet, length)
+        t = result["totals"][name]
+        subjects = t["subjects"] or 1
+        cells = [
+            f"{t['collide'] / subjects * 100:.2f}%",
+            f"{percentile(result['rates'][name], 0.9) * 100:.2f}%",
+            f"{t['local'] / subjects * 100:.2f}%",
+            f"{expected(alphabet, length, radius) * 100:.2f}%",
+            f"{(1 - t['ambiguous'] / subjects) * 100:.2f}%",
+            f"{t['hit'] / (t['windows'] or 1) * 100:.1f}%",
+            f"{t['duplicate'] / subjects * 100:.1f}%",
+        ]
+        record("file collisions", t["collide"] / subjects * 100, "errors", "%", scheme=name)
+        record("per-file collisions", None, "errors", "%", [r * 100 for r in result["rates"][name]], scheme=name)
+        record("local collisions", t["local"] / subjects * 100, "errors", "%", scheme=name)
+        record("window hits", t["hit"] / (t["windows"] or 1) * 100, "errors", "%", scheme=name)
+        print(
+            f"{name:<12} | {bits(alphabet, length):<5.1f} | {cells[0]:<9} | {cells[1]:<8} | {cells[2]:<10} | "
+            f"{cells[3]:<8} | {cells[4]:<7} | {cells[5]:<7} | {cells[6]}"
+        )
+    print("-" * 102)
+    print("File coll: non-blank lines sharing an anchor with different content anywhere in the file.")
+    print(f"Local coll: the same within +/-{radius} lines; Expected is the uniform-hash prediction.")
+    print(f"Unique: anchors with no equal anchor within +/-{radius} lines, duplicates included.")
+    print("Windows: share of sliding windows holding at least one colliding pair. Dupes: identical content.")
+
+
+def write_csv(result, path):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("path", "scheme", "bits") + FIELDS)
+        for entry in sorted(result["files"], key=lambda f: f["path"]):
+            for alphabet, length in SCHEMES:
+                name = label(alphabet, length)
+                counts = entry["schemes"][name]
+                writer.writerow((entry["path"], name, f"{bits(alphabet, length):.2f}") + tuple(counts[f] for f in FIELDS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure anchor collisions and local ambiguity for candidate LINE:HASH schemes across codebases.",
+    )
+    parser.add_argument("roots", nargs="+", help="Directories or files to scan.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="Anchor hash. Default fnv1a.")
+    parser.add_argument("--radius", type=int, default=100, help="Ambiguity radius in lines. Default matches the +/-100 spiral.")
+    parser.add_argument("--window", type=int, default=200, help="Sliding window size in lines.")
+    parser.add_argument("--stride", type=int, default=100, help="Sliding window stride in lines.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Pool size. Default: CPU count.")
+    parser.add_argument("--ext", action="append", help="Only scan files with this extension. MAY be repeated.")
+    parser.add_argument("--csv", help="Write per-file, per-scheme counts to this CSV path.")
+    args = parser.parse_args(argv)
+    if args.radius < 1 or args.window < 2 or args.stride < 1:
+        parser.error("radius MUST be >= 1, window >= 2 and stride >= 1")
+    for root in args.roots:
+        if not os.path.exists(root):
+            parser.error(f"path does not exist: {root}")
+    exts = set(args.ext) if args.ext else None
+    result = run(args.roots, args.hash, args.radius, args.window, args.stride, args.workers, exts)
+    report(result, args.radius, args.window)
+    if args.csv:
+        write_csv(result, args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import argparse
+import os
+import random
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+from linehash import ALPHABETS, HASHES, encode_batch, hash_batch, residues
+from results import record
+from tokens import DEFAULT_MODEL, count_tokens
+
+SKIP_DIRS = {
+    ".git",
+    ".hg",
+    ".svn",
+    "node_modules",
+    "dist",
+    "build",
+    "coverage",
+    "__pycache__",
+    ".venv",
+    "venv",
+    ".tox",
+    ".mypy_cache",
+    ".pytest_cache",
+}
+
+BASE = "Standard read (L|)"
+
+VARIANTS = [
+    ("2-char Hex (:)", "hex", 2, ":", "|"),
+    ("4-char Hex (:)", "hex", 4, ":", "|"),
+    ("4-char B36 (:)", "b36", 4, ":", "|"),
+    ("4-char B36 (.)", "b36", 4, ".", "|"),
+    ("3-char B36 (.)", "b36", 3, ".", "|"),
+    ("3-char B36 (space)", "b36", 3, " ", "|"),
+    ("3-char B36 (no pipe)", "b36", 3, ".", " "),
+    ("3-char B36 (no sep)", "b36", 3, "", "|"),
+    ("4-digit Dec (.)", "dec", 4, ".", "|"),
+    ("3-char B26 (.)", "b26", 3, ".", "|"),
+    ("3-char B26 (no sep)", "b26", 3, "", "|"),
+    ("4-char B26 (no sep)", "b26", 4, "", "|"),
+]
+
+WORDS = [
+    "user", "patch", "hunk", "anchor", "line", "file", "result", "content", "lines", "index",
+    "error", "summary", "chunk", "context", "hash", "path", "offset", "limit", "search", "todo",
+]
+
+TEMPLATES = [
+    "import {{ {A} }} from './{b}.js';",
+    "import {{ {A}, {B} }} from '@mariozechner/pi-{b}';",
+    "export function {a}{B}({b}: {C}): {D} {{",
+    "const {a} = {b}.{c}({d});",
+    "let {a}{B} = 0;",
+    "if ({a} && !{b}) {{",
+    "return await this.{a}.find{B}({{",
+    "{a}: {{ {b}: {c}{D} }},",
+    "for (const {a} of {b}s) {{",
+    "throw new Error(`Failed to {a} '${{{b}}}'.`);",
+    "{a}.push({{ {b}, {c}: {d}.length }});",
+    "// {A} {b} {c} {d}",
+    "}});",
+    "}}",
+    "",
+]
+
+
+def synthetic(count, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    depth = 0
+    for _ in range(count):
+        template = rng.choice(TEMPLATES)
+        words = {key: rng.choice(WORDS) for key in "abcd"}
+        words.update({key.upper(): value.capitalize() for key, value in words.items()})
+        line = template.format(**words)
+        if line.startswith("}"):
+            depth = max(0, depth - 1)
+        lines.append(("  " * depth + line) if line else line)
+        if line.endswith("{"):
+            depth = min(6, depth + 1)
+    return lines
+
+
+def format_line(line_no, hash_str, content, sep=":", end="|", space=" "):
+    return f"{line_no}{sep}{hash_str}{end}{space}{content}\n"
+
+
+def walk(root, exts=None, limit=4 * 1024 * 1024):
+    if os.path.isfile(root):
+        yield root
+        return
+    for current, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(names):
+            if exts and os.path.splitext(name)[1] not in exts:
+                continue
+            full = os.path.join(current, name)
+            try:
+                if os.path.getsize(full) > limit:
+                    continue
+            except OSError:
+                continue
+            yield full
+
+
+def read_lines(path):
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if b"\x00" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace").split("\n")
+
+
+def score(path, model=DEFAULT_MODEL, algorithm="fnv1a"):
+    try:
+        lines = read_lines(path)
+    except OSError:
+        return None
+    if not lines:
+        return None
+    base = count_tokens("".join(f"{i+1}| {line}\n" for i, line in enumerate(lines)), model, BASE)
+    if base == 0:
+        return None
+    tokens = {BASE: base}
+    values, empty = hash_batch(lines, algorithm)
+    for name, alphabet, length, sep, end in VARIANTS:
+        anchors = encode_batch(residues(values, empty, len(ALPHABETS[alphabet]), length), alphabet, length)
+        text = "".join(format_line(i + 1, h, line, sep=sep, end=end) for i, (h, line) in enumerate(zip(anchors, lines)))
+        tokens[name] = count_tokens(text, model, name)
+    return {"path": path, "lines": len(lines), "tokens": tokens}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run(roots, model=DEFAULT_MODEL, workers=None, exts=None, limit=4 * 1024 * 1024, chunk=8, algorithm="fnv1a"):
+    paths = (path for root in roots for path in walk(root, exts, limit))
+    names = [BASE] + [v[0] for v in VARIANTS]
+    totals = dict.fromkeys(names, 0)
+    ratios = {name: [] for name in names}
+    files = 0
+    lines = 0
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(partial(score, model=model, algorithm=algorithm), paths, chunksize=chunk):
+            if result is None:
+                continue
+            files += 1
+            lines += result["lines"]
+            base = result["tokens"][BASE]
+            for name in names:
+                totals[name] += result["tokens"][name]
+                ratios[name].append(result["tokens"][name] / base - 1)
+        pool.close()
+        pool.join()
+    return {"model": model, "files": files, "lines": lines, "totals": totals, "ratios": ratios}
+
+
+def report(result):
+    base = result["totals"][BASE]
+    print(f"\n--- Corpus Token Efficiency Report for {result['model']} ({result['files']} Files, {result['lines']} Lines) ---")
+    print(f"{'Format':<25} | {'Tokens':<12} | {'Overhead':<9} | {'p50':<7} | {'p90':<7} | {'p99'}")
+    print("-" * 85)
+    for name, total in result["totals"].items():
+        overhead = (total / base - 1) * 100 if base else 0.0
+        ratios = result["ratios"][name]
+        p50, p90, p99 = (f"{percentile(ratios, q) * 100:.1f}%" for q in (0.5, 0.9, 0.99))
+        print(f"{name:<25} | {total:<12} | {f'{overhead:.1f}%':<9} | {p50:<7} | {p90:<7} | {p99}")
+        record("tokens", total, "tokens", "tokens", format=name, tokenizer=result["model"])
+        if name != BASE:
+            record("overhead", overhead, "overhead", "%", format=name, tokenizer=result["model"])
+            record("per-file overhead", None, "overhead", "%", [r * 100 for r in ratios], format=name,
+                   tokenizer=result["model"])
+    print("-" * 85)
+    print("Overhead is relative to the standard read; p50/p90/p99 are per-file overhead percentiles.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Score every format_line variant over whole directory trees using a process pool.",
+    )
+    parser.add_argument("roots", nargs="+", help="Directories or files to scan.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Pool size. Default: CPU count.")
+    parser.add_argument("--ext", action="append", help="Only scan files with this extension, e.g. .ts. MAY be repeated.")
+    parser.add_argument("--max-bytes", type=int, default=4 * 1024 * 1024, help="Skip files larger than this.")
+    parser.add_argument("--chunk", type=int, default=8, help="Files handed to a worker per task.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="Anchor hash. fnv1a is the Node path, xxhash32 the Bun path.")
+    args = parser.parse_args(argv)
+    for root in args.roots:
+        if not os.path.exists(root):
+            parser.error(f"path does not exist: {root}")
+    exts = set(args.ext) if args.ext else None
+    for model in args.model or [DEFAULT_MODEL]:
+        report(run(args.roots, model, args.workers, exts, args.max_bytes, args.chunk, args.hash))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+from apply import anchor_chunk, apply_chunks, render_patch
+from corpus import WORDS, percentile, synthetic
+from results import record
+
+KINDS = ("clean", "wrapped", "indent", "echo", "hyphen", "merge")
+SIZES = (10, 100, 1000, 10_000)
+EDIT_EVERY = 5
+DAMAGE_RATE = 0.1
+PADDING = 200
+CONFUSABLES = ("\u2010", "\u2011", "\u2012", "\u2013", "\u2014", "\u2212", "\uFE63", "\uFF0D")
+
+
+def _indent(line):
+    return line[: len(line) - len(line.lstrip(" "))]
+
+
+def _edit(line):
+    for word in WORDS:
+        if word in line:
+            return line.replace(word, word + "Next", 1)
+    return line + " // edited"
+
+
+def _region(rng, total, size):
+    return rng.randint(1, total - size - 1)
+
+
+def _base(rng, size, blanks=True):
+    lines = synthetic(size + PADDING, rng.randrange(1 << 30))
+    return lines if blanks else [line or "  // -" for line in lines]
+
+
+def _intended(rng, lines, start, size):
+    old = lines[start : start + size]
+    new = [_edit(line) if i % EDIT_EVERY == 0 else line for i, line in enumerate(old)]
+    return old, new
+
+
+def _splittable(line):
+    body = line.lstrip(" ")
+    return len(body.replace(" ", "")) >= 6 and " " in body.strip()
+
+
+def _wrap(rng, line):
+    indent = _indent(line)
+    body = line[len(indent) :]
+    spaces = [i for i, char in enumerate(body) if char == " "]
+    at = rng.choice(spaces)
+    return [indent + body[:at], indent + "    " + body[at + 1 :]]
+
+
+def case_clean(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    start = _region(rng, len(lines), size)
+    _, new = _intended(rng, lines, start, size)
+    chunk = anchor_chunk(lines, start, size, new)
+    return lines, [chunk], lines[:start] + new + lines[start + size :]
+
+
+def case_wrapped(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    start = _region(rng, len(lines), size)
+    old, new = _intended(rng, lines, start, size)
+    damaged = []
+    for i, line in enumerate(new):
+        if i % EDIT_EVERY and _splittable(line) and rng.random() < DAMAGE_RATE * 2:
+            damaged.extend(_wrap(rng, line))
+        else:
+            damaged.append(line)
+    chunk = anchor_chunk(lines, start, size, damaged)
+    return lines, [chunk], lines[:start] + new + lines[start + size :]
+
+
+def case_indent(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    start = _region(rng, len(lines), size)
+    _, new = _intended(rng, lines, start, size)
+    chunk = anchor_chunk(lines, start, size, [line.lstrip(" ") for line in new])
+    return lines, [chunk], lines[:start] + new + lines[start + size :]
+
+
+def case_echo(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    start = _region(rng, len(lines), size)
+    _, new = _intended(rng, lines, start, size)
+    damaged = [lines[start - 1]] + new + [lines[start + size]]
+    chunk = anchor_chunk(lines, start, size, damaged)
+    return lines, [chunk], lines[:start] + new + lines[start + size :]
+
+
+def case_hyphen(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    start = _region(rng, len(lines), size)
+    for i in range(start, start + size):
+        if rng.random() < DAMAGE_RATE * 3:
+            lines[i] = f"{lines[i]} // a {rng.choice(CONFUSABLES)} b"
+    if not any(char in line for line in lines[start : start + size] for char in CONFUSABLES):
+        lines[start] += f" // a {CONFUSABLES[3]} b"
+    old = lines[start : start + size]
+    fixed = [line.translate({ord(char): "-" for char in CONFUSABLES}) for line in old]
+    chunk = anchor_chunk(lines, start, size, old)
+    return lines, [chunk], lines[:start] + fixed + lines[start + size :]
+
+
+def case_merge(rng, size, blanks=True):
+    lines = _base(rng, size, blanks)
+    slots = sorted(rng.sample(range(1, len(lines) - 2, 3), max(1, size // 10)))
+    positions = []
+    for i, slot in enumerate(slots):
+        at = slot + 2 * i
+        indent = "  " * rng.randint(0, 3)
+        a, b = rng.sample(WORDS, 2)
+        lines[at:at] = [f"{indent}if ({a}Ready &&", f"{indent}    {b}Ready) {{"]
+        positions.append(at)
+    chunks = []
+    expected = list(lines)
+    for at in reversed(positions):
+        merged = f"{lines[at]} {lines[at + 1].strip()}"
+        expected[at : at + 2] = [merged]
+        chunks.append(anchor_chunk(lines, at, 1, [merged.lstrip(" ") if rng.random() < DAMAGE_RATE * 3 else merged]))
+    chunks.reverse()
+    return lines, chunks, expected
+
+
+CASES = {
+    "clean": case_clean,
+    "wrapped": case_wrapped,
+    "indent": case_indent,
+    "echo": case_echo,
+    "hyphen": case_hyphen,
+    "merge": case_merge,
+}
+
+
+def generate(kind, size, seed=0, blanks=True):
+    rng = random.Random(f"{kind}:{size}:{seed}")
+    lines, chunks, expected = CASES[kind](rng, size, blanks)
+    return {"kind": kind, "size": size, "seed": seed, "lines": lines, "chunks": chunks, "expected": expected}
+
+
+def heal(case):
+    chunks = copy.deepcopy(case["chunks"])
+    start = time.perf_counter()
+    try:
+        result, noops = apply_chunks(case["lines"], chunks, f"{case['kind']}.ts")
+        error = None
+    except ValueError as exc:
+        result, noops, error = None, [], str(exc)
+    elapsed = time.perf_counter() - start
+    name = f"{case['kind']}-{case['size']}-{case['seed']}"
+    healed = result == case["expected"]
+    return {"name": name, "healed": healed, "error": error, "noops": len(noops), "seconds": elapsed}
+
+
+def write_fixture(root, case):
+    name = f"{case['kind']}-{case['size']}-{case['seed']}"
+    with open(os.path.join(root, f"{name}.orig.ts"), "w", encoding="utf-8") as handle:
+        handle.write("\n".join(case["lines"]))
+    with open(os.path.join(root, f"{name}.expected.ts"), "w", encoding="utf-8") as handle:
+        handle.write("\n".join(case["expected"]))
+    with open(os.path.join(root, f"{name}.patch"), "w", encoding="utf-8") as handle:
+        handle.write(render_patch(f"{name}.orig.ts", case["chunks"]))
+    return {"name": name, "kind": case["kind"], "size": case["size"], "seed": case["seed"], "expect": "healed"}
+
+
+def run(kinds, sizes, trials, out=None, blanks=True):
+    rows = []
+    manifest = []
+    for size in sizes:
+        for kind in kinds:
+            outcomes = []
+            for seed in range(trials):
+                case = generate(kind, size, seed, blanks)
+                if out:
+                    manifest.append(write_fixture(out, case))
+                outcomes.append(heal(case))
+            rows.append({"kind": kind, "size": size, "outcomes": outcomes})
+    if out:
+        with open(os.path.join(out, "manifest.json"), "w") as handle:
+            json.dump(manifest, handle, indent=2)
+    return rows
+
+
+def failures(rows):
+    return [(row["kind"], o) for row in rows for o in row["outcomes"] if not o["healed"]]
+
+
+def report(rows, trials, blanks=True, show=20):
+    fixtures = "Blank Lines Kept" if blanks else "No Blank Lines"
+    print(f"\n--- Healing Success and Latency ({trials} Trials per Cell, {fixtures}) ---")
+    print(
+        f"{'Kind':<8} | {'Hunk lines':<10} | {'Healed':<7} | {'Wrong':<7} | {'Errors':<6} | "
+        f"{'p50 ms':<9} | {'p90 ms':<9} | {'Lines/sec'}"
+    )
+    print("-" * 88)
+    for row in rows:
+        outcomes = row["outcomes"]
+        times = [o["seconds"] for o in outcomes]
+        healed = f"{sum(o['healed'] for o in outcomes) / len(outcomes) * 100:.0f}%"
+        errors = sum(o["error"] is not None for o in outcomes)
+        wrong = f"{(len(outcomes) - errors - sum(o['healed'] for o in outcomes)) / len(outcomes) * 100:.0f}%"
+        rate = row["size"] * len(times) / sum(times)
+        cell = {"damage": row["kind"], "size": row["size"]}
+        record("healed", sum(o["healed"] for o in outcomes) / len(outcomes) * 100, "quality", "%", **cell)
+        record("locate errors", errors, "errors", "trials", **cell)
+        record("heal latency", None, "time", "ms", [t * 1000 for t in times], **cell)
+        print(
+            f"{row['kind']:<8} | {row['size']:<10} | {healed:<7} | {wrong:<7} | {errors:<6} | "
+            f"{percentile(times, 0.5) * 1000:<9.2f} | {percentile(times, 0.9) * 1000:<9.2f} | {rate:,.0f}"
+        )
+    print("-" * 88)
+    print("Healed: applied result equals the intended file. Wrong: applied, but the result differs from it.")
+    print("Errors: locate failures. Times cover locate, heal and apply. The clean rows are undamaged controls.")
+    print("merge cells use one single-line chunk per 10 hunk lines, since each merge touches a line pair.")
+    failed = failures(rows)
+    if failed:
+        print(f"\n--- Failed Cases (first {min(show, len(failed))} of {len(failed)}; every case expects healed) ---")
+        for _, outcome in failed[:show]:
+            print(f"{outcome['name']}: {outcome['error'] or 'wrong result'}")
+    controls = [outcome["name"] for kind, outcome in failed if kind == "clean"]
+    if controls:
+        print(f"\nHEAL REGRESSION: {len(controls)} undamaged clean control(s) failed.")
+        print("restore_old_wrapped_lines, the port of restoreOldWrappedLines, joins a blank line with the next line")
+        print("as if it were wrapped and drops it.")
+    return not controls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate LLM-style damaged edits (wrapped lines, lost indent, echoed boundaries, confusable "
+        "hyphens, merged continuations) and measure how often and how fast the healing engine repairs them.",
+    )
+    parser.add_argument("--kind", action="append", choices=KINDS, help="Damage kind. MAY be repeated. Default: all.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated hunk sizes in lines.")
+    parser.add_argument("--trials", type=int, default=5, help="Cases per kind and size.")
+    parser.add_argument("--no-blanks", action="store_true", help="Replace blank lines in fixtures, hiding the "
+                        "blank-line regression in restore_old_wrapped_lines from the other damage kinds.")
+    parser.add_argument("--out", help="Write .orig.ts, .patch and .expected.ts fixtures plus manifest.json here.")
+    args = parser.parse_args(argv)
+    sizes = tuple(int(size) for size in args.sizes.split(","))
+    if min(sizes) < 2 or args.trials < 1:
+        parser.error("sizes MUST be >= 2 and trials >= 1")
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    rows = run(args.kind or KINDS, sizes, args.trials, args.out, not args.no_blanks)
+    return 0 if report(rows, args.trials, not args.no_blanks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
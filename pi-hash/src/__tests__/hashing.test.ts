@@ -1,5 +1,6 @@
 import { normalizeUnicode } from "../shared/normalize.js";
 import { computeLineHash } from "../shared/hash.js";
+import { RUNTIME_HASH, tokenService } from "./token-service.js";
 import test from "node:test";
 import assert from "node:assert";
 
@@ -27,3 +28,21 @@ test("Case sensitivity", () => {
   const hash2 = computeLineHash("function getuser()");
   assert.notStrictEqual(hash1, hash2);
 });
+
+test("Line hashes match the Python reference", async (t) => {
+  const service = await tokenService();
+  if (!service) return t.skip("token service unavailable (python3 with tiktoken and numpy)");
+  t.after(() => service.release());
+  const lines = [
+    "  const x = 10;  ",
+    "function getUser()",
+    "function getuser()",
+    "   ",
+    "\u201csmart quotes\u201d and em\u2014dash",
+    "e\u0301t\u00e9 zero\u200Bwidth",
+    "\tindented\r",
+    "\u{1F600} emoji",
+  ];
+  const expected = await service.hashes(lines, { algorithm: RUNTIME_HASH });
+  assert.deepStrictEqual(lines.map((line) => computeLineHash(line)), expected);
+});
@@ -0,0 +1,233 @@
+import re
+
+from normalize import strip_whitespace
+
+WS = r"[\t\n\x0B\x0C\r \u00A0\u1680\u2000-\u200A\u2028\u2029\u202F\u205F\u3000\uFEFF]"
+CONFUSABLE_HYPHENS_RE = re.compile(r"[\u2010\u2011\u2012\u2013\u2014\u2212\uFE63\uFF0D]")
+CONTINUATION = re.compile(r"(?:&&|\|\||\?\?|\?|:|=|,|\+|-|\*|/|\.|\()" + WS + r"*\Z")
+MERGE_OPERATORS = re.compile(r"[|&?]")
+LEADING = re.compile(WS + "*")
+WRAP_SPAN = 10
+MIN_WRAP_CANON = 6
+MERGE_SLACK = 32
+
+
+class GlobalTest:
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.last_index = 0
+
+    def test(self, text):
+        if self.last_index > len(text):
+            self.last_index = 0
+            return False
+        found = self.pattern.search(text, self.last_index)
+        if found is None:
+            self.last_index = 0
+            return False
+        self.last_index = found.end()
+        return True
+
+    def replace(self, text, replacement):
+        self.last_index = 0
+        return self.pattern.sub(replacement, text)
+
+
+CONFUSABLE_HYPHENS = GlobalTest(CONFUSABLE_HYPHENS_RE)
+
+
+def equals_ignoring_whitespace(a, b):
+    if a == b:
+        return True
+    return strip_whitespace(a) == strip_whitespace(b)
+
+
+def strip_all_whitespace(text):
+    return strip_whitespace(text)
+
+
+def strip_trailing_continuation_tokens(text):
+    return CONTINUATION.sub("", text, count=1)
+
+
+def strip_merge_operator_chars(text):
+    return MERGE_OPERATORS.sub("", text)
+
+
+def leading_whitespace(text):
+    return LEADING.match(text).group(0)
+
+
+def restore_leading_indent(template, line):
+    if not line:
+        return line
+    indent = leading_whitespace(template)
+    if not indent:
+        return line
+    if leading_whitespace(line):
+        return line
+    return indent + line
+
+
+def normalize_confusable_hyphens(text):
+    return CONFUSABLE_HYPHENS.replace(text, "-")
+
+
+def normalize_confusable_hyphens_in_lines(lines):
+    return [normalize_confusable_hyphens(line) for line in lines]
+
+
+def restore_indent_for_paired_replacement(old_lines, new_lines):
+    if len(old_lines) != len(new_lines):
+        return new_lines
+    out = [restore_leading_indent(old, new) for old, new in zip(old_lines, new_lines)]
+    return out if out != new_lines else new_lines
+
+
+def restore_old_wrapped_lines(old_lines, new_lines):
+    if not old_lines or len(new_lines) < 2:
+        return new_lines
+    canon_to_old = {}
+    for line in old_lines:
+        canon = strip_all_whitespace(line)
+        if canon in canon_to_old:
+            canon_to_old[canon][1] += 1
+        else:
+            canon_to_old[canon] = [line, 1]
+    candidates = []
+    for start in range(len(new_lines)):
+        for length in range(2, WRAP_SPAN + 1):
+            if start + length > len(new_lines):
+                break
+            canon = strip_all_whitespace("".join(new_lines[start : start + length]))
+            old = canon_to_old.get(canon)
+            if old and old[1] == 1 and len(canon) >= MIN_WRAP_CANON:
+                candidates.append((start, length, old[0], canon))
+    if not candidates:
+        return new_lines
+    counts = {}
+    for candidate in candidates:
+        counts[candidate[3]] = counts.get(candidate[3], 0) + 1
+    unique = [candidate for candidate in candidates if counts[candidate[3]] == 1]
+    if not unique:
+        return new_lines
+    unique.sort(key=lambda candidate: -candidate[0])
+    out = list(new_lines)
+    for start, length, replacement, _ in unique:
+        out[start : start + length] = [replacement]
+    return out
+
+
+def strip_range_boundary_echo(file_lines, start_line, end_line, dst_lines):
+    count = end_line - start_line + 1
+    if len(dst_lines) <= 1 or len(dst_lines) <= count:
+        return dst_lines
+    out = dst_lines
+    before = start_line - 2
+    if before >= 0 and equals_ignoring_whitespace(out[0], file_lines[before]):
+        out = out[1:]
+    after = end_line
+    if after < len(file_lines) and out and equals_ignoring_whitespace(out[-1], file_lines[after]):
+        out = out[:-1]
+    return out
+
+
+def maybe_expand_single_line_merge(file_lines, line, dst, touched):
+    if len(dst) != 1:
+        return None
+    if line < 1 or line > len(file_lines):
+        return None
+    new_line = dst[0]
+    new_canon = strip_all_whitespace(new_line)
+    new_canon_ops = strip_merge_operator_chars(new_canon)
+    if not new_canon:
+        return None
+    orig_canon = strip_all_whitespace(file_lines[line - 1])
+    orig_match = strip_trailing_continuation_tokens(orig_canon)
+    orig_canon_ops = strip_merge_operator_chars(orig_canon)
+    if not orig_canon:
+        return None
+    if len(orig_match) < len(orig_canon) and line < len(file_lines) and line + 1 not in touched:
+        next_canon = strip_all_whitespace(file_lines[line])
+        a = new_canon.find(orig_match)
+        b = new_canon.find(next_canon)
+        if a != -1 and b != -1 and a < b and len(new_canon) <= len(orig_canon) + len(next_canon) + MERGE_SLACK:
+            return {"start_line": line, "delete_count": 2, "new_lines": [new_line]}
+    if line - 2 >= 0 and line - 1 not in touched:
+        prev_canon = strip_all_whitespace(file_lines[line - 2])
+        prev_match = strip_trailing_continuation_tokens(prev_canon)
+        if len(prev_match) >= len(prev_canon):
+            return None
+        a = new_canon_ops.find(strip_merge_operator_chars(prev_match))
+        b = new_canon_ops.find(orig_canon_ops)
+        if a != -1 and b != -1 and a < b and len(new_canon) <= len(prev_canon) + len(orig_canon) + MERGE_SLACK:
+            return {"start_line": line - 1, "delete_count": 2, "new_lines": [new_line]}
+    return None
+
+
+def heal_chunk_overlaps(chunk):
+    removal = set()
+    context = {}
+    for i, anchor in enumerate(chunk["old_anchors"]):
+        if i < len(chunk["new_lines"]) and chunk["old_lines"][i] == chunk["new_lines"][i]:
+            context[anchor["line"]] = i
+        else:
+            removal.add(anchor["line"])
+    drop = sorted((context[line] for line in removal if line in context), reverse=True)
+    for index in drop:
+        del chunk["old_lines"][index]
+        del chunk["old_anchors"][index]
+        del chunk["new_lines"][index]
+
+
+def _same(lhs, rhs):
+    return "\n".join(lhs) == "\n".join(rhs)
+
+
+def _confusable(lines):
+    return any(CONFUSABLE_HYPHENS.test(line) for line in lines)
+
+
+def compute_replacements_with_healing(original, path, chunks, noops, locate, find_context, build_unique):
+    unique = build_unique(original)
+    replacements = []
+    touched = set()
+    for chunk in chunks:
+        heal_chunk_overlaps(chunk)
+        touched.update(anchor["line"] for anchor in chunk["old_anchors"])
+    drift = 0
+    for chunk in chunks:
+        base = chunk["old_anchors"][0]["line"] - 1 if chunk["old_anchors"] else len(original)
+        seed = base + drift
+        if chunk.get("change_context"):
+            try:
+                seed = find_context(original, chunk["change_context"], max(0, seed))
+            except ValueError:
+                pass
+        start = locate(original, chunk, seed, unique)
+        old_lines = original[start : start + len(chunk["old_lines"])]
+        new_lines = list(chunk["new_lines"])
+        merged = maybe_expand_single_line_merge(original, start + 1, new_lines, touched)
+        if merged:
+            merged_old = original[merged["start_line"] - 1 : merged["start_line"] - 1 + merged["delete_count"]]
+            healed = restore_indent_for_paired_replacement([merged_old[0] if merged_old else ""], merged["new_lines"])
+            if _same(merged_old, healed) and _confusable(merged_old):
+                healed = normalize_confusable_hyphens_in_lines(healed)
+            if _same(merged_old, healed):
+                noops.append({"path": path, "line": merged["start_line"], "reason": "Replacement identical to current content"})
+            else:
+                replacements.append({"start": merged["start_line"] - 1, "old_length": merged["delete_count"], "new_lines": healed})
+                drift += len(healed) - merged["delete_count"]
+            continue
+        new_lines = strip_range_boundary_echo(original, start + 1, start + len(chunk["old_lines"]), new_lines)
+        new_lines = restore_old_wrapped_lines(old_lines, new_lines)
+        new_lines = restore_indent_for_paired_replacement(old_lines, new_lines)
+        if _same(old_lines, new_lines) and _confusable(old_lines):
+            new_lines = normalize_confusable_hyphens_in_lines(new_lines)
+        if _same(old_lines, new_lines):
+            noops.append({"path": path, "line": start + 1, "reason": "Replacement identical to current content"})
+            continue
+        replacements.append({"start": start, "old_length": len(chunk["old_lines"]), "new_lines": new_lines})
+        drift += len(new_lines) - len(chunk["old_lines"])
+    replacements.sort(key=lambda replacement: replacement["start"])
+    return replacements
@@ -0,0 +1,412 @@
+import argparse
+import itertools
+import mmap
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from corpus import synthetic
+from linehash import compute_line_hash
+from pagination import MAX_BYTES, MAX_LINES, units
+from results import peak_rss, record, reset_peak
+from search import MappedFile
+
+MIB = 1 << 20
+SIZES = (1, 16, 256, 1024)
+KINDS = ("tall", "wide", "crlf", "unicode", "binary")
+WINDOWS = (("head", 0.0, None), ("middle", 0.5, 50), ("end", 1.0, 50))
+STRIDE = 256
+WIDE_MIN = 1024
+WIDE_MAX = 100 * 1024
+FIXTURES = 2
+CHUNK = 64 * MIB
+SUFFIX = ".lineidx"
+MAGIC = int.from_bytes(b"PILINES1", "little")
+VERSION = 1
+HEADER = 6
+V8_MAX_STRING = (1 << 29) - 24
+UNICODE = (
+    "\u6f22\u5b57",
+    "\u3053\u3093\u306b\u3061\u306f",
+    "\U0001F600",
+    "\U0001F469\u200d\U0001F4BB",
+    "e\u0301",
+    "\u0645\u0631\u062d\u0628\u0627",
+    "\u00a0",
+    "\u2028",
+    "\u00e9t\u00e9",
+    "\uff21\uff22",
+)
+PRINTABLE = bytes(range(0x20, 0x7F))
+
+
+def _lines_of(kind, rng):
+    if kind == "wide":
+        while True:
+            payload = rng.randbytes(int(WIDE_MIN * (WIDE_MAX / WIDE_MIN) ** rng.random()) // 2).hex()
+            yield f'export const blob{rng.getrandbits(24):06x} = "{payload}";\n'
+    source = synthetic(20_000, rng.randrange(1 << 30))
+    if kind == "binary":
+        while True:
+            raw = bytearray(rng.choice(PRINTABLE) for _ in range(rng.randint(16, 2048)))
+            for _ in range(len(raw) // 10):
+                raw[rng.randrange(len(raw))] = rng.randrange(256)
+            yield bytes(raw) + b"\n"
+    for n in itertools.count():
+        line = source[n % len(source)]
+        if kind == "crlf":
+            yield line + "\r\n"
+        elif kind == "unicode":
+            words = line.split(" ")
+            for _ in range(rng.randint(1, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(UNICODE))
+            yield " ".join(words) + "\n"
+        else:
+            yield line + "\n"
+
+
+def block(kind, size, seed=0):
+    pieces = []
+    used = 0
+    for line in _lines_of(kind, random.Random(f"{kind}:{seed}")):
+        data = line if isinstance(line, bytes) else line.encode("utf-8")
+        pieces.append(data)
+        used += len(data)
+        if used >= size:
+            return b"".join(pieces)
+
+
+def generate(path, kind, size, seed=0):
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    unit = block(kind, min(size, 4 * MIB if kind == "wide" else MIB), seed)
+    with open(path, "wb") as handle:
+        written = 0
+        if kind == "unicode":
+            written = handle.write("\ufeff".encode("utf-8"))
+        elif kind == "binary":
+            written = handle.write(b"BIN")
+        while written < size:
+            written += handle.write(unit[: size - written])
+    return path
+
+
+def sidecar(path):
+    return path + SUFFIX
+
+
+def build_index(path, index_path=None, stride=STRIDE, chunk=CHUNK):
+    mapped = MappedFile(path)
+    try:
+        starts = [np.zeros(1, np.uint64)]
+        seen = 0
+        for base in range(0, mapped.size, chunk):
+            found = np.flatnonzero(mapped.view[base : base + chunk] == 0x0A)
+            starts.append(found[(-(seen + 1)) % stride :: stride].astype(np.uint64) + np.uint64(base + 1))
+            seen += found.size
+            if hasattr(mmap, "MADV_DONTNEED"):
+                mapped.data.madvise(mmap.MADV_DONTNEED, base, min(chunk, mapped.size - base))
+        stat = os.fstat(mapped.handle.fileno())
+    finally:
+        mapped.close()
+    header = np.array([MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, stride, seen + 1], np.uint64)
+    index_path = index_path or sidecar(path)
+    temp = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as handle:
+        handle.write(header.astype("<u8").tobytes())
+        for part in starts:
+            handle.write(part.astype("<u8").tobytes())
+    os.replace(temp, index_path)
+    return index_path
+
+
+def load_index(path, index_path=None):
+    with open(index_path or sidecar(path), "rb") as handle:
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    words = np.frombuffer(data, "<u8")
+    stat = os.stat(path)
+    magic, version, size, mtime_ns, stride, lines = (int(value) for value in words[:HEADER])
+    if magic != MAGIC or version != VERSION or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+        return None
+    return {"lines": lines, "stride": stride, "starts": words[HEADER:], "data": data}
+
+
+def render(lines, start, total, limit):
+    end = min(total, start + limit) if limit else total
+    output = []
+    used = 0
+    truncated = False
+    for i, content in zip(range(start, end), lines):
+        line = f"{i + 1}:{compute_line_hash(content)}|{content}"
+        size = units(line)
+        if len(output) >= MAX_LINES or used + size > MAX_BYTES:
+            truncated = True
+            output.append(f"\n[Showing lines {start + 1}-{i} of {total}. Use offset={i + 1} to continue.]")
+            break
+        output.append(line)
+        used += size + 1
+    if not truncated and limit and start + limit < total:
+        output.append(f"\n[{total - (start + limit)} more lines. Use offset={end + 1} to continue.]")
+    return output
+
+
+def _start(offset, total):
+    start = max(0, (offset or 1) - 1)
+    if start >= total:
+        raise ValueError(f"Offset {offset} is beyond end of file ({total} lines)")
+    return start
+
+
+def read_range(lines, offset=1, limit=None):
+    start = _start(offset, len(lines))
+    return render((lines[i] for i in range(start, len(lines))), start, len(lines), limit)
+
+
+def _following(mapped, position):
+    while True:
+        end = mapped.data.find(b"\n", position)
+        if end == -1:
+            yield mapped.text(position, mapped.size)
+            return
+        yield mapped.text(position, end)
+        position = end + 1
+
+
+def seek(mapped, index, start):
+    position = int(index["starts"][start // index["stride"]])
+    for _ in range(start % index["stride"]):
+        position = mapped.data.find(b"\n", position) + 1
+    return position
+
+
+def read_window(mapped, index, offset=1, limit=None):
+    start = _start(offset, index["lines"])
+    return render(_following(mapped, seek(mapped, index, start)), start, index["lines"], limit)
+
+
+def _limit(memory):
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+
+def _units(part):
+    return int(np.count_nonzero((part < 0x80) | (part >= 0xC0))) + int(np.count_nonzero(part >= 0xF0))
+
+
+def utf16_units(path):
+    mapped = MappedFile(path)
+    try:
+        return sum(_units(mapped.view[base : base + CHUNK]) for base in range(0, mapped.size, CHUNK))
+    finally:
+        mapped.close()
+
+
+def _full(path, windows):
+    before = reset_peak()
+    try:
+        started = time.perf_counter()
+        with open(path, "rb") as handle:
+            data = handle.read()
+        text = data.decode("utf-8", errors="replace")
+        lines = text.split("\n")
+        split = time.perf_counter() - started
+        reads = []
+        for offset, limit in windows:
+            started = time.perf_counter()
+            output = read_range(lines, offset, limit)
+            reads.append((output, split, time.perf_counter() - started))
+        peak = peak_rss() - before
+        return {"reads": reads, "peak": peak, "lines": len(lines)}
+    except MemoryError:
+        return {"error": "OOM"}
+
+
+def _build(path, index_path, stride):
+    before = reset_peak()
+    started = time.perf_counter()
+    build_index(path, index_path, stride)
+    seconds = time.perf_counter() - started
+    peak = peak_rss() - before
+    return {"seconds": seconds, "peak": peak, "bytes": os.path.getsize(index_path), "units": utf16_units(path)}
+
+
+def _windowed(path, index_path, windows):
+    before = reset_peak()
+    started = time.perf_counter()
+    index = load_index(path, index_path)
+    mapped = MappedFile(path)
+    opened = time.perf_counter() - started
+    reads = []
+    try:
+        for offset, limit in windows:
+            started = time.perf_counter()
+            start = _start(offset, index["lines"])
+            position = seek(mapped, index, start)
+            located = time.perf_counter()
+            output = render(_following(mapped, position), start, index["lines"], limit)
+            reads.append((output, opened + located - started, time.perf_counter() - located))
+    finally:
+        mapped.close()
+    return {"reads": reads, "peak": peak_rss() - before, "lines": index["lines"]}
+
+
+def isolated(task, *args, memory=None):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(1, context, _limit, (memory,), max_tasks_per_child=1) as pool:
+        try:
+            return pool.submit(task, *args).result()
+        except BrokenProcessPool:
+            return {"error": "killed"}
+
+
+def physical_memory():
+    return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def _offset(total, share, limit):
+    fits = total - (limit or 0) + 1
+    return max(1, min(fits if fits > 1 else total, round(total * share)))
+
+
+def measure(path, index_path, stride=STRIDE, memory=None):
+    built = isolated(_build, path, index_path, stride, memory=memory)
+    total = load_index(path, index_path)["lines"]
+    labels = []
+    windows = []
+    for label, share, limit in WINDOWS:
+        offset = _offset(total, share, limit)
+        if offset not in [start for start, _ in windows]:
+            labels.append(label)
+            windows.append((offset, limit))
+    windowed = isolated(_windowed, path, index_path, windows, memory=memory)
+    full = isolated(_full, path, windows, memory=memory)
+    same = [a[0] == b[0] for a, b in zip(windowed["reads"], full["reads"])] if "reads" in full else []
+    return {
+        "size": os.path.getsize(path),
+        "lines": total,
+        "labels": labels,
+        "windows": windows,
+        "built": built,
+        "windowed": windowed,
+        "full": full,
+        "same": same,
+    }
+
+
+def _mb(value):
+    return f"{value / MIB:,.1f}"
+
+
+def _shown(output):
+    return sum(1 for line in output if not line.startswith("\n["))
+
+
+def report(rows, memory, stride=STRIDE):
+    print(f"\n--- Line-Offset Sidecar Build (mmap scan, every {stride}th line start) ---")
+    print(
+        f"{'File':<24} | {'Size MiB':<9} | {'Lines':<12} | {'Build ms':<9} | {'MiB/s':<7} | {'Peak MiB':<8} | "
+        f"{'Sidecar KiB'}"
+    )
+    print("-" * 96)
+    for name, r in rows:
+        b = r["built"]
+        record("sidecar build", r["size"] / MIB / b["seconds"], "throughput", "MiB/s", file=name)
+        record("sidecar peak RSS", b["peak"] / MIB, "memory", "MiB", file=name)
+        print(
+            f"{name:<24} | {_mb(r['size']):<9} | {r['lines']:<12,} | {b['seconds'] * 1000:<9,.1f} | "
+            f"{r['size'] / MIB / b['seconds']:<7,.0f} | {_mb(b['peak']):<8} | {b['bytes'] / 1024:,.1f}"
+        )
+    print("-" * 96)
+    print("\n--- Windowed Read vs Full Split (executeReadHash readRange) ---")
+    print(
+        f"{'File':<24} | {'Window':<22} | {'Shown':<5} | {'Split ms':<9} | {'Split MiB':<9} | {'Seek ms':<7} | "
+        f"{'Seek MiB':<8} | {'Render ms':<9} | {'Speedup':<8} | {'Same'}"
+    )
+    print("-" * 130)
+    over = []
+    for name, r in rows:
+        full, windowed = r["full"], r["windowed"]
+        record("windowed peak RSS", windowed["peak"] / MIB, "memory", "MiB", file=name)
+        if "reads" in full:
+            record("split peak RSS", full["peak"] / MIB, "memory", "MiB", file=name)
+        record("mismatches", r["same"].count(False), "errors", "windows", file=name)
+        if r["built"]["units"] > V8_MAX_STRING:
+            over.append(name)
+        for k, label in enumerate(r["labels"]):
+            offset, limit = r["windows"][k]
+            output, located, rendered = windowed["reads"][k]
+            window = f"{label} {offset:,}+{limit or 'default'}"
+            record("seek", located * 1000, "time", "ms", file=name, window=label)
+            record("render", rendered * 1000, "time", "ms", file=name, window=label)
+            cells, speedup, same = f"{full.get('error', '-'):<9} | {'-':<9}", "-", "-"
+            if "reads" in full:
+                _, split, baseline = full["reads"][k]
+                record("split", split * 1000, "time", "ms", file=name, window=label)
+                cells = f"{split * 1000:<9,.1f} | {_mb(full['peak']):<9}"
+                speedup = f"{(split + baseline) / (located + rendered):,.0f}x"
+                same = "yes" if r["same"][k] else "NO"
+            print(
+                f"{name:<24} | {window:<22} | {_shown(output):<5} | {cells} | {located * 1000:<7,.2f} | "
+                f"{_mb(windowed['peak']):<8} | {rendered * 1000:<9,.1f} | {speedup:<8} | {same}"
+            )
+    print("-" * 130)
+    print("Split: read, decode and split the whole file, as executor.ts does before readRange.")
+    print("Seek: mmap the sidecar and the file, then walk at most stride-1 newlines from the nearest indexed line.")
+    print("Render: prefix and hash the window lines (pure-Python hashing; the same work on both paths).")
+    print(f"MiB columns are peak RSS growth in a fresh process; OOM means the split hit the {_mb(memory)} MiB cap.")
+    print(f"Shown 0 means the first line alone is over {MAX_BYTES // 1024} KiB and readRange returns no lines.")
+    print(f"Wide lines are {WIDE_MIN // 1024}-{WIDE_MAX // 1024} KiB, log-uniform, on both sides of that cap.")
+    print("A file with fewer lines than a window's limit starts that window at its middle or last line, not line 1.")
+    print("A window that would start on the same line as an earlier one is skipped.")
+    if over:
+        print(f"Over V8's {V8_MAX_STRING:,}-unit string limit, where buffer.toString() throws: {', '.join(over)}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Large-file scaling benchmark for executeReadHash. Generates tall, wide, CRLF, mixed-Unicode and "
+        "binary-looking fixtures from 1 MiB to 1 GiB, builds a line-offset sidecar index through mmap, and compares "
+        "the time and peak memory of a windowed read with the whole-file split readRange uses today.",
+    )
+    parser.add_argument("paths", nargs="*", help="Files to benchmark. Omit to generate fixtures.")
+    parser.add_argument("--root", help="Keep generated fixtures here and reuse them. Default: a removed temp dir.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated fixture sizes in MiB.")
+    parser.add_argument("--kind", action="append", choices=KINDS, help="Fixture kind. MAY be repeated. Default: all.")
+    parser.add_argument("--stride", type=int, default=STRIDE, help="Lines between indexed offsets.")
+    parser.add_argument("--memory", type=int, help="Address space cap in MiB per process. Default: 80%% of RAM.")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed.")
+    args = parser.parse_args(argv)
+    if args.stride < 1:
+        parser.error("stride MUST be >= 1")
+    memory = args.memory * MIB if args.memory else int(physical_memory() * 0.8)
+    root = args.root or tempfile.mkdtemp(prefix="pi-hash-large-")
+    os.makedirs(root, exist_ok=True)
+    rows = []
+    try:
+        targets = [(os.path.basename(path), path) for path in args.paths]
+        if not targets:
+            for size in (int(size) for size in args.sizes.split(",")):
+                for kind in args.kind or KINDS:
+                    name = f"{kind}-{size}mib-v{FIXTURES}.txt"
+                    targets.append((name, generate(os.path.join(root, name), kind, size * MIB, args.seed)))
+        for name, path in targets:
+            index_path = os.path.join(root, name + SUFFIX) if args.paths else sidecar(path)
+            rows.append((name, measure(path, index_path, args.stride, memory)))
+    finally:
+        if not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+    report(rows, memory, args.stride)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
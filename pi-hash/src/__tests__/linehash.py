@@ -0,0 +1,274 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from normalize import normalize_for_hash
+
+HASH_LEN = 2
+RADIX = 16
+HASH_MOD = RADIX**HASH_LEN
+
+ALPHABETS = {
+    "hex": "0123456789abcdef",
+    "dec": "0123456789",
+    "b26": "abcdefghijklmnopqrstuvwxyz",
+    "b36": "0123456789abcdefghijklmnopqrstuvwxyz",
+}
+
+FNV_OFFSET = 0x811C9DC5
+FNV_PRIME = 0x01000193
+
+PRIME1 = 0x9E3779B1
+PRIME2 = 0x85EBCA77
+PRIME3 = 0xC2B2AE3D
+PRIME4 = 0x27D4EB2F
+PRIME5 = 0x165667B1
+
+MASK = 0xFFFFFFFF
+SCALAR = 8
+
+
+def _int32(value):
+    return ((value + 0x80000000) & MASK) - 0x80000000
+
+
+def _rotl(value, bits):
+    return ((value << bits) | (value >> (32 - bits))) & MASK
+
+
+def fnv1a(text):
+    units = np.frombuffer(text.encode("utf-16-le"), "<u2").tolist()
+    value = FNV_OFFSET
+    for unit in units:
+        value = _int32(value) ^ unit
+        value = _int32(int(float(value) * FNV_PRIME))
+    return value & MASK
+
+
+def xxhash32(data, seed=0):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    size = len(data)
+    index = 0
+    if size >= 16:
+        lanes = [
+            (seed + PRIME1 + PRIME2) & MASK,
+            (seed + PRIME2) & MASK,
+            seed & MASK,
+            (seed - PRIME1) & MASK,
+        ]
+        while index + 16 <= size:
+            for lane in range(4):
+                word = int.from_bytes(data[index : index + 4], "little")
+                lanes[lane] = (_rotl((lanes[lane] + word * PRIME2) & MASK, 13) * PRIME1) & MASK
+                index += 4
+        value = (_rotl(lanes[0], 1) + _rotl(lanes[1], 7) + _rotl(lanes[2], 12) + _rotl(lanes[3], 18)) & MASK
+    else:
+        value = (seed + PRIME5) & MASK
+    value = (value + size) & MASK
+    while index + 4 <= size:
+        word = int.from_bytes(data[index : index + 4], "little")
+        value = (_rotl((value + word * PRIME3) & MASK, 17) * PRIME4) & MASK
+        index += 4
+    while index < size:
+        value = (_rotl((value + data[index] * PRIME5) & MASK, 11) * PRIME1) & MASK
+        index += 1
+    value ^= value >> 15
+    value = (value * PRIME2) & MASK
+    value ^= value >> 13
+    value = (value * PRIME3) & MASK
+    value ^= value >> 16
+    return value
+
+
+HASHES = {"fnv1a": fnv1a, "xxhash32": xxhash32}
+
+
+def string_hash(text, algorithm="fnv1a"):
+    return HASHES[algorithm](text)
+
+
+def encode(value, alphabet="hex", length=HASH_LEN):
+    chars = ALPHABETS[alphabet]
+    radix = len(chars)
+    value %= radix**length
+    out = []
+    for _ in range(length):
+        out.append(chars[value % radix])
+        value //= radix
+    return "".join(reversed(out))
+
+
+DICT = [encode(i) for i in range(HASH_MOD)]
+
+
+def compute_line_hash(content, algorithm="fnv1a", alphabet="hex", length=HASH_LEN):
+    normalized = normalize_for_hash(content, False)
+    if normalized == "":
+        return ALPHABETS[alphabet][0] * length
+    return encode(string_hash(normalized, algorithm), alphabet, length)
+
+
+def _groups(lengths):
+    order = np.argsort(lengths, kind="stable")
+    sizes, first, counts = np.unique(lengths[order], return_index=True, return_counts=True)
+    for size, start, count in zip(sizes.tolist(), first.tolist(), counts.tolist()):
+        yield size, order[start : start + count]
+
+
+def _rotl_np(values, bits):
+    return (values << np.uint32(bits)) | (values >> np.uint32(32 - bits))
+
+
+def fnv1a_batch(texts):
+    encoded = [text.encode("utf-16-le") for text in texts]
+    units = np.frombuffer(b"".join(encoded), "<u2").astype(np.int64)
+    lengths = np.fromiter((len(e) // 2 for e in encoded), np.int64, len(encoded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    out = np.empty(len(texts), np.uint32)
+    for size, idx in _groups(lengths):
+        if len(idx) < SCALAR:
+            out[idx] = [fnv1a(texts[i]) for i in idx.tolist()]
+            continue
+        block = units[starts[idx][:, None] + np.arange(size)]
+        value = np.full(len(idx), _int32(FNV_OFFSET), np.int64)
+        for column in block.T:
+            value ^= column
+            value = (value.astype(np.float64) * FNV_PRIME).astype(np.int64)
+            value = ((value + 0x80000000) & MASK) - 0x80000000
+        out[idx] = (value & MASK).astype(np.uint32)
+    return out
+
+
+def xxhash32_batch(texts, seed=0):
+    encoded = [text.encode("utf-8") for text in texts]
+    data = np.frombuffer(b"".join(encoded), np.uint8)
+    lengths = np.fromiter((len(e) for e in encoded), np.int64, len(encoded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    out = np.empty(len(texts), np.uint32)
+    with np.errstate(over="ignore"):
+        for size, idx in _groups(lengths):
+            if len(idx) < SCALAR:
+                out[idx] = [xxhash32(encoded[i], seed) for i in idx.tolist()]
+                continue
+            block = np.ascontiguousarray(data[starts[idx][:, None] + np.arange(size)])
+            stripes = size // 16
+            if stripes:
+                words = block[:, : stripes * 16].copy().view("<u4").reshape(len(idx), stripes, 4)
+                lanes = [
+                    np.full(len(idx), (seed + PRIME1 + PRIME2) & MASK, np.uint32),
+                    np.full(len(idx), (seed + PRIME2) & MASK, np.uint32),
+                    np.full(len(idx), seed & MASK, np.uint32),
+                    np.full(len(idx), (seed - PRIME1) & MASK, np.uint32),
+                ]
+                for stripe in range(stripes):
+                    for lane in range(4):
+                        mixed = lanes[lane] + words[:, stripe, lane] * np.uint32(PRIME2)
+                        lanes[lane] = _rotl_np(mixed, 13) * np.uint32(PRIME1)
+                value = _rotl_np(lanes[0], 1) + _rotl_np(lanes[1], 7) + _rotl_np(lanes[2], 12) + _rotl_np(lanes[3], 18)
+            else:
+                value = np.full(len(idx), (seed + PRIME5) & MASK, np.uint32)
+            value = value + np.uint32(size & MASK)
+            index = stripes * 16
+            while index + 4 <= size:
+                word = block[:, index : index + 4].copy().view("<u4")[:, 0]
+                value = _rotl_np(value + word * np.uint32(PRIME3), 17) * np.uint32(PRIME4)
+                index += 4
+            while index < size:
+                value = _rotl_np(value + block[:, index].astype(np.uint32) * np.uint32(PRIME5), 11) * np.uint32(PRIME1)
+                index += 1
+            value ^= value >> np.uint32(15)
+            value *= np.uint32(PRIME2)
+            value ^= value >> np.uint32(13)
+            value *= np.uint32(PRIME3)
+            value ^= value >> np.uint32(16)
+            out[idx] = value
+    return out
+
+
+BATCHES = {"fnv1a": fnv1a_batch, "xxhash32": xxhash32_batch}
+
+
+def hash_table(lines, algorithm="fnv1a"):
+    unique = {}
+    keys = np.fromiter((unique.setdefault(line, len(unique)) for line in lines), np.int64, len(lines))
+    normalized = [normalize_for_hash(line, False) for line in unique]
+    canon = {}
+    ids = np.fromiter((canon.setdefault(text, len(canon)) for text in normalized), np.int64, len(normalized))
+    values = BATCHES[algorithm](normalized)
+    empty = np.fromiter((text == "" for text in normalized), bool, len(normalized))
+    return values[keys], empty[keys], ids[keys]
+
+
+def hash_batch(lines, algorithm="fnv1a"):
+    values, empty, _ = hash_table(lines, algorithm)
+    return values, empty
+
+
+def residues(values, empty, radix=RADIX, length=HASH_LEN):
+    out = (values % np.uint64(radix**length)).astype(np.int64)
+    out[empty] = 0
+    return out
+
+
+def encode_batch(values, alphabet="hex", length=HASH_LEN):
+    chars = np.frombuffer(ALPHABETS[alphabet].encode("ascii"), np.uint8)
+    radix = len(chars)
+    values = np.asarray(values, np.int64) % (radix**length)
+    digits = np.empty((len(values), length), np.uint8)
+    for column in range(length - 1, -1, -1):
+        digits[:, column] = chars[values % radix]
+        values = values // radix
+    text = digits.tobytes().decode("ascii")
+    return [text[i : i + length] for i in range(0, len(text), length)]
+
+
+def line_hashes(lines, algorithm="fnv1a", alphabet="hex", length=HASH_LEN):
+    values, empty = hash_batch(lines, algorithm)
+    return encode_batch(residues(values, empty, len(ALPHABETS[alphabet]), length), alphabet, length)
+
+
+def main(argv=None):
+    from corpus import read_lines, synthetic, walk
+
+    parser = argparse.ArgumentParser(
+        description="Reference computeLineHash. Prints LINE:HASH|content for files, or benchmarks the batch path.",
+    )
+    parser.add_argument("paths", nargs="*", help="Files or directories to anchor. Omit to run the benchmark.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="fnv1a is the Node path, xxhash32 the Bun path.")
+    parser.add_argument("--alphabet", choices=sorted(ALPHABETS), default="hex", help="Anchor alphabet. Default hex.")
+    parser.add_argument("--length", type=int, default=HASH_LEN, help="Anchor length. Default 2.")
+    parser.add_argument("--lines", type=int, default=1_000_000, help="Benchmark corpus size in lines.")
+    args = parser.parse_args(argv)
+    if args.paths:
+        for root in args.paths:
+            for path in walk(root):
+                lines = read_lines(path)
+                if lines is None:
+                    continue
+                anchors = line_hashes(lines, args.hash, args.alphabet, args.length)
+                sys.stdout.write(f"--- {path} ---\n")
+                sys.stdout.writelines(f"{i + 1}:{h}|{line}\n" for i, (h, line) in enumerate(zip(anchors, lines)))
+        return 0
+    lines = synthetic(args.lines)
+    sample = lines[: min(len(lines), 20_000)]
+    print(f"\n--- Line Hash Throughput ({len(lines)} Lines) ---")
+    print(f"{'Hash':<10} | {'Scalar lines/sec':<17} | {'Batch lines/sec':<16} | {'Match'}")
+    print("-" * 62)
+    for name in sorted(HASHES):
+        start = time.perf_counter()
+        scalar = [compute_line_hash(line, name, args.alphabet, args.length) for line in sample]
+        slow = len(sample) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        batch = line_hashes(lines, name, args.alphabet, args.length)
+        fast = len(lines) / (time.perf_counter() - start)
+        match = "yes" if batch[: len(sample)] == scalar else "NO"
+        print(f"{name:<10} | {slow:<17,.0f} | {fast:<16,.0f} | {match}")
+    print("-" * 62)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+
+from results import record
+
+SINGLE_QUOTES = re.compile(r"[\u2018\u2019\u201A\u201B]")
+DOUBLE_QUOTES = re.compile(r"[\u201C\u201D\u201E\u201F]")
+DASHES = re.compile(r"[\u2010\u2011\u2012\u2013\u2014\u2015\u2212]")
+ELLIPSIS = re.compile(r"\u2026")
+INVISIBLE = re.compile(r"[\u200B-\u200F\u202A-\u202E\u2060-\u206F\uFEFF]")
+SPACES = re.compile(r"[\u00A0\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200A\u202F\u205F\u3000]")
+CONTROLS = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]")
+WHITESPACE = re.compile(r"[\t\n\x0B\x0C\r \u00A0\u1680\u2000-\u200A\u2028\u2029\u202F\u205F\u3000\uFEFF]+")
+
+EDGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__edge__")
+SEEDS = ("unicode-heavy.txt", "whitespace-variants.txt", "special-chars.txt")
+CODEPOINTS = [*range(0x3001), 0xFEFF]
+
+
+def _chars(pattern):
+    return [chr(c) for c in CODEPOINTS if pattern.fullmatch(chr(c))]
+
+
+def _table():
+    table = {}
+    for pattern, replacement in [
+        (SINGLE_QUOTES, "'"),
+        (DOUBLE_QUOTES, '"'),
+        (DASHES, "-"),
+        (ELLIPSIS, "..."),
+        (INVISIBLE, None),
+        (SPACES, " "),
+        (CONTROLS, None),
+    ]:
+        for char in _chars(pattern):
+            table.setdefault(ord(char), replacement)
+    return table
+
+
+UNICODE_TABLE = _table()
+STRIP_TABLE = {ord(char): None for char in _chars(WHITESPACE)}
+HASH_TABLE = {**UNICODE_TABLE, **STRIP_TABLE}
+UNICODE_DROP = bytes(c for c in range(0x80) if c in UNICODE_TABLE and UNICODE_TABLE[c] is None)
+HASH_DROP = bytes(c for c in range(0x80) if c in HASH_TABLE and HASH_TABLE[c] is None)
+
+
+def naive_normalize_unicode(text):
+    text = unicodedata.normalize("NFC", text)
+    text = SINGLE_QUOTES.sub("'", text)
+    text = DOUBLE_QUOTES.sub('"', text)
+    text = DASHES.sub("-", text)
+    text = ELLIPSIS.sub("...", text)
+    text = INVISIBLE.sub("", text)
+    text = SPACES.sub(" ", text)
+    return CONTROLS.sub("", text)
+
+
+def naive_strip_whitespace(text):
+    return WHITESPACE.sub("", text).replace("\r", "")
+
+
+def naive_normalize_for_hash(text, lower=False):
+    canon = naive_normalize_unicode(text)
+    return naive_strip_whitespace(canon.lower() if lower else canon)
+
+
+def normalize_unicode(text):
+    if text.isascii():
+        return text.encode("ascii").translate(None, UNICODE_DROP).decode("ascii")
+    return unicodedata.normalize("NFC", text).translate(UNICODE_TABLE)
+
+
+def strip_whitespace(text):
+    return text.translate(STRIP_TABLE)
+
+
+def normalize_for_hash(text, lower=False):
+    if text.isascii():
+        data = text.encode("ascii").translate(None, HASH_DROP)
+        return (data.lower() if lower else data).decode("ascii")
+    canon = unicodedata.normalize("NFC", text).translate(HASH_TABLE)
+    return canon.lower() if lower else canon
+
+
+POOL = (
+    [chr(c) for c in sorted(HASH_TABLE)]
+    + ["\u0301", "\u0308", "\u0327", "e\u0301", "\u00E9", "\u1100", "\u1161", "\u11A8", "\u212A", "\u0130", "\u00DF"]
+    + ["\U0001f389", "\u200D", "|", ":", "a", "Z", "0", " "]
+)
+
+
+def seeds(names=SEEDS):
+    lines = []
+    for name in names:
+        with open(os.path.join(EDGE, name), encoding="utf-8") as handle:
+            lines.extend(handle.read().split("\n"))
+    return lines
+
+
+def mutate(rng, line, corpus):
+    chars = list(line)
+    for _ in range(rng.randint(1, 6)):
+        op = rng.random()
+        at = rng.randint(0, len(chars))
+        if op < 0.5:
+            chars[at:at] = rng.choice(POOL)
+        elif op < 0.7 and chars:
+            del chars[min(at, len(chars) - 1)]
+        elif op < 0.85:
+            chars[at:at] = rng.choice(corpus)
+        else:
+            chars[at:at] = [rng.choice(POOL)] * rng.randint(2, 8)
+    return "".join(chars)
+
+
+def fuzz(rounds=100_000, seed=0, names=SEEDS):
+    rng = random.Random(seed)
+    corpus = seeds(names)
+    failures = []
+    for line in corpus + [mutate(rng, rng.choice(corpus), corpus) for _ in range(rounds)]:
+        for name, naive, fast in [
+            ("normalize_unicode", naive_normalize_unicode, normalize_unicode),
+            ("strip_whitespace", naive_strip_whitespace, strip_whitespace),
+            ("normalize_for_hash", naive_normalize_for_hash, normalize_for_hash),
+            ("normalize_for_hash(lower)", lambda t: naive_normalize_for_hash(t, True), lambda t: normalize_for_hash(t, True)),
+        ]:
+            if naive(line) != fast(line):
+                failures.append((name, line))
+    return len(corpus) + rounds, failures
+
+
+def benchmark(lines, repeat=3):
+    results = []
+    for name, run in [
+        ("normalize_unicode", lambda: [naive_normalize_unicode(line) for line in lines]),
+        ("normalize_unicode", lambda: [normalize_unicode(line) for line in lines]),
+        ("normalize_for_hash", lambda: [naive_normalize_for_hash(line) for line in lines]),
+        ("normalize_for_hash", lambda: [normalize_for_hash(line) for line in lines]),
+    ]:
+        best = min(_timed(run) for _ in range(repeat))
+        results.append((name, len(lines) / best))
+    return results
+
+
+def _timed(run):
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    from corpus import synthetic
+
+    parser = argparse.ArgumentParser(
+        description="Single-pass normalize.ts port. Fuzzes it against the chained-replace port and benchmarks both.",
+    )
+    parser.add_argument("--rounds", type=int, default=100_000, help="Mutated lines to fuzz.")
+    parser.add_argument("--seed", type=int, default=0, help="Fuzzer seed.")
+    parser.add_argument("--lines", type=int, default=200_000, help="Benchmark corpus size in lines.")
+    parser.add_argument("--show", type=int, default=10, help="Mismatches to print.")
+    args = parser.parse_args(argv)
+    checked, failures = fuzz(args.rounds, args.seed)
+    print(f"\n--- Normalization Equivalence ({checked} Lines Seeded From {', '.join(SEEDS)}) ---")
+    print(f"Mismatches: {len(failures)}")
+    record("mismatches", len(failures), "errors", "lines")
+    for name, line in failures[: args.show]:
+        print(f"  {name}: {line!r}")
+    rng = random.Random(args.seed)
+    corpus = seeds()
+    mixes = [
+        ("ASCII code", synthetic(args.lines, args.seed)),
+        ("Unicode-heavy", [mutate(rng, rng.choice(corpus), corpus) for _ in range(args.lines)]),
+    ]
+    print(f"\n--- Normalization Throughput ({args.lines} Lines) ---")
+    print(f"{'Corpus':<14} | {'Function':<18} | {'Chained lines/sec':<17} | {'Single-pass lines/sec':<21} | {'Speedup'}")
+    print("-" * 92)
+    for label, lines in mixes:
+        results = benchmark(lines)
+        for (name, slow), (_, fast) in zip(results[::2], results[1::2]):
+            print(f"{label:<14} | {name:<18} | {slow:<17,.0f} | {fast:<21,.0f} | {fast / slow:.1f}x")
+            record("throughput", slow, "throughput", "lines/s", corpus=label, function=name, port="chained")
+            record("throughput", fast, "throughput", "lines/s", corpus=label, function=name, port="single-pass")
+    print("-" * 92)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import math
+import os
+import random
+import sys
+from itertools import product
+
+import numpy as np
+
+from corpus import read_lines, walk
+from linehash import ALPHABETS, HASHES, encode_batch, hash_batch, residues
+from results import record
+from tokens import DEFAULT_MODEL, count_batch
+
+SEPARATORS = (":", ".", "@", "#", "$", " ", "")
+TERMINATORS = ("|", " ", ":")
+LENGTHS = (1, 2, 3, 4, 5)
+WIDTHS = (0, 4, 6)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def sample(roots, size, block=50, seed=0, algorithm="fnv1a"):
+    rng = random.Random(seed)
+    windows = []
+    for root in roots:
+        for path in walk(root):
+            lines = read_lines(path)
+            if not lines:
+                continue
+            values, empty = hash_batch(lines, algorithm)
+            for start in range(0, len(lines), block):
+                windows.append((lines[start : start + block], values[start : start + block], empty[start : start + block], start))
+    rng.shuffle(windows)
+    picked = []
+    for window in windows:
+        if len(picked) >= size:
+            break
+        lines, values, empty, start = window
+        picked.extend((start + i + 1, line, values[i], empty[i]) for i, line in enumerate(lines))
+    return picked[:size]
+
+
+def candidates(alphabets, lengths, separators, terminators, widths):
+    for end, width in product(terminators, widths):
+        yield {"alphabet": None, "length": 0, "sep": "", "end": end, "width": width}
+    for alphabet, length, sep, end, width in product(alphabets, lengths, separators, terminators, widths):
+        if sep == "" and any(char.isdigit() for char in ALPHABETS[alphabet]):
+            continue
+        yield {"alphabet": alphabet, "length": length, "sep": sep, "end": end, "width": width}
+
+
+def bits(candidate):
+    if not candidate["length"]:
+        return 0.0
+    return candidate["length"] * math.log2(len(ALPHABETS[candidate["alphabet"]]))
+
+
+def prefixes(candidate, lines, space):
+    if candidate["length"]:
+        values = np.array([line[2] for line in lines], np.uint32)
+        empty = np.array([line[3] for line in lines], bool)
+        radix = len(ALPHABETS[candidate["alphabet"]])
+        anchors = encode_batch(residues(values, empty, radix, candidate["length"]), candidate["alphabet"], candidate["length"])
+    else:
+        anchors = [""] * len(lines)
+    width = candidate["width"]
+    return [
+        f"{str(line[0]).rjust(width)}{candidate['sep']}{anchor}{candidate['end']}{space}"
+        for line, anchor in zip(lines, anchors)
+    ]
+
+
+def marginals(model, candidate, lines, space, bare):
+    texts = [prefix + line[1] + "\n" for prefix, line in zip(prefixes(candidate, lines, space), lines)]
+    return [anchored - alone for anchored, alone in zip(count_batch(texts, model, fmt="candidate"), bare)]
+
+
+def example(candidate, space):
+    anchor = encode_batch([0x7A3F21], candidate["alphabet"], candidate["length"])[0] if candidate["length"] else ""
+    return f"{'42'.rjust(candidate['width'])}{candidate['sep']}{anchor}{candidate['end']}{space}"
+
+
+def search(model, lines, space="", probe=128, z=3.0, fast=False, **space_args):
+    bare = count_batch([line[1] + "\n" for line in lines], model, fmt="candidate")
+    base = sum(bare) / len(lines)
+    scored = []
+    for candidate in candidates(**space_args):
+        if not fast:
+            scored.append((0.0, 0.0, bits(candidate), candidate))
+            continue
+        costs = marginals(model, candidate, lines[:probe], space, bare)
+        mean = sum(costs) / len(costs)
+        spread = math.sqrt(sum((c - mean) ** 2 for c in costs) / max(1, len(costs) - 1))
+        scored.append((mean, mean - z * spread / math.sqrt(len(costs)), bits(candidate), candidate))
+    scored.sort(key=lambda s: (s[0], -s[2]))
+    evaluated = []
+    pruned = 0
+    for _, bound, entropy, candidate in scored:
+        if fast and any(e["bits"] >= entropy and e["cost"] <= bound for e in evaluated):
+            pruned += 1
+            continue
+        cost = sum(marginals(model, candidate, lines, space, bare)) / len(lines)
+        evaluated.append({"candidate": candidate, "bits": entropy, "cost": cost})
+    front = [
+        e
+        for e in evaluated
+        if not any(
+            o is not e and o["bits"] >= e["bits"] and o["cost"] <= e["cost"] and (o["bits"] > e["bits"] or o["cost"] < e["cost"])
+            for o in evaluated
+        )
+    ]
+    front.sort(key=lambda e: (e["bits"], e["cost"]))
+    return {"model": model, "base": base, "front": front, "evaluated": len(evaluated), "pruned": pruned, "fast": fast}
+
+
+def report(result, lines, space):
+    scope = f"{result['pruned']} Pruned, Approximate" if result["fast"] else "Exhaustive"
+    print(
+        f"\n--- Anchor Format Pareto Front for {result['model']} ({lines} Lines, "
+        f"{result['evaluated']} Evaluated, {scope}) ---"
+    )
+    print(f"{'Format':<14} | {'Alphabet':<8} | {'Bits':<5} | {'Tokens/line':<11} | {'Overhead'}")
+    print("-" * 60)
+    for entry in result["front"]:
+        candidate = entry["candidate"]
+        overhead = entry["cost"] / result["base"] * 100
+        shown = "'" + example(candidate, space) + "'"
+        record("tokens/line", entry["cost"], "overhead", "tokens", format=shown, tokenizer=result["model"])
+        print(
+            f"{shown:<14} | {candidate['alphabet'] or '-':<8} | {entry['bits']:<5.1f} | "
+            f"{entry['cost']:<11.3f} | {overhead:.1f}%"
+        )
+    print("-" * 60)
+    print("Tokens/line is the marginal anchor cost per line; Overhead is relative to bare content tokens.")
+    if result["fast"]:
+        print("--fast prunes on an estimated lower bound from the probe lines, so front members can be missing.")
+
+
+def _split(value, cast=str):
+    return tuple(cast(item) for item in value.split(",")) if value else ()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Search alphabet x length x separator x terminator x line-number width for the Pareto front "
+        "of (tokens per line, anchor entropy bits).",
+    )
+    parser.add_argument("roots", nargs="*", default=[ROOT], help="Corpus roots. Default: pi-hash/src.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--lines", type=int, default=2000, help="Sample size in lines.")
+    parser.add_argument("--fast", action="store_true", help="Heuristic: prune candidates whose probe estimate "
+                        "(mean - z standard errors, not a bound) is dominated. Faster, but the front is approximate.")
+    parser.add_argument("--probe", type=int, default=128, help="Lines scored per candidate before pruning with --fast.")
+    parser.add_argument("--z", type=float, default=3.0, help="Lower-bound width in standard errors for --fast.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="Anchor hash. Default fnv1a.")
+    parser.add_argument("--alphabets", default=",".join(ALPHABETS), help="Comma-separated alphabets.")
+    parser.add_argument("--lengths", default=",".join(map(str, LENGTHS)), help="Comma-separated anchor lengths.")
+    parser.add_argument("--separators", default=None, help="Separator characters as one string. Default ':.@#$ ' plus none.")
+    parser.add_argument("--terminators", default="| :", help="Terminator characters as one string. Default '| :'.")
+    parser.add_argument("--widths", default=",".join(map(str, WIDTHS)), help="Comma-separated line-number pad widths.")
+    parser.add_argument("--space", default="", help="Text between terminator and content. Default none, as prefixLine.")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed.")
+    args = parser.parse_args(argv)
+    alphabets = _split(args.alphabets)
+    for alphabet in alphabets:
+        if alphabet not in ALPHABETS:
+            parser.error(f"unknown alphabet '{alphabet}'. Expected one of: {', '.join(ALPHABETS)}")
+    separators = tuple(args.separators) + ("",) if args.separators is not None else SEPARATORS
+    lines = sample(args.roots, args.lines, seed=args.seed, algorithm=args.hash)
+    if not lines:
+        parser.error("corpus roots contain no readable text lines")
+    for model in args.model or [DEFAULT_MODEL]:
+        result = search(
+            model,
+            lines,
+            args.space,
+            args.probe,
+            args.z,
+            args.fast,
+            alphabets=alphabets,
+            lengths=_split(args.lengths, int),
+            separators=separators,
+            terminators=tuple(args.terminators),
+            widths=_split(args.widths, int),
+        )
+        report(result, len(lines), args.space)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
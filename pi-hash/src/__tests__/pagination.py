@@ -0,0 +1,252 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from functools import partial
+from multiprocessing import Pool
+
+from corpus import percentile, read_lines, walk
+from linehash import HASHES, line_hashes
+from results import record
+from tokens import DEFAULT_MODEL, count_batch, count_tokens
+
+MAX_LINES = 2000
+MAX_BYTES = 50 * 1024
+BYTES = "bytes"
+QUANTILES = (0.5, 0.9)
+ROUND = 100
+
+
+def units(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def prefix_lines(lines, algorithm="fnv1a"):
+    return [f"{i + 1}:{h}|{line}" for i, (h, line) in enumerate(zip(line_hashes(lines, algorithm), lines))]
+
+
+def policy(name, max_lines=MAX_LINES, max_bytes=None, max_tokens=None):
+    return {"name": name, "max_lines": max_lines, "max_bytes": max_bytes, "max_tokens": max_tokens}
+
+
+def byte_policy():
+    return policy(BYTES, max_bytes=MAX_BYTES)
+
+
+def token_policy(budget):
+    return policy(f"tokens<={budget}", max_tokens=budget)
+
+
+def read_range(prefixed, sizes, offset=1, limit=None, rules=None, costs=None):
+    rules = rules or byte_policy()
+    total = len(prefixed)
+    start = max(0, offset - 1)
+    if start >= total:
+        raise ValueError(f"Offset {offset} is beyond end of file ({total} lines)")
+    end = min(total, start + limit) if limit else total
+    output = []
+    used = 0
+    spent = 0
+    truncated = False
+    following = None
+    for i in range(start, end):
+        if (
+            len(output) >= rules["max_lines"]
+            or (rules["max_bytes"] is not None and used + sizes[i] > rules["max_bytes"])
+            or (rules["max_tokens"] is not None and spent + costs[i] > rules["max_tokens"])
+        ):
+            truncated = True
+            following = i + 1
+            output.append(f"\n[Showing lines {start + 1}-{i} of {total}. Use offset={following} to continue.]")
+            break
+        output.append(prefixed[i])
+        used += sizes[i] + 1
+        if costs is not None:
+            spent += costs[i]
+    if not truncated and limit and start + limit < total:
+        following = end + 1
+        output.append(f"\n[{total - (start + limit)} more lines. Use offset={following} to continue.]")
+    return output, truncated, following
+
+
+def paginate(prefixed, sizes, rules, model=DEFAULT_MODEL, limit=None, costs=None):
+    offset = 1
+    while True:
+        output, truncated, following = read_range(prefixed, sizes, offset, limit, rules, costs)
+        shown = (following or len(prefixed) + 1) - offset
+        yield {
+            "offset": offset,
+            "lines": shown,
+            "tokens": count_tokens("\n".join(output), model, "page"),
+            "truncated": truncated,
+            "stalled": following == offset,
+        }
+        if following is None or following == offset:
+            return
+        offset = following
+
+
+def simulate(path, policies, model=DEFAULT_MODEL, algorithm="fnv1a", limit=None):
+    try:
+        lines = read_lines(path)
+    except OSError:
+        return None
+    if not lines:
+        return None
+    prefixed = prefix_lines(lines, algorithm)
+    sizes = [units(line) for line in prefixed]
+    costs = None
+    if any(rules["max_tokens"] is not None for rules in policies):
+        costs = count_batch([line + "\n" for line in prefixed], model, threads=1, fmt="anchored line")
+    result = {"path": path, "lines": len(lines), "units": sum(sizes) + len(sizes), "policies": {}}
+    for rules in policies:
+        pages = list(paginate(prefixed, sizes, rules, model, limit, costs))
+        result["policies"][rules["name"]] = {
+            "pages": len(pages),
+            "tokens": sum(page["tokens"] for page in pages),
+            "page_tokens": [page["tokens"] for page in pages],
+            "full": [page["tokens"] for page in pages if page["truncated"]],
+            "stalled": any(page["stalled"] for page in pages),
+        }
+    return result
+
+
+def run(roots, policies, model=DEFAULT_MODEL, algorithm="fnv1a", limit=None, workers=None, exts=None, chunk=8):
+    paths = (path for root in roots for path in walk(root, exts))
+    task = partial(simulate, policies=policies, model=model, algorithm=algorithm, limit=limit)
+    with Pool(workers) as pool:
+        files = [result for result in pool.imap_unordered(task, paths, chunksize=chunk) if result is not None]
+        pool.close()
+        pool.join()
+    files.sort(key=lambda f: f["path"])
+    return {"model": model, "limit": limit, "policies": [rules["name"] for rules in policies], "files": files}
+
+
+def suggest(result, name=BYTES):
+    full = [tokens for f in result["files"] for tokens in f["policies"][name]["full"]]
+    if not full:
+        return {}
+    return {q: max(ROUND, int(round(percentile(full, q) / ROUND)) * ROUND) for q in QUANTILES}
+
+
+def summarize(result, name):
+    entries = [f["policies"][name] for f in result["files"]]
+    paged = [e["pages"] for e in entries if e["pages"] > 1]
+    pages = [tokens for e in entries for tokens in e["page_tokens"]]
+    full = [tokens for e in entries for tokens in e["full"]]
+    mean = sum(full) / len(full) if full else 0.0
+    spread = (sum((t - mean) ** 2 for t in full) / len(full)) ** 0.5 if full else 0.0
+    return {
+        "policy": name,
+        "pages": len(pages),
+        "paged": len(paged),
+        "pages_p50": percentile(paged, 0.5),
+        "pages_max": max(paged, default=0),
+        "full_p50": percentile(full, 0.5),
+        "full_p90": percentile(full, 0.9),
+        "full_max": max(full, default=0),
+        "full_cv": spread / mean if mean else 0.0,
+        "tokens": sum(e["tokens"] for e in entries),
+        "stalled": sum(e["stalled"] for e in entries),
+    }
+
+
+def report(result, suggestions):
+    files = len(result["files"])
+    lines = sum(f["lines"] for f in result["files"])
+    limit = f", limit={result['limit']}" if result["limit"] else ""
+    print(f"\n--- readRange Pagination for {result['model']} ({files} Files, {lines} Lines{limit}) ---")
+    print(
+        f"{'Policy':<14} | {'Pages':<7} | {'Paged':<6} | {'Pages/file':<10} | {'Full p50':<8} | "
+        f"{'Full p90':<8} | {'Full max':<8} | {'CV':<5} | {'Total tokens':<12} | {'Stalled'}"
+    )
+    print("-" * 110)
+    for name in result["policies"]:
+        s = summarize(result, name)
+        record("total tokens", s["tokens"], "tokens", "tokens", policy=name, tokenizer=result["model"])
+        record("pages", s["pages"], "tokens", "pages", policy=name, tokenizer=result["model"])
+        pages = f"{s['pages_p50']:.0f}/{s['pages_max']}"
+        print(
+            f"{name:<14} | {s['pages']:<7} | {s['paged']:<6} | {pages:<10} | {s['full_p50']:<8.0f} | "
+            f"{s['full_p90']:<8.0f} | {s['full_max']:<8} | {s['full_cv']:<5.2f} | {s['tokens']:<12,} | {s['stalled']}"
+        )
+    print("-" * 110)
+    print("Paged: files needing more than one page. Pages/file: p50/max over paged files.")
+    print("Full: tokens of pages cut by a cap, the per-call cost the cap actually bounds. CV: their spread.")
+    print("Stalled: files where a single line exceeds the cap, so the continuation offset never advances.")
+    if suggestions:
+        shown = ", ".join(f"p{q * 100:.0f} {budget}" for q, budget in suggestions.items())
+        print(f"\nSuggested token budgets from full {BYTES} pages: {shown}.")
+    else:
+        print(f"\nNo page hit the {BYTES} cap; scan larger files to derive token budgets.")
+
+
+def write_csv(result, path):
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(("path", "policy", "lines", "units", "pages", "tokens", "max_page", "stalled"))
+        for record in result["files"]:
+            for name in result["policies"]:
+                entry = record["policies"][name]
+                writer.writerow(
+                    (record["path"], name, record["lines"], record["units"], entry["pages"], entry["tokens"],
+                     max(entry["page_tokens"]), int(entry["stalled"]))
+                )
+
+
+def write_json(result, suggestions, path):
+    payload = {
+        "model": result["model"],
+        "limit": result["limit"],
+        "suggestions": {f"p{q * 100:.0f}": budget for q, budget in suggestions.items()},
+        "summary": [summarize(result, name) for name in result["policies"]],
+        "files": result["files"],
+    }
+    with open(path, "w") as handle:
+        json.dump(payload, handle, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay readRange offset/limit paging over a corpus with real LINE:HASH| prefixes and compare "
+        "the 50 KiB byte cap against token budgets.",
+    )
+    parser.add_argument("roots", nargs="+", help="Directories or files to scan.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--budget", type=int, action="append", help="Token budget to simulate. MAY be repeated. Default: suggested budgets.")
+    parser.add_argument("--limit", type=int, help="limit passed on every call, as an agent paging in fixed steps.")
+    parser.add_argument("--hash", choices=sorted(HASHES), default="fnv1a", help="Anchor hash. Default fnv1a.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Pool size. Default: CPU count.")
+    parser.add_argument("--ext", action="append", help="Only scan files with this extension. MAY be repeated.")
+    parser.add_argument("--csv", help="Write per-file, per-policy rows to this CSV path.")
+    parser.add_argument("--json", help="Write the summary, suggestions and per-page token counts to this JSON path.")
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 1:
+        parser.error("limit MUST be >= 1")
+    for root in args.roots:
+        if not os.path.exists(root):
+            parser.error(f"path does not exist: {root}")
+    exts = set(args.ext) if args.ext else None
+    models = args.model or [DEFAULT_MODEL]
+    for model in models:
+        baseline = run(args.roots, [byte_policy()], model, args.hash, args.limit, args.workers, exts)
+        suggestions = suggest(baseline)
+        budgets = sorted(set(args.budget or suggestions.values()))
+        result = baseline
+        if budgets:
+            policies = [byte_policy()] + [token_policy(budget) for budget in budgets]
+            result = run(args.roots, policies, model, args.hash, args.limit, args.workers, exts)
+        report(result, suggestions)
+        suffix = f".{model}" if len(models) > 1 else ""
+        if args.csv:
+            root, ext = os.path.splitext(args.csv)
+            write_csv(result, f"{root}{suffix}{ext}")
+        if args.json:
+            root, ext = os.path.splitext(args.json)
+            write_json(result, suggestions, f"{root}{suffix}{ext}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import argparse
+import difflib
+import os
+import random
+import subprocess
+import sys
+
+from corpus import VARIANTS, read_lines, synthetic, walk
+from linehash import ALPHABETS, encode_batch, hash_batch, residues
+from relocation import mutate
+from results import record
+from tokens import DEFAULT_MODEL, count_batch, count_tokens
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+FORMATS = {
+    "plain context": {"anchored": False, "trim": False, "header": False},
+    "@@ header": {"anchored": False, "trim": True, "header": True},
+    "anchored": {"anchored": True, "trim": False, "header": False},
+    "anchored, minimal": {"anchored": True, "trim": True, "header": False},
+}
+BUCKETS = ((1, 1), (2, 3), (4, 7), (8, 15), (16, 31), (32, None))
+PRODUCTION = VARIANTS[0]
+
+
+class Blobs:
+    def __init__(self, repo):
+        self.process = subprocess.Popen(
+            ["git", "-C", repo, "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def read(self, rev, path):
+        self.process.stdin.write(f"{rev}:{path}\n".encode("utf-8"))
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3 or header[1] != b"blob":
+            return None
+        data = self.process.stdout.read(int(header[2]) + 1)[:-1]
+        if b"\0" in data[:8192]:
+            return None
+        return data.decode("utf-8", errors="replace").split("\n")
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def git_diffs(repo, commits, exts=None):
+    log = subprocess.run(
+        ["git", "-C", repo, "log", f"-{commits}", "--no-merges", "--format=%H"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    blobs = Blobs(repo)
+    try:
+        for rev in log:
+            listing = subprocess.run(
+                ["git", "-C", repo, "diff-tree", "-r", "--root", "--no-commit-id", "--name-status", rev],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            for row in listing.splitlines():
+                status, _, path = row.partition("\t")
+                if status != "M" or exts and os.path.splitext(path)[1] not in exts:
+                    continue
+                before, after = blobs.read(f"{rev}^", path), blobs.read(rev, path)
+                if before is not None and after is not None:
+                    yield path, before, after
+    finally:
+        blobs.close()
+
+
+def synthetic_diffs(rng, roots, count, ops, block, exts=None):
+    sources = [(path, read_lines(path)) for root in roots for path in walk(root, exts)]
+    sources = [(path, lines) for path, lines in sources if lines and len(lines) > 20]
+    sources = sources or [("synthetic.ts", synthetic(2000, rng.randrange(1 << 30)))]
+    for index in range(count):
+        path, before = rng.choice(sources)
+        yield f"{path}#{index}", before, mutate(rng, before, ops, block)[0]
+
+
+def anchors(lines, variant, cache):
+    _, alphabet, length, _, _ = variant
+    if "values" not in cache:
+        cache["values"] = hash_batch(lines)
+    values, empty = cache["values"]
+    return encode_batch(residues(values, empty, len(ALPHABETS[alphabet]), length), alphabet, length)
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+
+def enclosing(lines, index, reach=200):
+    indent = _indent(lines[index]) if index < len(lines) else 0
+    fallback = None
+    for k in range(index - 1, max(-1, index - reach - 1), -1):
+        if not lines[k].strip():
+            continue
+        if _indent(lines[k]) < indent:
+            return lines[k].strip()
+        fallback = fallback or lines[k].strip()
+    return fallback
+
+
+def _trim(group):
+    start = next(i for i, op in enumerate(group) if op[0] != "equal")
+    end = max(i for i, op in enumerate(group) if op[0] != "equal") + 1
+    trimmed = group[start:end]
+    if any(op[1] < op[2] for op in trimmed):
+        return trimmed
+    _, i1, _, j1, _ = trimmed[0]
+    anchor = ("equal", i1 - 1, i1, j1 - 1, j1) if i1 > 0 else ("equal", i1, i1 + 1, j1, j1 + 1)
+    return [anchor] + trimmed if i1 > 0 else trimmed + [anchor]
+
+
+def render(group, before, after, fmt, hashes=None, variant=PRODUCTION):
+    _, _, _, sep, end = variant
+    shape = FORMATS[fmt]
+    ops = _trim(group) if shape["trim"] else group
+    first = next(op[1] for op in group if op[0] != "equal")
+    header = enclosing(before, first) if shape["header"] else None
+
+    def old(i):
+        return f"{i + 1}{sep}{hashes[i]}{end}{before[i]}" if shape["anchored"] else before[i]
+
+    out = ["@@ " + header if header else "@@"]
+    for tag, i1, i2, j1, j2 in ops:
+        if tag == "equal":
+            out.extend(" " + old(i) for i in range(i1, i2))
+            continue
+        out.extend("-" + old(i) for i in range(i1, i2))
+        out.extend("+" + after[j] for j in range(j1, j2))
+    return "\n".join(out) + "\n"
+
+
+def changed(group):
+    return sum(i2 - i1 + j2 - j1 for tag, i1, i2, j1, j2 in group if tag != "equal")
+
+
+def measure(diffs, model=DEFAULT_MODEL, context=3, variants=()):
+    hunks = []
+    texts = {fmt: [] for fmt in FORMATS}
+    texts.update({variant[0]: [] for variant in variants})
+    reads = {variant[0]: 0 for variant in variants}
+    files = 0
+    for path, before, after in diffs:
+        groups = list(difflib.SequenceMatcher(None, before, after, autojunk=False).get_grouped_opcodes(context))
+        if not groups:
+            continue
+        files += 1
+        cache = {}
+        hashes = anchors(before, PRODUCTION, cache)
+        for group in groups:
+            hunks.append(changed(group))
+            for fmt in FORMATS:
+                texts[fmt].append(render(group, before, after, fmt, hashes))
+        for variant in variants:
+            name, _, _, sep, end = variant
+            coded = anchors(before, variant, cache)
+            texts[name].extend(render(group, before, after, "anchored, minimal", coded, variant) for group in groups)
+            read = "".join(f"{i + 1}{sep}{h}{end}{line}\n" for i, (h, line) in enumerate(zip(coded, before)))
+            reads[name] += count_tokens(read, model, f"{name} read")
+    tokens = {name: count_batch(values, model, fmt=name) for name, values in texts.items()}
+    return {"files": files, "hunks": hunks, "tokens": tokens, "reads": reads}
+
+
+def _bucket(size):
+    return next(b for b in BUCKETS if size >= b[0] and (b[1] is None or size <= b[1]))
+
+
+def _label(bucket):
+    low, high = bucket
+    return f"{low}" if low == high else f"{low}+" if high is None else f"{low}-{high}"
+
+
+def report(result, label, model, context):
+    hunks = result["hunks"]
+    total = sum(hunks)
+    tokens = result["tokens"]
+    print(f"\n--- apply_patch Output Tokens ({label}: {result['files']:,} Files, {len(hunks):,} Hunks, ", end="")
+    print(f"{total:,} Changed Lines, {model}, Context {context}) ---")
+    base = sum(tokens["plain context"])
+    print(f"{'Format':<20} | {'Tokens':<10} | {'Tok/changed':<11} | {'vs plain'}")
+    print("-" * 58)
+    for fmt in FORMATS:
+        spent = sum(tokens[fmt])
+        print(f"{fmt:<20} | {spent:<10,} | {spent / total:<11.2f} | {(spent - base) / base * 100:+.1f}%")
+        record("tokens/changed line", spent / total, "overhead", "tokens", format=fmt, tokenizer=model)
+    print("-" * 58)
+    print(f"\n--- Tokens per Changed Line by Hunk Size ({label}) ---")
+    print(f"{'Changed':<8} | {'Hunks':<7} | " + " | ".join(f"{fmt:<17}" for fmt in FORMATS))
+    print("-" * (20 + 20 * len(FORMATS)))
+    for bucket in BUCKETS:
+        picked = [i for i, size in enumerate(hunks) if _bucket(size) == bucket]
+        if not picked:
+            continue
+        lines = sum(hunks[i] for i in picked)
+        cells = [f"{sum(tokens[fmt][i] for i in picked) / lines:<17.2f}" for fmt in FORMATS]
+        print(f"{_label(bucket):<8} | {len(picked):<7,} | " + " | ".join(cells))
+    print("-" * (20 + 20 * len(FORMATS)))
+    print("plain context and @@ header are the unanchored formats; parser.ts requires LINE:HASH| on ' ' and '-' lines.")
+    if not result["reads"]:
+        return
+    production = PRODUCTION[0]
+    e2e_base = result["reads"][production] + sum(tokens[production])
+    print(f"\n--- Anchor Variants End to End ({label}: Read Each Edited File Once + Write Minimal Anchored Patch) ---")
+    print(f"{'Variant':<22} | {'Read':<10} | {'Write':<10} | {'Tok/changed':<11} | {'Read+write':<10} | {'vs prod'}")
+    print("-" * 90)
+    for variant in sorted(result["reads"], key=lambda name: result["reads"][name] + sum(tokens[name])):
+        read, write = result["reads"][variant], sum(tokens[variant])
+        record("read+write tokens", read + write, "tokens", "tokens", format=variant, tokenizer=model)
+        print(
+            f"{variant:<22} | {read:<10,} | {write:<10,} | {write / total:<11.2f} | {read + write:<10,} | "
+            f"{(read + write - e2e_base) / e2e_base * 100:+.1f}%"
+        )
+    print("-" * 90)
+    print(f"vs prod compares with {production}, the LINE:HASH| format parser.ts accepts today.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Output-token cost model for apply_patch input formats. Mines modified files from git history, "
+        "renders every diff hunk as plain context, @@ headers and LINE:HASH| anchored lines, and reports tokens "
+        "per changed line overall and by hunk size.",
+    )
+    parser.add_argument("repos", nargs="*", help="Git repositories to mine. Default: this repository.")
+    parser.add_argument("--commits", type=int, default=500, help="Most recent non-merge commits per repository.")
+    parser.add_argument("--ext", action="append", help="Only diff files with this extension. MAY be repeated.")
+    parser.add_argument("--context", type=int, default=3, help="Context lines around each hunk, as in diff -U.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--variants", action="store_true", help="Also price every corpus.py anchor variant end to end.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Add this many mutate()-generated diffs of files "
+                        "under the repositories, for trees without history.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --synthetic.")
+    args = parser.parse_args(argv)
+    repos = args.repos or [os.path.normpath(REPO)]
+    exts = set(args.ext) if args.ext else None
+    variants = VARIANTS if args.variants else ()
+    diffs = [diff for repo in repos for diff in git_diffs(repo, args.commits, exts)]
+    label = f"{len(repos)} repo(s), {args.commits} commits"
+    if args.synthetic:
+        diffs += synthetic_diffs(random.Random(args.seed), repos, args.synthetic, 6, 12, exts)
+        label += f" + {args.synthetic} synthetic"
+    for model in args.model or [DEFAULT_MODEL]:
+        result = measure(diffs, model, args.context, variants)
+        if not result["hunks"]:
+            parser.error("no modified text files found")
+        report(result, label, model, args.context)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+import os
+import re
+
+from apply import apply_replacements, build_unique_line_by_hash, find_context, locate
+from healing import WS, compute_replacements_with_healing
+
+BEGIN_PATCH_MARKER = "*** Begin Patch"
+END_PATCH_MARKER = "*** End Patch"
+CREATE_FILE_MARKER = "*** Create File: "
+DELETE_FILE_MARKER = "*** Delete File: "
+EDIT_FILE_MARKER = "*** Edit File: "
+MOVE_FILE_MARKER = "*** Move File: "
+MOVE_TO_MARKER = "*** Move to: "
+EOF_MARKER = "*** End of File"
+CHANGE_CONTEXT_MARKER = "@@ "
+EMPTY_CHANGE_CONTEXT_MARKER = "@@"
+
+JS_SPACE = "\t\n\x0b\x0c\r \xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+JS_SPACE += "\u2028\u2029\u202f\u205f\u3000\ufeff"
+END_PATCH_MARKER_LOOSE = re.compile(r"\A\*{2,3}" + WS + r"*end" + WS + r"*patch" + WS + r"*\Z", re.I)
+PLUS_END_MARKER = re.compile(r"\A\+\*{2,3}" + WS + r"*end" + WS + r"*patch" + WS + r"*\Z", re.I)
+HEREDOC = re.compile(
+    r"\A(?:cat" + WS + r"+)?<<['\"]?([A-Za-z0-9_]+)['\"]?" + WS + r"*\n([\s\S]*?)\n\1" + WS + r"*\Z"
+)
+ADDED_PREFIX = re.compile(r"\A[0-9]+:[0-9a-f]{2}\|")
+ANCHORED = re.compile(r"\A([0-9]+):([0-9a-f]{2})\|([^\n\r\u2028\u2029]*)\Z")
+
+
+class InvalidPatchError(ValueError):
+    pass
+
+
+class InvalidHunkError(ValueError):
+    def __init__(self, message, line_number):
+        super().__init__(message)
+        self.line_number = line_number
+
+
+def _trim(text):
+    return text.strip(JS_SPACE)
+
+
+def _view(lines, start, sliced):
+    return (lines[start:], 0) if sliced else (lines, start)
+
+
+def sanitize_added_line(line):
+    while ADDED_PREFIX.match(line):
+        line = ADDED_PREFIX.sub("", line, count=1)
+    return line
+
+
+def parse_anchored_body(body, line_number):
+    match = ANCHORED.match(body.lstrip(JS_SPACE))
+    if not match:
+        raise InvalidHunkError(
+            f"INVALID ANCHOR FORMAT: '{body[:120]}'"
+            "\n"
+            "\nREQUIREMENT: Context (' ') and removal ('-') lines MUST include LINE:HASH| prefix."
+            "\nCORRECT FORMAT: '42:ab|content' where 42 is the line number and ab is the hash."
+            "\n"
+            "\nACTION REQUIRED:"
+            "\n1. Copy anchored lines EXACTLY from the error context above"
+            "\n2. Use those anchors in your context (' ') and removal ('-') lines"
+            "\n"
+            "\nNOTE: If you intend to replace most of the file, you SHOULD use Delete File + Create File.",
+            line_number,
+        )
+    raw_line = int(match.group(1))
+    if raw_line < 1:
+        raise InvalidHunkError(
+            f"INVALID LINE NUMBER: '{match.group(1)}'"
+            "\nLine numbers MUST be positive integers starting from 1."
+            "\nYou MUST use the exact line numbers from the read tool output.",
+            line_number,
+        )
+    return match.group(3), raw_line, match.group(2)
+
+
+def normalize_patch_text(text):
+    return _trim(text.replace("\r\n", "\n").replace("\t", "    "))
+
+
+def strip_heredoc(text):
+    match = HEREDOC.match(text)
+    return match.group(2) if match else text
+
+
+def ensure_relative_patch_path(patch_path):
+    normalized = _trim(patch_path[1:] if patch_path.startswith("@") else patch_path)
+    if not normalized:
+        raise ValueError("Patch path MUST NOT be empty. You MUST provide a relative file path.")
+    return normalized
+
+
+def resolve_patch_path(cwd, patch_path):
+    normalized = ensure_relative_patch_path(patch_path)
+    return normalized if os.path.isabs(normalized) else os.path.normpath(os.path.join(cwd, normalized))
+
+
+def parse_patch(patch_text, sliced=False):
+    lines = strip_heredoc(normalize_patch_text(patch_text)).split("\n")
+    check_patch_boundaries(lines)
+    hunks = []
+    remaining, at = lines[1 : max(1, len(lines) - 1)], 0
+    line_number = 2
+    try:
+        while at < len(remaining):
+            if not _trim(remaining[at]):
+                line_number += 1
+                remaining, at = _view(remaining, at + 1, sliced)
+                continue
+            hunk, consumed = parse_one_hunk(remaining, at, line_number, sliced)
+            hunks.append(hunk)
+            remaining, at = _view(remaining, at + consumed, sliced)
+            line_number += consumed
+    except ValueError as error:
+        if hunks:
+            parsed = ", ".join(hunk["file_path"] for hunk in hunks)
+            error.args = (
+                f"{error.args[0]}\n\nContext: parsed {len(hunks)} hunk(s) before failure: [{parsed}]. "
+                f"{len(remaining) - at} lines remain unparsed.",
+            ) + error.args[1:]
+        raise
+    for hunk in hunks:
+        ensure_relative_patch_path(hunk["file_path"])
+        if hunk.get("move_to_path") or hunk["type"] == "move":
+            ensure_relative_patch_path(hunk["move_to_path"])
+    return hunks
+
+
+def check_patch_boundaries(lines):
+    while lines and not _trim(lines[-1]):
+        lines.pop()
+    if not lines:
+        raise InvalidPatchError(
+            "Patch is empty. You MUST provide content between the Begin Patch and End Patch markers."
+        )
+    first_line = _trim(lines[0])
+    last_index = len(lines) - 1
+    if PLUS_END_MARKER.match(_trim(lines[last_index])):
+        lines[last_index] = END_PATCH_MARKER
+    last_line = _trim(lines[last_index])
+    if first_line != BEGIN_PATCH_MARKER:
+        raise InvalidPatchError(
+            f"First line MUST be '{BEGIN_PATCH_MARKER}'. Got: '{first_line[:80]}'."
+            f"\nYou MUST start patchText with exactly: {BEGIN_PATCH_MARKER}"
+        )
+    if last_line == END_PATCH_MARKER or END_PATCH_MARKER_LOOSE.match(last_line):
+        lines[last_index] = END_PATCH_MARKER
+        return
+    prefixed = next((i for i, line in enumerate(lines) if PLUS_END_MARKER.match(_trim(line))), -1)
+    if prefixed != -1:
+        raise InvalidPatchError(
+            f"Found a prefixed end marker ('+*** End Patch') at line {prefixed + 1}."
+            "\nYou MUST NOT prefix patch envelope markers with '+'."
+            f"\nYou MUST place exactly '{END_PATCH_MARKER}' as the final non-empty line."
+        )
+    if any(line[:1] in ("+", "-", " ") for line in lines[-4:]):
+        raise InvalidPatchError(
+            f"Patch appears truncated \u2014 end marker missing ({len(lines)} lines received, "
+            f"last: '{last_line[:60]}')."
+            "\nYou MUST split large patches \u2014 one file per call, max ~800 added lines."
+            f"\nYou MUST ensure patchText ends with exactly: {END_PATCH_MARKER}"
+        )
+    raise InvalidPatchError(
+        f"Last line MUST be '{END_PATCH_MARKER}'. Got: '{last_line[:80]}'."
+        f"\nYou MUST end patchText with exactly: {END_PATCH_MARKER}"
+        "\nYou MUST NOT add trailing blank lines or comments after the end marker."
+    )
+
+
+def parse_one_hunk(lines, at, line_number, sliced=False):
+    first_line = _trim(lines[at]) if at < len(lines) else ""
+    if first_line.startswith(CREATE_FILE_MARKER):
+        file_path = first_line[len(CREATE_FILE_MARKER) :]
+        contents = []
+        consumed = 1
+        body, start = _view(lines, at + 1, sliced)
+        for index in range(start, len(body)):
+            add_line = body[index]
+            if add_line.startswith("+"):
+                contents.append(sanitize_added_line(add_line[1:]))
+                consumed += 1
+                continue
+            if add_line.startswith("***"):
+                break
+            if add_line.startswith(CHANGE_CONTEXT_MARKER) or add_line == EMPTY_CHANGE_CONTEXT_MARKER:
+                break
+            contents.append(add_line)
+            consumed += 1
+        if consumed == 1:
+            raise InvalidHunkError(
+                f"Create file hunk for '{file_path}' has no content lines."
+                "\nYou MAY use '+' prefix on each line or provide raw content.",
+                line_number,
+            )
+        return {"type": "create", "file_path": file_path, "contents": "".join(f"{c}\n" for c in contents)}, consumed
+    if first_line.startswith(DELETE_FILE_MARKER):
+        return {"type": "delete", "file_path": first_line[len(DELETE_FILE_MARKER) :]}, 1
+    if first_line.startswith(MOVE_FILE_MARKER):
+        file_path = first_line[len(MOVE_FILE_MARKER) :]
+        to_line = _trim(lines[at + 1]) if at + 1 < len(lines) else ""
+        if not to_line.startswith(MOVE_TO_MARKER):
+            raise InvalidHunkError(
+                f"Move file for '{file_path}' MUST be followed by '{MOVE_TO_MARKER}<new-path>'.", line_number
+            )
+        return {"type": "move", "file_path": file_path, "move_to_path": to_line[len(MOVE_TO_MARKER) :]}, 2
+    if first_line.startswith(EDIT_FILE_MARKER):
+        file_path = first_line[len(EDIT_FILE_MARKER) :]
+        consumed = 1
+        remaining, start = _view(lines, at + 1, sliced)
+        move_to_path = None
+        if start < len(remaining) and remaining[start].startswith(MOVE_TO_MARKER):
+            move_to_path = remaining[start][len(MOVE_TO_MARKER) :]
+            consumed += 1
+            remaining, start = _view(remaining, start + 1, sliced)
+        chunks = []
+        while start < len(remaining):
+            if not _trim(remaining[start]):
+                consumed += 1
+                remaining, start = _view(remaining, start + 1, sliced)
+                continue
+            if remaining[start].startswith("***"):
+                break
+            chunk, used = parse_edit_file_chunk(remaining, start, line_number + consumed, sliced)
+            chunks.append(chunk)
+            consumed += used
+            remaining, start = _view(remaining, start + used, sliced)
+        if not chunks:
+            raise InvalidHunkError(
+                f"Edit file hunk for '{file_path}' has no chunks.\nYou MUST provide ' ', '+', or '-' prefixed lines.",
+                line_number,
+            )
+        return {"type": "edit", "file_path": file_path, "move_to_path": move_to_path, "chunks": chunks}, consumed
+    raise InvalidHunkError(
+        f"'{first_line[:100]}' is not a valid hunk header."
+        f"\nYou MUST use one of: '{CREATE_FILE_MARKER}<path>', '{DELETE_FILE_MARKER}<path>', "
+        f"'{EDIT_FILE_MARKER}<path>', '{MOVE_FILE_MARKER}<path>'."
+        "\nYou MUST NOT place content lines outside of a file section.",
+        line_number,
+    )
+
+
+def parse_edit_file_chunk(lines, at, line_number, sliced=False):
+    if at >= len(lines):
+        raise InvalidHunkError("Edit hunk has no lines. Provide ' ', '+', or '-' prefixed lines.", line_number)
+    change_context = None
+    start_index = 0
+    if lines[at] == EMPTY_CHANGE_CONTEXT_MARKER:
+        start_index = 1
+    elif lines[at].startswith(CHANGE_CONTEXT_MARKER):
+        change_context = lines[at][len(CHANGE_CONTEXT_MARKER) :]
+        start_index = 1
+    if at + start_index >= len(lines):
+        raise InvalidHunkError(
+            "Edit hunk has @@ marker but no content lines. You MUST provide ' ', '+', or '-' prefixed lines.",
+            line_number + 1,
+        )
+    chunk = {
+        "change_context": change_context,
+        "old_lines": [],
+        "old_anchors": [],
+        "new_lines": [],
+        "is_end_of_file": False,
+    }
+    parsed = 0
+    body, start = _view(lines, at + start_index, sliced)
+    for index in range(start, len(body)):
+        line = body[index]
+        if line == EOF_MARKER:
+            if parsed == 0:
+                raise InvalidHunkError(
+                    "Edit hunk has EOF marker but no content before it. "
+                    "You MUST provide content lines before the EOF marker.",
+                    line_number + 1,
+                )
+            chunk["is_end_of_file"] = True
+            parsed += 1
+            break
+        if not line:
+            if chunk["old_lines"] or chunk["new_lines"]:
+                following = index + 1
+                if following < len(body) and body[following]:
+                    chunk["new_lines"].append("")
+                    parsed += 1
+                    continue
+            break
+        prefix = line[0]
+        if prefix == "+":
+            chunk["new_lines"].append(sanitize_added_line(line[1:]))
+            parsed += 1
+            continue
+        if prefix in (" ", "-"):
+            text, number, digest = parse_anchored_body(line[1:], line_number + start_index + parsed + 1)
+            chunk["old_lines"].append(text)
+            chunk["old_anchors"].append({"line": number, "hash": digest})
+            if prefix == " ":
+                chunk["new_lines"].append(text)
+            parsed += 1
+            continue
+        if parsed == 0:
+            raise InvalidHunkError(
+                f"Unexpected line in edit hunk: '{line[:80]}'."
+                "\nEvery line MUST start with ' ' (context), '+' (add), or '-' (remove). "
+                "You MUST NOT have unprefixed lines.",
+                line_number + 1,
+            )
+        break
+    return chunk, parsed + start_index
+
+
+def collapse_empty(lines):
+    out = []
+    empty = False
+    for line in lines:
+        if not _trim(line):
+            if empty:
+                continue
+            empty = True
+            out.append("")
+            continue
+        empty = False
+        out.append(line)
+    return out
+
+
+def derive_updated_content(original_content, file_path, chunks, noops):
+    original = original_content.split("\n")
+    replacements = compute_replacements_with_healing(
+        original, file_path, chunks, noops, locate, find_context, build_unique_line_by_hash
+    )
+    updated = collapse_empty(apply_replacements(original, replacements))
+    if not updated or updated[-1] != "":
+        updated.append("")
+    return "\n".join(updated)
+
+
+def _read(path):
+    with open(path, encoding="utf-8", errors="replace", newline="") as handle:
+        return handle.read()
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        handle.write(content)
+
+
+def _relocate(source, destination, content):
+    _write(destination, content)
+    try:
+        os.unlink(source)
+    except OSError:
+        os.unlink(destination)
+        raise
+
+
+def apply_hunks(cwd, hunks):
+    if not hunks:
+        raise ValueError("No files were modified. You MUST include at least one file section in the patch.")
+    summary = {"created": [], "edited": [], "moved": [], "deleted": [], "failed": [], "noops": []}
+    for hunk in hunks:
+        try:
+            source = resolve_patch_path(cwd, hunk["file_path"])
+            if hunk["type"] == "create":
+                if os.path.exists(source):
+                    raise ValueError(f"CONFLICT: File already exists: {hunk['file_path']}")
+                _write(source, hunk["contents"])
+                summary["created"].append(hunk["file_path"])
+            elif hunk["type"] == "delete":
+                _read(source)
+                os.unlink(source)
+                summary["deleted"].append(hunk["file_path"])
+            elif hunk["type"] == "move":
+                content = _read(source)
+                destination = resolve_patch_path(cwd, hunk["move_to_path"])
+                if os.path.exists(destination):
+                    raise ValueError(f"CONFLICT: Move destination already exists: {hunk['move_to_path']}")
+                _relocate(source, destination, content)
+                summary["moved"].append(hunk["move_to_path"])
+            else:
+                content = derive_updated_content(_read(source), source, hunk["chunks"], summary["noops"])
+                if hunk["move_to_path"]:
+                    destination = resolve_patch_path(cwd, hunk["move_to_path"])
+                    if os.path.exists(destination):
+                        raise ValueError(f"CONFLICT: Edit destination already exists: {hunk['move_to_path']}")
+                    _relocate(source, destination, content)
+                    summary["edited"].append(hunk["move_to_path"])
+                else:
+                    _write(source, content)
+                    summary["edited"].append(hunk["file_path"])
+        except (OSError, ValueError) as error:
+            summary["failed"].append({"path": hunk["file_path"], "error": str(error)})
+    return summary
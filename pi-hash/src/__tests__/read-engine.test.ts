@@ -3,8 +3,10 @@ import assert from "node:assert";
 import path from "node:path";
 import { mkdir, writeFile, rm } from "node:fs/promises";
 import { executeReadHash } from "../read/executor.js";
+import { RUNTIME_HASH, tokenService } from "./token-service.js";
 
 const FIXTURES = path.resolve(import.meta.dirname, "__fixtures__");
+const ANCHOR_TOKEN_BUDGET = 7;
 
 async function setup() {
   await mkdir(FIXTURES, { recursive: true });
@@ -204,6 +206,28 @@ test("read-engine", async (t) => {
     assert.strictEqual(result.details.files[0].matches, 2);
   });
 
+  await t.test("token budget: LINE:HASH| prefixes stay within the per-line budget", async (st) => {
+    const service = await tokenService();
+    if (!service) return st.skip("token service unavailable (python3 with tiktoken and numpy)");
+    st.after(() => service.release());
+    const result = await executeReadHash(FIXTURES, [{ path: "sample.ts" }]);
+    const text = result.content[0].type === "text" ? result.content[0].text : "";
+    const output = text.split("\n").filter((l) => /^\d+:[0-9a-f]{2}\|/.test(l));
+    const content = output.map((l) => l.slice(l.indexOf("|") + 1));
+    const reference = await service.marginal(content, { algorithm: RUNTIME_HASH });
+    assert.deepStrictEqual(
+      output.map((l) => l.slice(l.indexOf(":") + 1, l.indexOf("|"))),
+      reference.hashes,
+    );
+    const [anchored, bare] = await service.count([output.join("\n"), content.join("\n")]);
+    const perLine = (anchored - bare) / output.length;
+    assert.ok(
+      perLine <= ANCHOR_TOKEN_BUDGET,
+      `Anchors cost ${perLine.toFixed(2)} tokens/line, budget ${ANCHOR_TOKEN_BUDGET}`,
+    );
+    assert.ok(Math.max(...reference.marginal) <= ANCHOR_TOKEN_BUDGET);
+  });
+
   await t.test("image: returns image content", async () => {
     const result = await executeReadHash(FIXTURES, [{ path: "icon.png" }]);
     const types = result.content.map((c: { type: string }) => c.type);
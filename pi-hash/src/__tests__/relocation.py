@@ -0,0 +1,290 @@
+import argparse
+import difflib
+import os
+import random
+import subprocess
+import sys
+import time
+
+from apply import SPIRAL, line_hash, lines_equal, spiral
+from corpus import percentile, read_lines, synthetic, walk
+from results import record
+
+STRATEGIES = ("spiral", "linear", "expanding", "index")
+BUCKETS = ((0, 0), (1, 10), (11, 100), (101, 1000), (1001, None))
+
+
+def mutate(rng, lines, ops, block=20):
+    origin = list(range(len(lines)))
+    current = list(lines)
+    for _ in range(ops):
+        op = rng.random()
+        at = rng.randint(0, len(current))
+        size = rng.randint(1, block)
+        if op < 0.45 or not current:
+            fresh = synthetic(size, rng.randrange(1 << 30))
+            current[at:at] = fresh
+            origin[at:at] = [None] * size
+        elif op < 0.85:
+            del current[at : at + size]
+            del origin[at : at + size]
+        else:
+            at = min(at, len(current) - 1)
+            current[at] = current[at] + " // changed"
+            origin[at] = None
+    return current, origin
+
+
+def diff_origin(before, after):
+    origin = [None] * len(after)
+    matcher = difflib.SequenceMatcher(None, before, after, autojunk=False)
+    for tag, a0, _, b0, b1 in matcher.get_opcodes():
+        if tag == "equal":
+            origin[b0:b1] = range(a0, a0 + b1 - b0)
+    return origin
+
+
+def probes(rng, before, origin, count, size):
+    where = {}
+    for index, source in enumerate(origin):
+        if source is not None:
+            where[source] = index
+    out = []
+    for _ in range(count):
+        if len(before) < size:
+            break
+        start = rng.randint(0, len(before) - size)
+        old = before[start : start + size]
+        if not any(line.strip() for line in old):
+            continue
+        target = where.get(start)
+        if target is not None and any(where.get(start + i) != target + i for i in range(size)):
+            target = None
+        chunk = {
+            "old_lines": old,
+            "old_anchors": [{"line": start + i + 1, "hash": line_hash(line)} for i, line in enumerate(old)],
+        }
+        out.append((start, target, chunk))
+    return out
+
+
+class Scan:
+    def __init__(self, lines):
+        self.lines = lines
+        self.compared = 0
+
+    def match(self, chunk, start):
+        old = chunk["old_lines"]
+        if start < 0 or start + len(old) > len(self.lines):
+            return False
+        for i, expected in enumerate(old):
+            self.compared += 1
+            if not lines_equal(self.lines[start + i], expected, chunk["old_anchors"][i]["hash"]):
+                return False
+        return True
+
+
+def _nearest(hits, seed):
+    if not hits:
+        return None
+    hits = sorted(hits, key=lambda hit: (abs(hit - seed), hit))
+    if len(hits) > 1 and abs(hits[1] - seed) == abs(hits[0] - seed):
+        return "tie"
+    return hits[0]
+
+
+def search_spiral(scan, chunk, seed, unique, index=None):
+    limit = max(0, len(scan.lines) - len(chunk["old_lines"]) + 1)
+    if seed < 0 or seed >= limit:
+        return None
+    hits = [candidate for candidate in spiral(seed, limit) if scan.match(chunk, candidate)]
+    if not hits:
+        relocated = unique.get(chunk["old_anchors"][0]["hash"])
+        if relocated is not None and scan.match(chunk, relocated - 1):
+            return relocated - 1
+        return None
+    return _nearest(hits, seed)
+
+
+def search_linear(scan, chunk, seed, unique=None, index=None):
+    limit = max(0, len(scan.lines) - len(chunk["old_lines"]) + 1)
+    for candidate in range(max(0, seed), limit):
+        if scan.match(chunk, candidate):
+            return candidate
+    return None
+
+
+def search_expanding(scan, chunk, seed, unique=None, index=None):
+    limit = max(0, len(scan.lines) - len(chunk["old_lines"]) + 1)
+    seed = min(max(0, seed), max(0, limit - 1))
+    for delta in range(0, limit + 1):
+        hits = [c for c in {seed - delta, seed + delta} if 0 <= c < limit and scan.match(chunk, c)]
+        if hits:
+            return "tie" if len(hits) > 1 else hits[0]
+    return None
+
+
+def search_index(scan, chunk, seed, unique=None, index=None):
+    hits = [c for c in index.get(chunk["old_anchors"][0]["hash"], ()) if scan.match(chunk, c)]
+    return _nearest(hits, seed)
+
+
+SEARCHES = {
+    "spiral": search_spiral,
+    "linear": search_linear,
+    "expanding": search_expanding,
+    "index": search_index,
+}
+
+
+def build_index(lines):
+    index = {}
+    for position, line in enumerate(lines):
+        index.setdefault(line_hash(line), []).append(position)
+    return index
+
+
+def simulate(before, after, origin, rng, count, size, strategies):
+    start = time.perf_counter()
+    index = build_index(after)
+    unique = {h: positions[0] + 1 for h, positions in index.items() if len(positions) == 1}
+    setup = time.perf_counter() - start
+    records = []
+    for anchor, target, chunk in probes(rng, before, origin, count, size):
+        record = {"target": target, "drift": None if target is None else abs(target - anchor), "results": {}}
+        for name in strategies:
+            scan = Scan(after)
+            start = time.perf_counter()
+            found = SEARCHES[name](scan, chunk, anchor, unique, index)
+            elapsed = time.perf_counter() - start
+            record["results"][name] = {"found": found, "compared": scan.compared, "seconds": elapsed}
+        records.append(record)
+    return records, setup
+
+
+def outcome(record, name):
+    found = record["results"][name]["found"]
+    if found == "tie":
+        return "ambiguous"
+    if found is None:
+        return "miss" if record["target"] is not None else "reject"
+    if found == record["target"]:
+        return "hit"
+    return "false"
+
+
+def synthetic_histories(rng, roots, versions, ops, block):
+    sources = [lines for root in roots for lines in (read_lines(p) for p in walk(root)) if lines and len(lines) > 20]
+    if not sources:
+        sources = [synthetic(2000, rng.randrange(1 << 30))]
+    for _ in range(versions):
+        before = rng.choice(sources)
+        after, origin = mutate(rng, before, ops, block)
+        yield before, after, origin
+
+
+def git_histories(repo, revisions, exts=None):
+    listing = subprocess.run(["git", "-C", repo, "ls-files"], capture_output=True, text=True, check=True).stdout
+    for path in listing.splitlines():
+        if exts and os.path.splitext(path)[1] not in exts:
+            continue
+        log = subprocess.run(
+            ["git", "-C", repo, "log", f"-{revisions}", "--format=%H", "--", path], capture_output=True, text=True
+        ).stdout.split()
+        texts = []
+        for rev in reversed(log):
+            shown = subprocess.run(["git", "-C", repo, "show", f"{rev}:{path}"], capture_output=True)
+            if shown.returncode == 0 and b"\0" not in shown.stdout[:8192]:
+                texts.append(shown.stdout.decode("utf-8", errors="replace").split("\n"))
+        for before, after in zip(texts, texts[1:]):
+            if before != after:
+                yield before, after, diff_origin(before, after)
+
+
+def _bucket(drift):
+    for low, high in BUCKETS:
+        if drift >= low and (high is None or drift <= high):
+            return (low, high)
+    return BUCKETS[-1]
+
+
+def report(records, strategies, setup, label):
+    moved = [r["drift"] for r in records if r["drift"] is not None]
+    print(f"\n--- Anchor Relocation ({label}: {len(records)} Probes, {len(moved)} Surviving) ---")
+    print(
+        f"{'Strategy':<10} | {'Hit':<7} | {'False':<7} | {'Ambig':<7} | {'Miss':<7} | {'Reject':<7} | "
+        f"{'Lines/probe':<11} | {'p50 us':<8} | {'p99 us'}"
+    )
+    print("-" * 96)
+    for name in strategies:
+        outcomes = [outcome(r, name) for r in records]
+        share = {key: outcomes.count(key) / (len(outcomes) or 1) * 100 for key in ("hit", "false", "ambiguous", "miss", "reject")}
+        cells = [f"{share[key]:.2f}%" for key in ("hit", "false", "ambiguous", "miss", "reject")]
+        compared = sum(r["results"][name]["compared"] for r in records) / (len(records) or 1)
+        times = [r["results"][name]["seconds"] * 1e6 for r in records]
+        record("hit rate", share["hit"], "quality", "%", strategy=name)
+        record("false relocations", share["false"], "errors", "%", strategy=name)
+        record("lines/probe", compared, "time", "lines", strategy=name)
+        record("probe latency", None, "time", "us", times, strategy=name)
+        print(
+            f"{name:<10} | {cells[0]:<7} | {cells[1]:<7} | {cells[2]:<7} | {cells[3]:<7} | {cells[4]:<7} | "
+            f"{compared:<11.1f} | {percentile(times, 0.5):<8.1f} | {percentile(times, 0.99):.1f}"
+        )
+    print("-" * 96)
+    print("Hit: relocated to the true position. False: relocated elsewhere. Reject: no match where the lines are gone.")
+    print(f"index adds a one-off hash->positions build of {setup * 1000:.2f} ms total across histories.")
+    print("\n--- Hit Rate by Drift (|new - old| lines) ---")
+    print(f"{'Drift':<10} | {'Probes':<7} | " + " | ".join(f"{name:<9}" for name in strategies))
+    print("-" * (22 + 12 * len(strategies)))
+    for low, high in BUCKETS:
+        chosen = [r for r in records if r["drift"] is not None and _bucket(r["drift"]) == (low, high)]
+        label = f"{low}" if low == high else f"{low}-{high}" if high else f">{low - 1}"
+        rates = [f"{sum(outcome(r, n) == 'hit' for r in chosen) / (len(chosen) or 1) * 100:.1f}%" for n in strategies]
+        print(f"{label:<10} | {len(chosen):<7} | " + " | ".join(f"{rate:<9}" for rate in rates))
+    print("-" * (22 + 12 * len(strategies)))
+    if moved:
+        print(
+            f"Drift of surviving anchors: p50 {percentile(moved, 0.5):.0f}, p90 {percentile(moved, 0.9):.0f}, "
+            f"p99 {percentile(moved, 0.99):.0f}, max {max(moved)} lines (spiral radius {SPIRAL})."
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Move anchors through synthetic insert/delete streams or real git histories and measure "
+        "relocation hits, false relocations and lines scanned for linear, spiral, expanding and indexed search.",
+    )
+    parser.add_argument("roots", nargs="*", help="Files or directories whose contents seed synthetic histories.")
+    parser.add_argument("--git", help="Replay consecutive revisions of every tracked file in this repository instead.")
+    parser.add_argument("--revisions", type=int, default=20, help="Revisions per file in --git mode.")
+    parser.add_argument("--versions", type=int, default=200, help="Synthetic histories to generate.")
+    parser.add_argument("--ops", type=int, default=10, help="Insert/delete/modify operations per synthetic history.")
+    parser.add_argument("--block", type=int, default=40, help="Largest inserted or deleted block in lines.")
+    parser.add_argument("--probes", type=int, default=50, help="Anchored hunks probed per history.")
+    parser.add_argument("--size", type=int, default=3, help="Anchored lines per probed hunk.")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES, help="MAY be repeated. Default: all.")
+    parser.add_argument("--ext", action="append", help="Only replay files with this extension in --git mode.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    strategies = args.strategy or list(STRATEGIES)
+    if args.git:
+        histories = git_histories(args.git, args.revisions, set(args.ext) if args.ext else None)
+        label = f"git {args.git}"
+    else:
+        histories = synthetic_histories(rng, args.roots, args.versions, args.ops, args.block)
+        label = f"{args.versions} synthetic histories x {args.ops} ops"
+    records = []
+    setup = 0.0
+    for before, after, origin in histories:
+        found, spent = simulate(before, after, origin, rng, args.probes, args.size, strategies)
+        records.extend(found)
+        setup += spent
+    if not records:
+        parser.error("no histories with changed files found")
+    report(records, strategies, setup, label)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
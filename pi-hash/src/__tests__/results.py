@@ -0,0 +1,449 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+RESULTS_ENV = "PI_HASH_RESULTS"
+REPO = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+SOURCES = ("src/shared/hash.ts", "src/shared/normalize.ts", "src/read/executor.ts")
+BETTER = {
+    "overhead": "lower",
+    "tokens": "lower",
+    "throughput": "higher",
+    "time": "lower",
+    "memory": "lower",
+    "quality": "higher",
+    "errors": "lower",
+}
+GATES = {
+    "overhead": ("overhead", "tokens"),
+    "throughput": ("throughput", "time"),
+    "memory": ("memory",),
+    "quality": ("quality", "errors"),
+}
+THRESHOLDS = {"overhead": 1.0, "throughput": 10.0, "memory": 25.0, "quality": 1.0}
+IGNORED = ("--workers", "--threads", "--chunk", "--csv", "--json", "--out", "--root", "--show", "--socket")
+SAMPLES = 2000
+RESAMPLES = 2000
+CONFIDENCE = 0.95
+FIELDS = ("run", "mode", "time", "commit", "corpus", "metric", "kind", "unit", "labels", "value", "n", "low", "high")
+
+_run = None
+
+
+def results_dir():
+    return os.environ.get(RESULTS_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "pi-hash", "results")
+
+
+def peak_rss():
+    try:
+        with open("/proc/self/status") as handle:
+            return next(int(line.split()[1]) * 1024 for line in handle if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+    except OSError:
+        pass
+    return peak_rss()
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", "-C", REPO, *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _digest(path):
+    value = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            value.update(block)
+    return value.hexdigest()
+
+
+def sources():
+    found = {}
+    for name in SOURCES:
+        path = os.path.join(REPO, name)
+        found[name] = _digest(path) if os.path.isfile(path) else None
+    return found
+
+
+def _tree(root):
+    from corpus import SKIP_DIRS
+
+    if not os.path.isdir(root):
+        yield root
+        return
+    for current, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(names):
+            yield os.path.join(current, name)
+
+
+def fingerprint(argv):
+    value = hashlib.blake2b(digest_size=8)
+    skip = False
+    for arg in argv:
+        if skip or arg.split("=", 1)[0] in IGNORED:
+            skip = not skip and "=" not in arg
+            continue
+        if os.path.exists(arg):
+            for path in _tree(arg):
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                value.update(os.path.relpath(path, arg).encode("utf-8", "surrogateescape"))
+                value.update(f"\0{info.st_size}\0{info.st_mtime_ns}\0".encode("ascii"))
+        else:
+            value.update(arg.encode("utf-8", "surrogateescape"))
+        value.update(b"\0")
+    return value.hexdigest()
+
+
+def start(mode, argv, label=None):
+    global _run
+    status = _git("status", "--porcelain", "--", ".")
+    _run = {
+        "run": f"{datetime.now():%Y%m%d-%H%M%S}-{mode}-{os.getpid()}",
+        "mode": mode,
+        "argv": list(argv),
+        "label": label,
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "--short=12", "HEAD"),
+        "dirty": bool(status),
+        "sources": sources(),
+        "corpus": fingerprint(argv),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "records": [],
+    }
+    return _run
+
+
+def record(metric, value, kind, unit="", samples=None, **labels):
+    if _run is None or value is None and not samples:
+        return
+    entry = {"metric": metric, "kind": kind, "unit": unit, "labels": {k: str(v) for k, v in sorted(labels.items())}}
+    entry["samples"] = [float(x) for x in samples] if samples else [float(value)]
+    _run["records"].append(entry)
+
+
+def measured(run):
+    reset_peak()
+    count = len(_run["records"]) if _run else 0
+    started = time.perf_counter()
+    code = run()
+    if _run and len(_run["records"]) > count:
+        record("wall time", time.perf_counter() - started, "time", "s")
+        record("peak RSS", peak_rss() / 2**20, "memory", "MiB")
+    return code
+
+
+def _key(entry):
+    return entry["metric"], tuple(sorted(entry["labels"].items()))
+
+
+def _merge(entries, rng):
+    merged = {}
+    for entry in entries:
+        key = _key(entry)
+        if key in merged:
+            merged[key]["samples"].extend(entry["samples"])
+        else:
+            merged[key] = {**entry, "samples": list(entry["samples"])}
+    for entry in merged.values():
+        samples = entry["samples"]
+        entry["value"] = float(np.mean(samples))
+        entry["n"] = len(samples)
+        if len(samples) > SAMPLES:
+            entry["samples"] = rng.sample(samples, SAMPLES)
+        entry["low"], entry["high"] = interval(np.asarray(entry["samples"]), rng)
+    return list(merged.values())
+
+
+def finish(seconds, code=0):
+    global _run
+    run, _run = _run, None
+    if run is None or not run["records"]:
+        return None
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    if children:
+        peak = {"metric": "peak RSS, children", "kind": "memory", "unit": "MiB", "labels": {}}
+        run["records"].append({**peak, "samples": [children / 2**20]})
+    run["records"] = _merge(run["records"], random.Random(0))
+    run["seconds"] = seconds
+    run["exit"] = code
+    os.makedirs(results_dir(), exist_ok=True)
+    with open(os.path.join(results_dir(), "history.jsonl"), "a") as handle:
+        handle.write(json.dumps(run, separators=(",", ":")) + "\n")
+    return run
+
+
+def history():
+    path = os.path.join(results_dir(), "history.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _baselines():
+    path = os.path.join(results_dir(), "baselines.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def resolve(ref, runs, mode=None, before=None):
+    if ref and os.path.isfile(ref):
+        with open(ref) as handle:
+            return json.load(handle)
+    pool = [run for run in runs if mode is None or run["mode"] == mode]
+    if before is not None:
+        pool = pool[: next((i for i, run in enumerate(pool) if run["run"] == before["run"]), len(pool))]
+    if ref in ("latest", "previous"):
+        return pool[-1] if pool else None
+    named = _baselines().get(ref)
+    if named is not None:
+        ref = named.get(mode) if mode else None
+    matches = [run for run in pool if ref and run["run"].startswith(ref)]
+    return matches[-1] if matches else None
+
+
+def interval(samples, rng, statistic=np.mean):
+    if len(samples) < 2 or np.all(samples == samples[0]):
+        value = float(statistic(samples))
+        return value, value
+    picks = np.random.default_rng(rng.randrange(1 << 32)).integers(0, len(samples), (RESAMPLES, len(samples)))
+    stats = statistic(samples[picks], axis=1)
+    tail = (1 - CONFIDENCE) / 2 * 100
+    return float(np.percentile(stats, tail)), float(np.percentile(stats, 100 - tail))
+
+
+def difference(base, current, rng):
+    base, current = np.asarray(base, float), np.asarray(current, float)
+    scale = abs(base.mean()) or 1.0
+    if len(base) < 2 and len(current) < 2 or np.all(base == base[0]) and np.all(current == current[0]):
+        change = (current.mean() - base.mean()) / scale * 100
+        return change, change, change
+    seed = np.random.default_rng(rng.randrange(1 << 32))
+    left = base[seed.integers(0, len(base), (RESAMPLES, len(base)))].mean(axis=1)
+    right = current[seed.integers(0, len(current), (RESAMPLES, len(current)))].mean(axis=1)
+    changes = (right - left) / scale * 100
+    tail = (1 - CONFIDENCE) / 2 * 100
+    change = (current.mean() - base.mean()) / scale * 100
+    return change, float(np.percentile(changes, tail)), float(np.percentile(changes, 100 - tail))
+
+
+def verdict(kind, low, high, thresholds):
+    gate = next((name for name, kinds in GATES.items() if kind in kinds), None)
+    limit = thresholds.get(gate)
+    worse, better = (low, high) if BETTER[kind] == "lower" else (-high, -low)
+    if limit is not None and worse > limit:
+        return "REGRESSED"
+    if limit is not None and better < -limit:
+        return "improved"
+    return "ok" if limit is not None else "info"
+
+
+def compare(base, current, thresholds, seed=0):
+    rng = random.Random(seed)
+    before = {_key(entry): entry for entry in base["records"]}
+    rows = []
+    for entry in current["records"]:
+        old = before.pop(_key(entry), None)
+        if old is None:
+            continue
+        change, low, high = difference(old["samples"], entry["samples"], rng)
+        rows.append(
+            {
+                "metric": entry["metric"],
+                "kind": entry["kind"],
+                "unit": entry["unit"],
+                "labels": entry["labels"],
+                "base": old["value"],
+                "current": entry["value"],
+                "change": change,
+                "low": low,
+                "high": high,
+                "verdict": verdict(entry["kind"], low, high, thresholds),
+            }
+        )
+    unmatched = len(current["records"]) - len(rows), len(before)
+    return rows, unmatched
+
+
+def _number(value):
+    return f"{value:,.0f}" if abs(value) >= 1e4 else f"{value:.4g}"
+
+
+def _labels(labels):
+    return ", ".join(labels.values()) or "-"
+
+
+def _run_label(run):
+    dirty = "+dirty" if run.get("dirty") else ""
+    return f"{run['run']} ({run.get('commit') or 'no git'}{dirty}, corpus {run['corpus']})"
+
+
+def report(base, current, rows, unmatched, thresholds):
+    print(f"\n--- Results Compare ({current['mode']}, {CONFIDENCE:.0%} Bootstrap CI, {RESAMPLES} Resamples) ---")
+    print(f"Baseline: {_run_label(base)}")
+    print(f"Current:  {_run_label(current)}")
+    if base["corpus"] != current["corpus"]:
+        print("WARNING: corpus fingerprints differ; token metrics compare different inputs.")
+    changed = [name for name, value in current.get("sources", {}).items() if base.get("sources", {}).get(name) != value]
+    if changed:
+        print(f"Changed since baseline: {', '.join(changed)}.")
+    print(
+        f"{'Metric':<24} | {'Labels':<30} | {'Baseline':<12} | {'Current':<12} | {'Change':<8} | "
+        f"{'CI':<18} | {'Verdict'}"
+    )
+    print("-" * 130)
+    for row in rows:
+        change, ci = f"{row['change']:+.1f}%", f"[{row['low']:+.1f}, {row['high']:+.1f}]%"
+        print(
+            f"{row['metric'][:24]:<24} | {_labels(row['labels'])[:30]:<30} | {_number(row['base']):<12} | "
+            f"{_number(row['current']):<12} | {change:<8} | {ci:<18} | {row['verdict']}"
+        )
+    print("-" * 130)
+    regressed = sum(row["verdict"] == "REGRESSED" for row in rows)
+    gates = ", ".join(f"{name} {limit:g}%" for name, limit in thresholds.items() if limit is not None)
+    print(f"{len(rows)} metrics compared, {regressed} regressed (gates: {gates or 'none'}).")
+    print(f"Unmatched: {unmatched[0]} only in current, {unmatched[1]} only in baseline.")
+    print("Change is relative to the baseline mean; a metric regresses when its whole CI is past the gate.")
+    return regressed
+
+
+def _rows(runs):
+    for run in runs:
+        for entry in run["records"]:
+            yield {
+                "run": run["run"],
+                "mode": run["mode"],
+                "time": run["time"],
+                "commit": run.get("commit"),
+                "corpus": run["corpus"],
+                "metric": entry["metric"],
+                "kind": entry["kind"],
+                "unit": entry["unit"],
+                "labels": ";".join(f"{k}={v}" for k, v in entry["labels"].items()),
+                "value": entry["value"],
+                "n": entry["n"],
+                "low": entry["low"],
+                "high": entry["high"],
+            }
+
+
+def export(runs, csv_path=None, json_path=None):
+    if csv_path:
+        with open(csv_path, "w", newline="") as handle:
+            writer = csv.DictWriter(handle, FIELDS)
+            writer.writeheader()
+            writer.writerows(_rows(runs))
+    if json_path:
+        with open(json_path, "w") as handle:
+            json.dump(runs[0] if len(runs) == 1 else runs, handle, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark results history. token-efficiency.py modes append one run per invocation to "
+        f"history.jsonl under ${RESULTS_ENV} (default ~/.cache/pi-hash/results). This command lists runs, "
+        "marks baselines, exports JSON/CSV and compares a run against a baseline with bootstrap confidence "
+        "intervals, exiting 1 when a gated metric regresses.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="List stored runs.")
+    listing.add_argument("--mode", help="Only runs of this mode.")
+    listing.add_argument("--last", type=int, default=20, help="Show this many most recent runs.")
+    marking = commands.add_parser("baseline", help="Mark a run as the named baseline for its mode.")
+    marking.add_argument("run", nargs="?", default="latest", help="Run id, prefix or 'latest'. Default latest.")
+    marking.add_argument("--name", default="default", help="Baseline name. Default 'default'.")
+    marking.add_argument("--mode", help="With 'latest', the latest run of this mode.")
+    exporting = commands.add_parser("export", help="Write runs as CSV rows or JSON.")
+    exporting.add_argument("runs", nargs="*", default=["latest"], help="Run ids or prefixes. Default latest.")
+    exporting.add_argument("--csv", help="CSV path, one row per metric.")
+    exporting.add_argument("--json", help="JSON path. A single run can be passed back as compare --baseline.")
+    comparing = commands.add_parser("compare", help="Diff a run against a baseline and gate regressions.")
+    comparing.add_argument("run", nargs="?", default="latest", help="Run id, prefix or 'latest'. Default latest.")
+    comparing.add_argument("--baseline", default="default", help="Baseline name, run id, exported JSON path or "
+                           "'previous'. Default: the 'default' baseline for the run's mode, else the previous run.")
+    comparing.add_argument("--mode", help="With 'latest', the latest run of this mode.")
+    for name, limit in THRESHOLDS.items():
+        kinds = "/".join(GATES[name])
+        comparing.add_argument(f"--{name}", type=float, default=limit, help=f"Regression gate in percent for {kinds} "
+                               f"metrics. Default {limit:g}. Negative disables.")
+    comparing.add_argument("--seed", type=int, default=0, help="Bootstrap seed.")
+    args = parser.parse_args(argv)
+    runs = history()
+    if args.command == "list":
+        picked = [run for run in runs if not args.mode or run["mode"] == args.mode][-args.last :]
+        marks = {run_id: name for name, modes in _baselines().items() for run_id in modes.values()}
+        print(f"{'Run':<40} | {'Commit':<13} | {'Corpus':<16} | {'Records':<7} | {'Seconds':<8} | {'Baseline'}")
+        print("-" * 104)
+        for run in picked:
+            commit = (run.get("commit") or "-") + ("+" if run.get("dirty") else "")
+            print(
+                f"{run['run']:<40} | {commit:<13} | {run['corpus']:<16} | {len(run['records']):<7} | "
+                f"{run.get('seconds', 0):<8.1f} | {marks.get(run['run'], '')}"
+            )
+        print("-" * 104)
+        print(f"{len(runs)} run(s) in {results_dir()}.")
+        return 0
+    if args.command == "baseline":
+        run = resolve(args.run, runs, args.mode)
+        if run is None:
+            parser.error(f"no run matches {args.run!r}")
+        marks = _baselines()
+        marks.setdefault(args.name, {})[run["mode"]] = run["run"]
+        with open(os.path.join(results_dir(), "baselines.json"), "w") as handle:
+            json.dump(marks, handle, indent=2)
+        print(f"Baseline {args.name!r} for {run['mode']}: {_run_label(run)}")
+        return 0
+    if args.command == "export":
+        picked = [resolve(ref, runs) for ref in args.runs]
+        if None in picked:
+            parser.error("no run matches " + ", ".join(ref for ref, run in zip(args.runs, picked) if run is None))
+        if not args.csv and not args.json:
+            parser.error("pass --csv and/or --json")
+        export(picked, args.csv, args.json)
+        return 0
+    pinned = resolve(args.baseline, runs) if os.path.isfile(args.baseline) else None
+    current = resolve(args.run, runs, args.mode or pinned and pinned["mode"])
+    if current is None:
+        parser.error(f"no run matches {args.run!r}")
+    before = current if args.baseline == "previous" else None
+    base = pinned or resolve(args.baseline, runs, current["mode"], before=before)
+    if base is None and args.baseline == "default":
+        base = resolve("previous", runs, current["mode"], before=current)
+    if base is None:
+        parser.error(f"no baseline {args.baseline!r} for mode {current['mode']}")
+    if not pinned and base["run"] == current["run"]:
+        parser.error(f"{current['run']} is the baseline itself; run {current['mode']} again to compare")
+    thresholds = {name: (None if getattr(args, name) < 0 else getattr(args, name)) for name in THRESHOLDS}
+    rows, unmatched = compare(base, current, thresholds, args.seed)
+    return 1 if report(base, current, rows, unmatched, thresholds) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+import argparse
+import mmap
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from corpus import synthetic
+from linehash import line_hashes
+from results import record
+from tokens import DEFAULT_MODEL, count_tokens
+
+DEFAULT_MATCHES = 200
+MAX_MATCHES = 1000
+NEEDLE = "needle"
+DENSITIES = (0.0001, 0.001, 0.01, 0.1, 0.5)
+CONTEXTS = (0, 3)
+
+
+def matcher(search, regex=False, sensitive=False):
+    if not search:
+        raise ValueError("Search query is required.")
+    if regex:
+        pattern = re.compile(search, 0 if sensitive else re.IGNORECASE)
+        return lambda line: pattern.search(line) is not None
+    needle = search if sensitive else search.lower()
+    return lambda line: needle in (line if sensitive else line.lower())
+
+
+def clamp(max_matches=None, before=None, after=None):
+    cap = min(max(1, DEFAULT_MATCHES if max_matches is None else max_matches), MAX_MATCHES)
+    return cap, max(0, before or 0), max(0, after or 0)
+
+
+def prefix(indices, lines):
+    hashes = line_hashes([lines[i] for i in indices])
+    return [f"{i + 1}:{h}|{lines[i]}" for i, h in zip(indices, hashes)]
+
+
+def search_lines(lines, search, regex=False, sensitive=False, max_matches=None, before=None, after=None):
+    test = matcher(search, regex, sensitive)
+    cap, before, after = clamp(max_matches, before, after)
+    matches = []
+    for i, line in enumerate(lines):
+        if test(line):
+            matches.append(i)
+            if len(matches) >= cap:
+                break
+    include = set()
+    for idx in matches:
+        for i in range(max(0, idx - before), min(len(lines) - 1, idx + after) + 1):
+            include.add(i)
+    ordered = sorted(include)
+    output = [f"Search: '{search}' | Matches: {len(matches)}"]
+    if not ordered:
+        return output, 0
+    rendered = prefix(ordered, lines)
+    prev = -2
+    for idx, line in zip(ordered, rendered):
+        if prev != -2 and idx > prev + 1:
+            output.append("...")
+        output.append(line)
+        prev = idx
+    return output, len(matches)
+
+
+class MappedFile:
+    def __init__(self, path):
+        self.handle = open(path, "rb")
+        self.size = os.fstat(self.handle.fileno()).st_size
+        self.data = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.view = np.frombuffer(self.data, np.uint8)
+
+    def line_at(self, offset):
+        end = self.data.find(b"\n", offset)
+        return self.data.rfind(b"\n", 0, offset) + 1, self.size if end == -1 else end
+
+    def newlines(self, start, end):
+        return int(np.count_nonzero(self.view[start:end] == 0x0A))
+
+    def back(self, start, count):
+        moved = 0
+        while moved < count and start > 0:
+            start = self.data.rfind(b"\n", 0, start - 1) + 1
+            moved += 1
+        return moved, start
+
+    def forward(self, end, count):
+        moved = 0
+        while moved < count and end < self.size:
+            following = self.data.find(b"\n", end + 1)
+            end = self.size if following == -1 else following
+            moved += 1
+        return moved, end
+
+    def text(self, start, end):
+        return self.data[start:end].decode("utf-8", errors="replace")
+
+    def lines(self):
+        start = 0
+        while True:
+            end = self.data.find(b"\n", start)
+            if end == -1:
+                yield start, self.size
+                return
+            yield start, end
+            start = end + 1
+
+    def close(self):
+        del self.view
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.handle.close()
+
+
+@lru_cache(maxsize=None)
+def _folds():
+    return tuple(chr(c) for c in range(0x80, 0x110000) if any(ord(x) < 0x80 for x in chr(c).lower()))
+
+
+def _prefilter(search, regex, sensitive):
+    if regex:
+        return None
+    if sensitive:
+        return re.compile(re.escape(search.encode("utf-8")))
+    if search.isascii():
+        needle = search.lower()
+        folds = [char for char in _folds() if any(x in needle for x in char.lower() if x.isascii())]
+        pattern = b"|".join(re.escape(text.encode("utf-8")) for text in [search] + folds)
+        return re.compile(pattern, re.IGNORECASE)
+    return None
+
+
+def scan(mapped, search, regex, sensitive, cap):
+    test = matcher(search, regex, sensitive)
+    candidate = _prefilter(search, regex, sensitive)
+    matches = []
+    if candidate is None:
+        for index, (start, end) in enumerate(mapped.lines()):
+            if test(mapped.text(start, end)):
+                matches.append((index, start, end))
+                if len(matches) >= cap:
+                    break
+        return matches
+    position = 0
+    index = 0
+    while len(matches) < cap:
+        found = candidate.search(mapped.data, position)
+        if found is None:
+            break
+        start, end = mapped.line_at(found.start())
+        index += mapped.newlines(position, start)
+        if test(mapped.text(start, end)):
+            matches.append((index, start, end))
+        if end >= mapped.size:
+            break
+        position = end + 1
+        index += 1
+    return matches
+
+
+def merge(mapped, matches, before, after):
+    windows = []
+    for index, start, end in matches:
+        back, start = mapped.back(start, before)
+        ahead, end = mapped.forward(end, after)
+        low, high = index - back, index + ahead
+        if windows and low <= windows[-1][1] + 1:
+            if high > windows[-1][1]:
+                windows[-1][1] = high
+                windows[-1][3] = end
+        else:
+            windows.append([low, high, start, end])
+    return windows
+
+
+def search_mapped(path, search, regex=False, sensitive=False, max_matches=None, before=None, after=None):
+    mapped = MappedFile(path)
+    try:
+        cap, before, after = clamp(max_matches, before, after)
+        matches = scan(mapped, search, regex, sensitive, cap)
+        windows = merge(mapped, matches, before, after)
+        chunks = [mapped.text(start, end).split("\n") for _, _, start, end in windows]
+        hashes = iter(line_hashes([line for chunk in chunks for line in chunk]))
+        output = [f"Search: '{search}' | Matches: {len(matches)}"]
+        for number, (window, chunk) in enumerate(zip(windows, chunks)):
+            if number:
+                output.append("...")
+            output.extend(f"{window[0] + i + 1}:{next(hashes)}|{line}" for i, line in enumerate(chunk))
+        return output, len(matches), len(windows)
+    finally:
+        mapped.close()
+
+
+def fixture(path, count, density, seed=0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as handle:
+        for line in synthetic(count, seed):
+            if rng.random() < density:
+                line += f"  // {rng.choice((NEEDLE, NEEDLE.upper(), NEEDLE.capitalize()))}"
+            handle.write(line + "\n")
+
+
+def measure(path, search, model=DEFAULT_MODEL, **options):
+    start = time.perf_counter()
+    with open(path, "rb") as handle:
+        lines = handle.read().decode("utf-8", errors="replace").split("\n")
+    reference, matches = search_lines(lines, search, **options)
+    naive = time.perf_counter() - start
+    start = time.perf_counter()
+    output, found, windows = search_mapped(path, search, **options)
+    mapped = time.perf_counter() - start
+    text = "\n".join(output)
+    return {
+        "lines": len(lines),
+        "matches": matches,
+        "windows": windows,
+        "output": len(output) - 1 - max(0, windows - 1),
+        "tokens": count_tokens(text, model, "search"),
+        "naive": len(lines) / naive,
+        "mapped": len(lines) / mapped,
+        "match": reference == output and matches == found,
+    }
+
+
+def report(title, rows):
+    print(f"\n--- {title} ---")
+    print(
+        f"{'Fixture':<16} | {'Ctx':<3} | {'Matches':<7} | {'Windows':<7} | {'Out lines':<9} | {'Tokens':<8} | "
+        f"{'Naive lines/sec':<15} | {'mmap lines/sec':<15} | {'Same'}"
+    )
+    print("-" * 112)
+    for name, context, r in rows:
+        for metric, value in (("naive throughput", r["naive"]), ("mmap throughput", r["mapped"])):
+            record(metric, value, "throughput", "lines/s", fixture=name, context=context)
+        record("output tokens", r["tokens"], "tokens", "tokens", fixture=name, context=context)
+        record("mismatches", 0 if r["match"] else 1, "errors", "files", fixture=name, context=context)
+        print(
+            f"{name:<16} | {context:<3} | {r['matches']:<7} | {r['windows']:<7} | {r['output']:<9} | {r['tokens']:<8} | "
+            f"{r['naive']:<15,.0f} | {r['mapped']:<15,.0f} | {'yes' if r['match'] else 'NO'}"
+        )
+    print("-" * 112)
+    print("Naive: whole-file decode and split, then the Set-and-sort port of searchFile, as executor.ts does.")
+    print("mmap: newline index over a mapped file, byte prefilter where exact, interval merge of context windows.")
+
+
+def _floats(value):
+    return tuple(float(item) for item in value.split(","))
+
+
+def _ints(value):
+    return tuple(int(item) for item in value.split(","))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark searchFile semantics (regex/substring, case, maxMatches, context, '...' gaps) "
+        "over sparse-to-dense fixtures or real files.",
+    )
+    parser.add_argument("paths", nargs="*", help="Files to search. Omit to generate fixtures.")
+    parser.add_argument("--search", default=NEEDLE, help=f"Query. Default '{NEEDLE}', which fixtures plant.")
+    parser.add_argument("--regex", action="store_true", help="Treat the query as a regular expression.")
+    parser.add_argument("--case-sensitive", action="store_true", help="Match case exactly.")
+    parser.add_argument("--max-matches", type=int, help=f"maxMatches. Clamped to 1..{MAX_MATCHES}, default {DEFAULT_MATCHES}.")
+    parser.add_argument("--context", default=",".join(map(str, CONTEXTS)), help="Comma-separated contextBefore/After values.")
+    parser.add_argument("--lines", type=int, default=500_000, help="Fixture size in lines.")
+    parser.add_argument("--density", default=",".join(map(str, DENSITIES)), help="Comma-separated match densities.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Tokenizer model for output tokens. Default gpt-4o.")
+    args = parser.parse_args(argv)
+    _folds()
+    options = {"regex": args.regex, "sensitive": args.case_sensitive, "max_matches": args.max_matches}
+    contexts = _ints(args.context)
+    rows = []
+    if args.paths:
+        for path in args.paths:
+            if not os.path.isfile(path):
+                parser.error(f"not a file: {path}")
+            for context in contexts:
+                result = measure(path, args.search, args.model, before=context, after=context, **options)
+                rows.append((os.path.basename(path)[:16], context, result))
+        report(f"searchFile '{args.search}'", rows)
+        return 0
+    with tempfile.TemporaryDirectory() as root:
+        for density in _floats(args.density):
+            path = os.path.join(root, f"fixture-{density}.ts")
+            fixture(path, args.lines, density)
+            for context in contexts:
+                result = measure(path, args.search, args.model, before=context, after=context, **options)
+                rows.append((f"density {density:g}", context, result))
+    report(f"searchFile '{args.search}' over {args.lines} Line Fixtures", rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import signal
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus import percentile, synthetic
+from linehash import ALPHABETS, HASH_LEN, HASHES, line_hashes
+from tokens import DEFAULT_MODEL, count_batch, encoder, token_cache
+
+SOCKET_ENV = "PI_HASH_SERVICE"
+IDLE = 900
+LIMIT = 256 * 1024 * 1024
+READY = 30
+BATCHES = (1, 10, 100, 1000)
+REQUESTS = 200
+
+
+def runtime_dir():
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    path = os.path.join(base, "pi-hash") if base else os.path.join(tempfile.gettempdir(), f"pi-hash-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{path} must be a directory owned by this user with mode 0700")
+    return path
+
+
+def default_socket():
+    return os.environ.get(SOCKET_ENV) or os.path.join(runtime_dir(), "service.sock")
+
+
+def _strings(request, field):
+    values = request.get(field)
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"{field} must be a list of strings")
+    return values
+
+
+def _hashes(request, lines):
+    algorithm = request.get("algorithm", "fnv1a")
+    alphabet = request.get("alphabet", "hex")
+    length = request.get("length", HASH_LEN)
+    if algorithm not in HASHES:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(HASHES)}")
+    if alphabet not in ALPHABETS:
+        raise ValueError(f"unknown alphabet {alphabet!r}, expected one of {', '.join(ALPHABETS)}")
+    if not isinstance(length, int) or length < 1:
+        raise ValueError("length must be a positive integer")
+    return line_hashes(lines, algorithm, alphabet, length) if lines else []
+
+
+def op_count(request):
+    texts = _strings(request, "texts")
+    counts = count_batch(texts, request.get("model", DEFAULT_MODEL), fmt=request.get("format", "service"))
+    return {"counts": counts, "total": sum(counts)}
+
+
+def op_hash(request):
+    return {"hashes": _hashes(request, _strings(request, "lines"))}
+
+
+def op_marginal(request):
+    lines = _strings(request, "lines")
+    model = request.get("model", DEFAULT_MODEL)
+    start = request.get("start", 1)
+    sep, end, space = request.get("sep", ":"), request.get("end", "|"), request.get("space", "")
+    hashes = _hashes(request, lines)
+    prefixes = [f"{start + i}{sep}{anchor}{end}{space}" for i, anchor in enumerate(hashes)]
+    anchored = count_batch([prefix + line + "\n" for prefix, line in zip(prefixes, lines)], model, fmt="anchored line")
+    bare = count_batch([line + "\n" for line in lines], model, fmt="bare line")
+    return {
+        "hashes": hashes,
+        "prefix": count_batch(prefixes, model, fmt="prefix"),
+        "marginal": [a - b for a, b in zip(anchored, bare)],
+        "anchored": sum(anchored),
+        "bare": sum(bare),
+    }
+
+
+OPS = {"count": op_count, "hash": op_hash, "marginal": op_marginal}
+
+
+class Service:
+    def __init__(self, path, models, idle=IDLE):
+        self.path = path
+        self.models = models
+        self.idle = idle
+        self.started = time.monotonic()
+        self.last = self.started
+        self.served = 0
+        self.clients = set()
+        self.worker = ThreadPoolExecutor(1)
+        self.stop = None
+        self.stopping = False
+        self.releasing = False
+        self.loop = None
+
+    def warm(self):
+        for model in self.models:
+            encoder(model).encode_ordinary("warm up\n")
+            op_marginal({"lines": ["const x = 1;"], "model": model})
+
+    def close(self):
+        cache = token_cache()
+        if cache:
+            cache.close()
+
+    def answer(self, line):
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            op = request.get("op")
+            if op == "ping":
+                response = {"pid": os.getpid(), "uptime": time.monotonic() - self.started, "served": self.served}
+                response["models"] = self.models
+            elif op == "shutdown":
+                response = {"stopping": True}
+                self.stopping = True
+            elif op == "release":
+                response = {"releasing": True}
+                self.releasing = True
+            elif op in OPS:
+                response = OPS[op](request)
+            else:
+                known = ", ".join(["ping", "shutdown", "release", *OPS])
+                raise ValueError(f"unknown op {op!r}, expected one of {known}")
+        except Exception as error:
+            response = {"error": f"{type(error).__name__}: {error}"}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        self.served += 1
+        return (json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8")
+
+    async def handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        self.clients.add(writer)
+        try:
+            while line := await reader.readline():
+                self.last = time.monotonic()
+                writer.write(await loop.run_in_executor(self.worker, self.answer, line))
+                await writer.drain()
+                if self.stopping:
+                    self.stop.set()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.last = time.monotonic()
+            writer.close()
+            if self.releasing and not self.clients:
+                self.stop.set()
+
+    async def watch(self):
+        while not self.stop.is_set():
+            await asyncio.sleep(min(self.idle, 5))
+            if not self.clients and time.monotonic() - self.last > self.idle:
+                self.stop.set()
+
+    async def serve(self):
+        self.stop = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(signum, self.stop.set)
+        await self.loop.run_in_executor(self.worker, self.warm)
+        server = await asyncio.start_unix_server(self.handle, self.path, limit=LIMIT)
+        print(f"ready {self.path}", flush=True)
+        watcher = asyncio.create_task(self.watch())
+        async with server:
+            await self.stop.wait()
+            for writer in list(self.clients):
+                writer.close()
+        watcher.cancel()
+        await self.loop.run_in_executor(self.worker, self.close)
+        self.worker.shutdown()
+
+
+def alive(path):
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def serve(path, models, idle=IDLE):
+    lock = os.fdopen(os.open(path + ".lock", os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        deadline = time.monotonic() + READY
+        while not alive(path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print(f"ready {path}" if alive(path) else f"another server holds {path}.lock", flush=True)
+        return 0 if alive(path) else 1
+    service = Service(path, models, idle)
+    if os.path.exists(path):
+        os.unlink(path)
+    try:
+        asyncio.run(service.serve())
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+        lock.close()
+    return 0
+
+
+class Client:
+    def __init__(self, path=None):
+        self.socket = socket.socket(socket.AF_UNIX)
+        self.socket.connect(path or default_socket())
+        self.stream = self.socket.makefile("rwb")
+        self.next = 0
+
+    def call(self, op, **fields):
+        self.next += 1
+        self.stream.write(json.dumps({"id": self.next, "op": op, **fields}).encode("utf-8") + b"\n")
+        self.stream.flush()
+        response = json.loads(self.stream.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+
+def _start(path, models):
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--socket", path]
+    command += [arg for model in models for arg in ("--model", model)]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("ready"):
+        raise RuntimeError(f"server did not start: {line.strip() or process.wait()}")
+    return process, time.perf_counter() - started
+
+
+def _oneshot(model):
+    script = f"from tokens import count_tokens; count_tokens('const x = 1;\\n', {model!r})"
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", script], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - started
+
+
+def bench(path, model=DEFAULT_MODEL, requests=REQUESTS):
+    if alive(path):
+        raise RuntimeError(f"a server is already listening on {path}; pass --socket to bench a fresh one")
+    process, startup = _start(path, [model])
+    lines = synthetic(max(BATCHES))
+    results = []
+    client = Client(path)
+    try:
+        for op, field in (("hash", "lines"), ("count", "texts"), ("marginal", "lines")):
+            for size in BATCHES:
+                latencies = []
+                for index in range(requests):
+                    offset = index * size % len(lines)
+                    batch = (lines[offset:] + lines[:offset])[:size]
+                    started = time.perf_counter()
+                    client.call(op, **{field: batch, "model": model})
+                    latencies.append(time.perf_counter() - started)
+                latencies.sort()
+                results.append(
+                    {
+                        "op": op,
+                        "batch": size,
+                        "p50": percentile(latencies, 0.5),
+                        "p99": percentile(latencies, 0.99),
+                        "rate": size * len(latencies) / sum(latencies),
+                    }
+                )
+        client.call("shutdown")
+    finally:
+        client.close()
+        process.wait()
+    return results, startup, _oneshot(model)
+
+
+def report(results, startup, oneshot, model, requests):
+    print(f"\n--- Token Service Latency ({model}, {requests} Requests per Row, Unix Socket, NDJSON) ---")
+    print(f"{'Op':<9} | {'Batch':<6} | {'p50 ms':<8} | {'p99 ms':<8} | {'Lines/sec'}")
+    print("-" * 55)
+    for result in results:
+        print(
+            f"{result['op']:<9} | {result['batch']:<6,} | {result['p50'] * 1000:<8.2f} | "
+            f"{result['p99'] * 1000:<8.2f} | {result['rate']:,.0f}"
+        )
+    print("-" * 55)
+    print(f"Server start to ready: {startup:.2f}s once. One-shot python -c count_tokens: {oneshot:.2f}s per call.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Long-lived token-count and line-hash service for the TypeScript tests. Serves newline-delimited "
+        "JSON on a Unix socket with warm tokenizers. Each request is an object with an op (count, marginal, hash, "
+        "ping, shutdown, release) and an optional id echoed in the response. release stops the server once its last "
+        "client disconnects.",
+    )
+    parser.add_argument("command", nargs="?", choices=("serve", "stop", "bench"), default="serve")
+    parser.add_argument("--socket", default=None, help=f"Socket path. Default: ${SOCKET_ENV} or a per-user temp path.")
+    parser.add_argument("--model", action="append", help="Tokenizer to keep warm. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--idle", type=float, default=IDLE, help="Exit after this many seconds without clients.")
+    parser.add_argument("--requests", type=int, default=REQUESTS, help="Requests per op and batch size for bench.")
+    args = parser.parse_args(argv)
+    models = args.model or [DEFAULT_MODEL]
+    if args.command == "serve":
+        return serve(args.socket or default_socket(), models, args.idle)
+    if args.command == "stop":
+        path = args.socket or default_socket()
+        if not alive(path):
+            print(f"no server on {path}")
+            return 0
+        client = Client(path)
+        client.call("shutdown")
+        client.close()
+        return 0
+    with tempfile.TemporaryDirectory(prefix="pi-hash-") as root:
+        results, startup, oneshot = bench(args.socket or os.path.join(root, "bench.sock"), models[0], args.requests)
+    report(results, startup, oneshot, models[0], args.requests)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,514 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from apply import canonical, line_hash
+from corpus import synthetic
+from patchparse import apply_hunks, parse_patch
+from results import record
+
+FILES = 4000
+CHUNKS = 6
+LINES = (80, 400)
+MAX_DRIFT = 30
+KINDS = ("replace", "insert", "remove")
+OPS = (("edit", 0.70), ("edit+move", 0.08), ("move", 0.07), ("delete", 0.07), ("keep", 0.08))
+CREATE_SHARE = 0.05
+WINDOW = 100
+SLICED_LIMIT = 250_000
+
+
+def _content(lines):
+    return "\n".join(lines) + "\n"
+
+
+def _digest(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _indent(line):
+    return line[: len(line) - len(line.lstrip(" "))]
+
+
+def _tree(rng, files, lines=LINES):
+    tree = {}
+    for index in range(files):
+        body = synthetic(rng.randint(*lines), rng.randrange(1 << 30))
+        tag = f"m{index}."
+        tree[f"src/pkg{index % 64:02d}/module{index:05d}.ts"] = [f"{line} // {tag}{j}" for j, line in enumerate(body)]
+    return tree
+
+
+def _anchor(number, line):
+    return f"{number}:{line_hash(line)}|{line}"
+
+
+def _added(rng, line):
+    return "+" + (f"{rng.randint(1, 999)}:{line_hash(line)}|" if rng.random() < 0.05 else "") + line
+
+
+def _chunk(rng, lines, start, size, drift, tag, kinds=KINDS):
+    old = lines[start : start + size]
+    kind = rng.choice(kinds)
+    if kind == "insert" and drift + 3 > MAX_DRIFT or kind == "remove" and (size < 3 or drift - size < -MAX_DRIFT):
+        kind = "replace"
+    context = lines[start - 1] if rng.random() < 0.3 else None
+    head = ["@@ " + context if context else "@@", " " + _anchor(start + 1, old[0])]
+    if kind == "replace":
+        new = [old[0]] + [line.replace(" // ", " // edited ", 1) for line in old[1:]]
+        body = [f"-{_anchor(start + i + 1, line)}" for i, line in enumerate(old[1:], 1)]
+        body += [_added(rng, line) for line in new[1:]]
+    elif kind == "insert":
+        fresh = [f"{_indent(old[0])}const inserted{tag}{k} = {k};" for k in range(rng.randint(1, 3))]
+        new = [old[0]] + fresh + old[1:]
+        body = [_added(rng, line) for line in fresh]
+        body += [f" {_anchor(start + i + 1, line)}" for i, line in enumerate(old[1:], 1)]
+    else:
+        new = [old[0], old[-1]]
+        body = [f"-{_anchor(start + i + 1, line)}" for i, line in enumerate(old[1:-1], 1)]
+        body.append(f" {_anchor(start + size, old[-1])}")
+    return head + body, new, context
+
+
+def _ambiguous(hashes, start, size):
+    old = hashes[start : start + size]
+    low, high = max(0, start - WINDOW), min(len(hashes) - size, start + WINDOW)
+    return any(hashes[at : at + size] == old for at in range(low, high + 1) if at != start)
+
+
+def _edit(rng, lines, count, tag, kinds=KINDS):
+    slot = (len(lines) - MAX_DRIFT) // max(1, count)
+    hashes = [line_hash(line) for line in lines]
+    sections = []
+    result = list(lines)
+    drift = 0
+    ends = []
+    ambiguous = False
+    for index in range(count if slot >= 6 else 0):
+        size = rng.randint(2, min(6, slot - 3))
+        start = slot * index + rng.randint(1, slot - size - 1)
+        rendered, new, _ = _chunk(rng, lines, start, size, drift, f"{tag}_{index}_", kinds)
+        ambiguous = ambiguous or _ambiguous(hashes, start, size)
+        sections.append(rendered)
+        at = start + drift
+        result[at : at + size] = new
+        drift += len(new) - size
+        ends.append(at + len(new))
+    return sections, result, ends, ambiguous
+
+
+def _create(rng, path, lines):
+    raw = rng.random() < 0.2
+    return [f"*** Create File: {path}"] + [line if raw else _added(rng, line) for line in lines]
+
+
+def build_valid(rng, tree, chunks=CHUNKS, create_share=CREATE_SHARE):
+    sections = []
+    after = {path: _content(lines) for path, lines in tree.items()}
+    expect = {"created": 0, "edited": 0, "moved": 0, "deleted": 0, "noops": 0, "chunks": 0}
+    ambiguous = []
+    names, weights = zip(*OPS)
+    for index, (path, lines) in enumerate(tree.items()):
+        op = rng.choices(names, weights)[0]
+        name = path.rsplit("/", 1)[1]
+        if op in ("edit", "edit+move"):
+            body, result, ends, unclear = _edit(rng, lines, rng.randint(1, 2 * chunks - 1), index)
+            if not body:
+                continue
+            header = [f"*** Edit File: {path}"]
+            if unclear:
+                ambiguous.append(path)
+            if op == "edit+move":
+                header.append(f"*** Move to: src/renamed/{name}")
+                after[path] = None
+                path = f"src/renamed/{name}"
+                ambiguous += [path] * unclear
+            sections.append(header + [line for chunk in body for line in chunk])
+            after[path] = _content(result)
+            expect["edited"] += not unclear
+            expect["chunks"] += len(ends)
+        elif op == "move":
+            sections.append([f"*** Move File: {path}", f"*** Move to: src/moved/{name}"])
+            after[f"src/moved/{name}"] = after.pop(path)
+            expect["moved"] += 1
+        elif op == "delete":
+            sections.append([f"*** Delete File: {path}"])
+            after[path] = None
+            expect["deleted"] += 1
+    for index in range(int(len(tree) * create_share)):
+        path = f"src/created/file{index:05d}.ts"
+        lines = [f"{line} // c{index}.{j}" for j, line in enumerate(synthetic(rng.randint(5, 60), index))]
+        sections.append(_create(rng, path, lines))
+        after[path] = _content(lines)
+        expect["created"] += 1
+    rng.shuffle(sections)
+    text = "\n".join(["*** Begin Patch"] + [line for section in sections for line in section] + ["*** End Patch"])
+    expect["hunks"] = len(sections)
+    expect["ambiguous"] = ambiguous
+    return text + "\n", after, expect
+
+
+def _small(rng, tree, paths, chunks=2, gap=0):
+    sections = []
+    after = {}
+    for path in paths:
+        body, result, ends, _ = _edit(rng, tree[path], chunks, f"s{len(after)}", ("replace",) if gap else KINDS)
+        if not body:
+            continue
+        body[0].extend([""] * gap)
+        if gap == 1:
+            result.insert(ends[0], "")
+        sections.append([f"*** Edit File: {path}"] + [line for chunk in body for line in chunk])
+        after[path] = _content(result)
+    return sections, after
+
+
+def _envelope(sections):
+    return ["*** Begin Patch"] + [line for section in sections for line in section] + ["*** End Patch"]
+
+
+def _error(name, lines, error, message, line=None):
+    text = "\n".join(lines) + "\n"
+    return {"name": name, "text": text, "inputs": [], "error": error, "message": message, "line": line}
+
+
+def malformed_cases(rng, tree):
+    paths = list(tree)
+    a, b = paths[:2]
+    sections, _ = _small(rng, tree, [a])
+    valid = _envelope(sections)
+    cases = [
+        _error("missing-begin", valid[1:], "InvalidPatchError", "First line MUST be"),
+        _error("truncated", valid[:-1], "InvalidPatchError", "appears truncated"),
+        _error("empty", [""], "InvalidPatchError", "Patch is empty"),
+        _error("prefixed-end-inside", valid[:-1] + ["+*** End Patch", "done"], "InvalidPatchError", "prefixed end"),
+        _error("wrong-last-line", valid[:-1] + [f"*** Delete File: {b}"] * 4 + ["*** Done"], "InvalidPatchError",
+               "Last line MUST be"),
+    ]
+    bad = next(i for i, line in enumerate(valid) if line.startswith(" ") or line.startswith("-"))
+    broken = list(valid)
+    broken[bad] = broken[bad][0] + broken[bad].split("|", 1)[1]
+    cases.append(_error("bad-anchor", broken, "InvalidHunkError", "INVALID ANCHOR FORMAT", bad + 1))
+    zero = list(valid)
+    zero[bad] = zero[bad][0] + "0:" + zero[bad].split(":", 1)[1]
+    cases.append(_error("zero-line-number", zero, "InvalidHunkError", "INVALID LINE NUMBER", bad + 1))
+    cases += [
+        _error("edit-no-chunks", ["*** Begin Patch", f"*** Edit File: {a}", f"*** Delete File: {b}", "*** End Patch"],
+               "InvalidHunkError", "has no chunks", 2),
+        _error("create-no-content", ["*** Begin Patch", "*** Create File: src/x.ts", "*** End Patch"],
+               "InvalidHunkError", "has no content lines", 2),
+        _error("move-without-to", ["*** Begin Patch", f"*** Move File: {a}", f"*** Delete File: {b}", "*** End Patch"],
+               "InvalidHunkError", "MUST be followed by", 2),
+        _error("invalid-header", ["*** Begin Patch", f"*** Rename File: {a}", "*** End Patch"], "InvalidHunkError",
+               "not a valid hunk header", 2),
+        _error("marker-without-body", ["*** Begin Patch", f"*** Edit File: {a}", "@@", "*** End Patch"],
+               "InvalidHunkError", "@@ marker but no content", 4),
+        _error("eof-without-body", ["*** Begin Patch", f"*** Edit File: {a}", "@@", "*** End of File", "*** End Patch"],
+               "InvalidHunkError", "EOF marker but no content", 4),
+        _error("unprefixed-line", ["*** Begin Patch", f"*** Edit File: {a}", "@@", "const x = 1;", "*** End Patch"],
+               "InvalidHunkError", "Unexpected line", 4),
+        _error("unprefixed-no-marker", ["*** Begin Patch", f"*** Edit File: {a}", "const x = 1;", "*** End Patch"],
+               "InvalidHunkError", "Unexpected line", 3),
+        _error("empty-path", ["*** Begin Patch", "*** Delete File: @", "*** End Patch"], "ValueError",
+               "MUST NOT be empty"),
+    ]
+    late, _ = _small(rng, tree, paths[:200], 1)
+    parsed = len(late) - 1
+    late = _envelope(late)
+    bad = max(i for i, line in enumerate(late) if line.startswith("-") or line.startswith(" "))
+    late[bad] = late[bad][0] + late[bad].split("|", 1)[1]
+    cases.append(_error("late-bad-anchor", late, "InvalidHunkError", f"parsed {parsed} hunk(s)", bad + 1))
+    return cases
+
+
+def _ok(name, text, inputs, after, summary):
+    return {"name": name, "text": text, "inputs": list(inputs), "after": after, "summary": summary}
+
+
+def accepted_cases(rng, tree):
+    paths = list(tree)
+    cases = []
+    variants = (
+        ("heredoc", lambda lines: "cat <<'EOF'\n" + "\n".join(lines) + "\nEOF\n"),
+        ("crlf", lambda lines: "\r\n".join(lines) + "\r\n"),
+        ("loose-end-marker", lambda lines: "\n".join(lines[:-1] + ["*** end patch"]) + "\n"),
+        ("plus-end-marker", lambda lines: "\n".join(lines[:-1] + ["+*** End Patch"]) + "\n\n\n"),
+        ("at-path", lambda lines: "\n".join(lines).replace("*** Edit File: ", "*** Edit File: @") + "\n"),
+    )
+    for offset, (name, render) in enumerate(variants):
+        path = paths[3 + offset]
+        sections, after = _small(rng, tree, [path])
+        cases.append(_ok(name, render(_envelope(sections)), [path], _hashes(after), {"edited": 1}))
+    for gap, (name, path) in enumerate(zip(("blank-between-chunks", "2-blanks-between-chunks"), paths[8:]), 1):
+        sections, after = _small(rng, tree, [path], gap=gap)
+        cases.append(_ok(name, "\n".join(_envelope(sections)) + "\n", [path], _hashes(after), {"edited": 1}))
+    a, b, c, d = paths[10:14]
+    sections, _ = _small(rng, tree, [a], 1)
+    row = next(i for i, line in enumerate(sections[0]) if line.startswith("-") or line.startswith(" "))
+    number, real = sections[0][row][1:].split(":", 1)
+    gone = next(f"gone{k}" for k in range(1000) if line_hash(f"gone{k}") != real.split("|", 1)[0])
+    sections[0][row] = f"{sections[0][row][0]}{number}:{line_hash(gone)}|{gone}"
+    unchanged = {a: _digest(_content(tree[a]))}
+    cases.append(_ok("stale-anchor", "\n".join(_envelope(sections)) + "\n", [a], unchanged, {"failed": 1}))
+    lines = ["*** Begin Patch", f"*** Create File: {b}", "+overwrite", "*** End Patch"]
+    cases.append(_ok("create-existing", "\n".join(lines) + "\n", [b], {b: _digest(_content(tree[b]))}, {"failed": 1}))
+    lines = ["*** Begin Patch", f"*** Move File: {c}", f"*** Move to: {d}", "*** End Patch"]
+    same = {c: _digest(_content(tree[c])), d: _digest(_content(tree[d]))}
+    cases.append(_ok("move-onto-existing", "\n".join(lines) + "\n", [c, d], same, {"failed": 1}))
+    lines = ["*** Begin Patch", "*** Delete File: src/missing.ts", "*** Edit File: src/missing.ts", "@@",
+             f" 1:{line_hash('x')}|x", "*** End Patch"]
+    cases.append(_ok("missing-file", "\n".join(lines) + "\n", [], {"src/missing.ts": None}, {"failed": 2}))
+    twin = ["if (ready) {", "  start();"]
+    body = [f"const pad{k} = {k};" for k in range(20)]
+    body[2:4] = body[12:14] = twin
+    lines = ["*** Begin Patch", "*** Create File: src/ambiguous.ts"] + [f"+{line}" for line in body]
+    lines += ["*** Edit File: src/ambiguous.ts", "@@", _rm(8, twin[0]), _rm(9, twin[1]), f"+{twin[0]}", "+  begin();",
+              "*** End Patch"]
+    after = {"src/ambiguous.ts": _digest(_content(body))}
+    cases.append(_ok("equidistant-anchor", "\n".join(lines) + "\n", [], after, {"created": 1, "failed": 1}))
+    return cases
+
+
+def _rm(number, line):
+    return f"-{_anchor(number, line)}"
+
+
+def _hashes(after):
+    return {path: None if content is None else _digest(content) for path, content in after.items()}
+
+
+def generate(out, files=FILES, chunks=CHUNKS, seed=0):
+    rng = random.Random(seed)
+    tree = _tree(rng, files)
+    before = os.path.join(out, "before")
+    for path, lines in tree.items():
+        target = os.path.join(before, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8", newline="") as handle:
+            handle.write(_content(lines))
+    text, after, expect = build_valid(rng, tree, chunks)
+    hunks = expect.pop("hunks")
+    ambiguous = expect.pop("ambiguous")
+    cases = [_ok("bulk", text, list(tree), _hashes(after), expect)]
+    cases[0]["hunks"] = hunks
+    cases[0]["ambiguous"] = ambiguous
+    cases += accepted_cases(rng, tree) + malformed_cases(rng, tree)
+    os.makedirs(os.path.join(out, "cases"), exist_ok=True)
+    manifest = {"seed": seed, "files": files, "cases": []}
+    for case in cases:
+        name = f"cases/{case['name']}.patch"
+        with open(os.path.join(out, name), "w", encoding="utf-8", newline="") as handle:
+            handle.write(case.pop("text"))
+        manifest["cases"].append({"patch": name, **case})
+    with open(os.path.join(out, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=1)
+    return manifest
+
+
+def _stage(inputs, root, work):
+    for path in inputs:
+        target = os.path.join(work, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(os.path.join(root, "before", path), target)
+
+
+def _peak(run):
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def _check_error(case, error):
+    problems = []
+    if type(error).__name__ != case["error"]:
+        problems.append(f"raised {type(error).__name__}")
+    if case["message"] not in str(error):
+        problems.append("message")
+    reported = getattr(error, "line_number", None)
+    return problems, reported
+
+
+def _check_tree(case, work, summary):
+    unclear = set(case.get("ambiguous", ()))
+    differ = [path for path, digest in case["after"].items() if _file_digest(os.path.join(work, path)) != digest]
+    problems = [path for path in differ if path not in unclear]
+    summary = dict(summary, failed=[entry["path"] for entry in summary["failed"]])
+    keys = ("created", "edited", "moved", "deleted", "failed")
+    counts = {key: sum(path not in unclear for path in summary[key]) for key in keys}
+    counts["noops"] = len(summary["noops"])
+    wrong = [key for key, value in case["summary"].items() if key in counts and counts[key] != value]
+    checks = [f"{len(problems)} file(s) differ"] * bool(problems) + [f"{key} count" for key in wrong]
+    return checks, len(unclear & set(differ))
+
+
+def _file_digest(path):
+    try:
+        with open(path, "rb") as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def run_case(root, case, sliced_limit=SLICED_LIMIT):
+    with open(os.path.join(root, case["patch"]), encoding="utf-8", newline="") as handle:
+        text = handle.read()
+    row = {"name": case["name"], "lines": text.count("\n"), "bytes": len(text.encode("utf-8"))}
+    line_hash.cache_clear()
+    canonical.cache_clear()
+    start = time.perf_counter()
+    try:
+        hunks = parse_patch(text)
+    except ValueError as error:
+        row["parse"] = time.perf_counter() - start
+        row["problems"], row["reported"] = _check_error(case, error) if "error" in case else (["raised"], None)
+        row["expected"] = case.get("line")
+        row["result"] = type(error).__name__
+        return row
+    row["parse"] = time.perf_counter() - start
+    if "error" in case:
+        row["problems"], row["result"] = ["parsed without error"], "parsed"
+        return row
+    row["hunks"] = len(hunks)
+    row["chunks"] = sum(len(hunk.get("chunks", ())) for hunk in hunks)
+    if row["lines"] <= sliced_limit:
+        sliced, row["sliced"] = _timed(lambda: parse_patch(text, sliced=True))
+        row["same"] = sliced == hunks
+    row["parse_peak"] = _peak(lambda: parse_patch(text))
+    work = tempfile.mkdtemp(prefix="pi-hash-stress-")
+    try:
+        _stage(case["inputs"], root, work)
+        summary, row["apply"] = _timed(lambda: apply_hunks(work, hunks))
+        row["problems"], row["misplaced"] = _check_tree(case, work, summary)
+        row["problems"] += ["sliced parse differs"] * (row.get("same") is False)
+        row["ambiguous"] = len(case.get("ambiguous", ()))
+        row["result"] = f"{len(summary['failed'])} failed" if summary["failed"] else "applied"
+        shutil.rmtree(work)
+        os.makedirs(work)
+        _stage(case["inputs"], root, work)
+        row["apply_peak"] = _peak(lambda: apply_hunks(work, parse_patch(text)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return row
+
+
+def run(root, names=None, sliced_limit=SLICED_LIMIT):
+    with open(os.path.join(root, "manifest.json"), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    cases = [case for case in manifest["cases"] if not names or case["name"] in names]
+    return [run_case(root, case, sliced_limit) for case in cases]
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def _mb(size):
+    return "-" if size is None else f"{size / 1e6:.1f}"
+
+
+def report(rows):
+    print(f"\n--- apply_patch Stress Cases ({len(rows)}) ---")
+    print(f"{'Case':<24} | {'Lines':<8} | {'Result':<18} | {'Parse ms':<9} | {'Apply ms':<9} | ", end="")
+    print(f"{'Peak MB':<8} | {'Check'}")
+    print("-" * 102)
+    for row in rows:
+        peak = max(row.get("parse_peak", 0), row.get("apply_peak", 0)) or None
+        check = ", ".join(row["problems"]) or "ok"
+        if row.get("expected") is not None and row["reported"] != row["expected"]:
+            check += f" (line {row['reported']}, actual {row['expected']})"
+        print(
+            f"{row['name']:<24} | {row['lines']:<8,} | {row['result']:<18} | {_ms(row.get('parse')):<9} | "
+            f"{_ms(row.get('apply')):<9} | {_mb(peak):<8} | {check}"
+        )
+    print("-" * 102)
+    failed = sum(bool(row["problems"]) for row in rows)
+    record("manifest mismatches", failed, "errors", "cases")
+    print(f"{len(rows) - failed}/{len(rows)} cases match the manifest.")
+    print("(line N, actual M) marks an InvalidHunkError whose lineNumber is not the offending patch line.")
+    for row in rows:
+        if row.get("ambiguous"):
+            record("ambiguous misplaced", row["misplaced"], "errors", "files", case=row["name"])
+            print(
+                f"{row['name']}: {row['ambiguous']:,} path(s) have a chunk whose line hashes also match within "
+                f"+/-{WINDOW} lines. The manifest records them as ambiguous and they are not scored. "
+                f"{row['misplaced']:,} landed elsewhere or failed."
+            )
+    bulk = max((row for row in rows if "apply" in row), key=lambda row: row["lines"], default=None)
+    if not bulk:
+        return failed
+    print(f"\n--- Throughput ({bulk['name']}: {bulk['lines']:,} lines, {bulk['bytes'] / 1e6:.1f} MB, ", end="")
+    print(f"{bulk['hunks']:,} hunks, {bulk['chunks']:,} chunks) ---")
+    print(f"{'Stage':<28} | {'ms':<9} | {'Lines/sec':<11} | {'Hunks/sec':<10} | {'Peak MB'}")
+    print("-" * 76)
+    stages = [("Parse, cursor", bulk["parse"], bulk["parse_peak"])]
+    if "sliced" in bulk:
+        stages.append(("Parse, slice per hunk (TS)", bulk["sliced"], None))
+    stages.append(("Parse + apply", bulk["parse"] + bulk["apply"], bulk["apply_peak"]))
+    for name, seconds, peak in stages:
+        record("throughput", bulk["lines"] / seconds, "throughput", "lines/s", stage=name)
+        if peak:
+            record("peak memory", peak / 1e6, "memory", "MB", stage=name)
+        print(
+            f"{name:<28} | {seconds * 1000:<9.1f} | {bulk['lines'] / seconds:<11,.0f} | "
+            f"{bulk['hunks'] / seconds:<10,.0f} | {_mb(peak)}"
+        )
+    print("-" * 76)
+    print(f"Process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:.1f} MB.")
+    print("Apply rates include the pure-Python computeLineHash port; compare them across runs, not against Node.")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Deterministic offline load tests for the apply_patch parser and applyHunks. Generates a large "
+        "anchored patch (creates, deletes, moves, edits with moves, multi-chunk edits) plus accepted and malformed "
+        "variants with an expected-result manifest, then replays them through patchparse.py and reports parse and "
+        "apply throughput and peak memory.",
+    )
+    parser.add_argument(
+        "command", nargs="?", choices=("generate", "run"), help="Default: generate into a temp dir, then run."
+    )
+    parser.add_argument("root", nargs="?", help="Fixture directory (before/, cases/, manifest.json).")
+    parser.add_argument("--files", type=int, default=FILES, help="Files in the generated tree.")
+    parser.add_argument("--chunks", type=int, default=CHUNKS, help="Mean @@ chunks per edited file.")
+    parser.add_argument("--case", action="append", help="Run only this case. MAY be repeated.")
+    parser.add_argument("--sliced-limit", type=int, default=SLICED_LIMIT, help="Largest patch (lines) also parsed "
+                        "with the per-hunk array slicing parser.ts does. 0 disables.")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed.")
+    args = parser.parse_args(argv)
+    if args.command and not args.root:
+        parser.error(f"{args.command} needs a fixture directory")
+    if args.files < 12 or args.chunks < 1:
+        parser.error("files MUST be >= 12 and chunks >= 1")
+    root = args.root or tempfile.mkdtemp(prefix="pi-hash-stress-")
+    try:
+        if args.command != "run":
+            manifest, seconds = _timed(lambda: generate(root, args.files, args.chunks, args.seed))
+            print(f"Generated {len(manifest['cases'])} cases over {args.files:,} files in {seconds:.1f} s: {root}")
+        if args.command == "generate":
+            return 0
+        return 1 if report(run(root, args.case, args.sliced_limit)) else 0
+    finally:
+        if not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,72 @@
-import tiktoken
-
-def count_tokens(text, model="gpt-4o"):
-    enc = tiktoken.encoding_for_model(model)
-    return len(enc.encode(text))
+import argparse
+import runpy
+import sys
+import time
+
+from results import finish, measured, results_dir, start
+from tokens import cache_summary, cache_totals, count_tokens, get_tokens
+
+MODES = {
+    "bench": "tokens",
+    "corpus": "corpus",
+    "collide": "collisions",
+    "optimize": "optimizer",
+    "attribute": "attribution",
+    "paginate": "pagination",
+    "search": "search",
+    "normalize": "normalize",
+    "heal": "damage",
+    "relocate": "relocation",
+    "stress": "stress",
+    "patchcost": "patchcost",
+    "guard": "bashguard",
+    "large": "largefile",
+    "serve": "service",
+    "results": "results",
+}
+UNRECORDED = ("serve", "results")
+
+
+def run_mode(module):
+    try:
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as exit:
+        return exit.code
+    return 0
+
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    parser = argparse.ArgumentParser(
+        prog="token-efficiency.py",
+        description="Run one benchmark mode and append its metrics to the results history. "
+        "Run without arguments for the sample-based format reports.",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Run the mode this many times; metrics become samples.")
+    parser.add_argument("--label", help="Free-form note stored with the run.")
+    parser.add_argument("--no-record", action="store_true", help="Do not append this run to the results history.")
+    parser.add_argument("mode", help=f"One of: {', '.join(MODES)}.")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the mode.")
+    args = parser.parse_args()
+    if args.mode not in MODES:
+        sys.exit(f"Unknown mode '{args.mode}'. Expected one of: {', '.join(MODES)}.")
+    sys.argv[1:] = args.args
+    if not args.no_record and args.mode not in UNRECORDED:
+        start(args.mode, args.args, args.label)
+    before = cache_totals()
+    code = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(max(1, args.repeat)):
+            code = measured(lambda: run_mode(MODES[args.mode]))
+            if code:
+                break
+        run = finish(time.perf_counter() - started, code)
+    finally:
+        for line in cache_summary(before):
+            print(line)
+    if run:
+        print(f"Results: {len(run['records'])} metrics saved as {run['run']} in {results_dir()}.")
+    sys.exit(code)
 
 def format_line(line_no, hash_str, content):
     return f"{line_no}:{hash_str}| {content}\n"
@@ -51,15 +115,6 @@ print("-" * 55)
 print("Note: 4-char Base36 provides 6,000x more unique anchors than 2-char Hex")
 print("at a token cost of less than 5% relative to standard read output.")
 
-import tiktoken
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
 def format_line(line_no, hash_str, content):
     return f"{line_no}:{hash_str}| {content}\n"
 
@@ -106,16 +161,6 @@ def run_report(model_name):
 
 run_report("gpt-4o")
 run_report("gpt-3.5-turbo")
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
 def format_line(line_no, hash_str, content):
     return f"{line_no}:{hash_str}| {content}\n"
 
@@ -162,16 +207,6 @@ def run_report(model_name, sample):
 
 run_report("gpt-4o", realistic_sample)
 run_report("gpt-3.5-turbo", realistic_sample)
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
 def format_line(line_no, hash_str, content, sep=":"):
     return f"{line_no}{sep}{hash_str}| {content}\n"
 
@@ -224,16 +259,6 @@ def run_report(model_name, sample):
 
 run_report("gpt-4o", realistic_sample)
 run_report("gpt-3.5-turbo", realistic_sample)
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
 def format_line(line_no, hash_str, content, sep=".", end="|"):
     return f"{line_no}{sep}{hash_str}{end} {content}\n"
 
@@ -291,23 +316,6 @@ def run_report(model_name, sample):
 
 run_report("gpt-4o", realistic_sample)
 run_report("gpt-3.5-turbo", realistic_sample)
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
-def get_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return [enc.decode([t]) for t in enc.encode(text)]
-
 def format_line(line_no, hash_str, content, sep=".", end="|", space=" "):
     return f"{line_no}{sep}{hash_str}{end}{space}{content}\n"
 
@@ -377,23 +385,6 @@ test_tokens("42z7k|")
 test_tokens("42z7k ")
 test_tokens("42.z7k ")
 test_tokens("42:z7k ")
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
-def get_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return [enc.decode([t]) for t in enc.encode(text)]
-
 def format_line(line_no, hash_str, content, sep=".", end="|", space=" "):
     return f"{line_no}{sep}{hash_str}{end}{space}{content}\n"
 
@@ -463,23 +454,6 @@ test_tokens("42.12345|")
 test_tokens("42.a3f2|")
 test_tokens("42.abc|")
 test_tokens("42 1234|")
-import tiktoken
-import os
-
-def count_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
-
-def get_tokens(text, model="gpt-4o"):
-    try:
-        enc = tiktoken.encoding_for_model(model)
-    except:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return [enc.decode([t]) for t in enc.encode(text)]
-
 def format_line(line_no, hash_str, content, sep=".", end="|", space=" "):
     return f"{line_no}{sep}{hash_str}{end}{space}{content}\n"
 
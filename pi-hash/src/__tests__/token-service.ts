@@ -0,0 +1,163 @@
+import { spawn } from "node:child_process";
+import { lstatSync, mkdirSync } from "node:fs";
+import { connect, type Socket } from "node:net";
+import os from "node:os";
+import path from "node:path";
+import { createInterface } from "node:readline";
+
+const SCRIPT = path.resolve(import.meta.dirname, "service.py");
+const READY_MS = 30_000;
+
+const UID = process.getuid?.() ?? 0;
+const RUNTIME_DIR = process.env.XDG_RUNTIME_DIR
+  ? path.join(process.env.XDG_RUNTIME_DIR, "pi-hash")
+  : path.join(os.tmpdir(), `pi-hash-${UID}`);
+
+export const SOCKET_PATH = process.env.PI_HASH_SERVICE ?? path.join(RUNTIME_DIR, "service.sock");
+
+type Runtime = { Bun?: { hash?: { xxHash32?: unknown } } };
+
+export const RUNTIME_HASH =
+  typeof (globalThis as typeof globalThis & Runtime).Bun?.hash?.xxHash32 === "function" ? "xxhash32" : "fnv1a";
+
+export type HashOptions = {
+  algorithm?: "fnv1a" | "xxhash32";
+  alphabet?: "hex" | "dec" | "b26" | "b36";
+  length?: number;
+};
+
+export type MarginalOptions = HashOptions & {
+  model?: string;
+  start?: number;
+  sep?: string;
+  end?: string;
+  space?: string;
+};
+
+export type MarginalResult = {
+  hashes: string[];
+  prefix: number[];
+  marginal: number[];
+  anchored: number;
+  bare: number;
+};
+
+type Pending = { resolve: (value: unknown) => void; reject: (error: Error) => void };
+
+type Response = { id?: number; error?: string };
+
+function privateDir(dir: string): void {
+  mkdirSync(dir, { recursive: true, mode: 0o700 });
+  const info = lstatSync(dir);
+  if (!info.isDirectory() || info.uid !== UID || (info.mode & 0o077) !== 0) {
+    throw new Error(`${dir} must be a directory owned by this user with mode 0700`);
+  }
+}
+
+function open(socketPath: string): Promise<Socket> {
+  return new Promise((resolve, reject) => {
+    const socket = connect(socketPath);
+    socket.once("connect", () => resolve(socket));
+    socket.once("error", reject);
+  });
+}
+
+async function launch(socketPath: string): Promise<Socket> {
+  const child = spawn(process.env.PI_HASH_PYTHON ?? "python3", [SCRIPT, "serve", "--socket", socketPath], {
+    cwd: path.dirname(SCRIPT),
+    detached: true,
+    stdio: "ignore",
+  });
+  child.unref();
+  let exited: number | null = null;
+  child.once("exit", (code) => {
+    exited = code ?? 1;
+  });
+  const deadline = Date.now() + READY_MS;
+  while (Date.now() < deadline) {
+    try {
+      return await open(socketPath);
+    } catch {
+      if (exited !== null && exited !== 0) break;
+      await new Promise((resolve) => setTimeout(resolve, 50));
+    }
+  }
+  throw new Error(`token service did not start on ${socketPath} (needs python3 with tiktoken and numpy)`);
+}
+
+export class TokenService {
+  private nextId = 0;
+  private pending = new Map<number, Pending>();
+  private socket: Socket;
+  private spawned: boolean;
+
+  private constructor(socket: Socket, spawned: boolean) {
+    this.socket = socket;
+    this.spawned = spawned;
+    createInterface({ input: socket }).on("line", (line) => {
+      const response: Response = JSON.parse(line);
+      if (response.id === undefined) return;
+      const waiter = this.pending.get(response.id);
+      if (!waiter) return;
+      this.pending.delete(response.id);
+      if (response.error) waiter.reject(new Error(response.error));
+      else waiter.resolve(response);
+    });
+    const fail = (error?: Error) => {
+      for (const waiter of this.pending.values()) {
+        waiter.reject(error ?? new Error("token service closed the connection"));
+      }
+      this.pending.clear();
+    };
+    socket.on("error", fail);
+    socket.on("close", () => fail());
+  }
+
+  static async connect(socketPath = SOCKET_PATH): Promise<TokenService> {
+    if (socketPath === path.join(RUNTIME_DIR, "service.sock")) privateDir(RUNTIME_DIR);
+    try {
+      return new TokenService(await open(socketPath), false);
+    } catch {
+      return new TokenService(await launch(socketPath), true);
+    }
+  }
+
+  request<T>(op: string, fields: Record<string, unknown> = {}): Promise<T> {
+    const id = ++this.nextId;
+    return new Promise<T>((resolve, reject) => {
+      this.pending.set(id, { resolve: (value) => resolve(value as T), reject });
+      this.socket.write(`${JSON.stringify({ id, op, ...fields })}\n`);
+    });
+  }
+
+  async count(texts: string[], model?: string): Promise<number[]> {
+    const response = await this.request<{ counts: number[] }>("count", { texts, model });
+    return response.counts;
+  }
+
+  async hashes(lines: string[], options: HashOptions = {}): Promise<string[]> {
+    const response = await this.request<{ hashes: string[] }>("hash", { lines, ...options });
+    return response.hashes;
+  }
+
+  marginal(lines: string[], options: MarginalOptions = {}): Promise<MarginalResult> {
+    return this.request<MarginalResult>("marginal", { lines, ...options });
+  }
+
+  close(): void {
+    this.socket.end();
+  }
+
+  async release(): Promise<void> {
+    if (this.spawned) await this.request("release");
+    this.close();
+  }
+}
+
+export async function tokenService(): Promise<TokenService | null> {
+  try {
+    return await TokenService.connect();
+  } catch {
+    return null;
+  }
+}
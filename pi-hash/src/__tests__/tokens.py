@@ -0,0 +1,472 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from multiprocessing.util import Finalize
+
+import tiktoken
+
+from results import record
+
+DEFAULT_MODEL = "gpt-4o"
+FALLBACK_ENCODING = "cl100k_base"
+SHARD = 4096
+CACHE_ENV = "PI_HASH_TOKEN_CACHE"
+DEFAULT_FORMAT = "text"
+MEMORY_ROWS = 1 << 18
+DISK_ROWS = 4_000_000
+EVICT_TO = 0.9
+QUERY = 500
+FLUSH = 50_000
+TICK = 3600
+LINES = re.compile(r"(?<=\n)(?=[^\s/]|[ \t]+\S)")
+LINE_ENCODINGS = ("cl100k_base", "o200k_base")
+EDGES = (
+    "}\n\nfoo",
+    "a\n\n  b",
+    "x  \ny",
+    "a\r\n\r\nb",
+    "\n\n\n",
+    " \n",
+    "// c\n/d\n",
+    "a\n\t\tb\n",
+    "\u00e9t\u00e9\n\u6f22\u5b57\n",
+    "x = 1;   \n\n\n}\n",
+)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    encoding TEXT NOT NULL,
+    format TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    PRIMARY KEY (encoding, format)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+@lru_cache(maxsize=None)
+def encoder(model=DEFAULT_MODEL):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding(FALLBACK_ENCODING)
+
+
+def default_cache_path():
+    return os.path.join(os.path.expanduser("~"), ".cache", "pi-hash", "tokens.sqlite")
+
+
+def segments(text, encoding=FALLBACK_ENCODING):
+    return LINES.split(text) if encoding in LINE_ENCODINGS else [text]
+
+
+def split_mismatches(texts, encodings=None):
+    found = []
+    for name in encodings or tiktoken.list_encoding_names():
+        enc = tiktoken.get_encoding(name)
+        for text in texts:
+            whole = len(enc.encode_ordinary(text))
+            split = sum(len(enc.encode_ordinary(part)) for part in segments(text, name))
+            if whole != split:
+                found.append((name, text, whole, split))
+    return found
+
+
+def digest(encoding, fmt, text):
+    key = hashlib.blake2b(f"{encoding}\0{fmt}\0".encode("utf-8"), digest_size=8)
+    key.update(text.encode("utf-8", errors="surrogatepass"))
+    return int.from_bytes(key.digest(), "little", signed=True)
+
+
+def tick():
+    return int(time.time() // TICK)
+
+
+class TokenCache:
+    def __init__(self, path=None, memory_rows=MEMORY_ROWS, disk_rows=DISK_ROWS):
+        self.path = path
+        self.memory_rows = memory_rows
+        self.disk_rows = disk_rows
+        self.memory = {}
+        self.stats = {}
+        self.pending = {}
+        self.touched = set()
+        self.deltas = {}
+        self.db = None
+        self.pid = None
+
+    def connect(self):
+        if self.path is None:
+            return None
+        if self.db is None or self.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(SCHEMA)
+            self.db, self.pid = db, os.getpid()
+            self.pending, self.touched, self.deltas = {}, set(), {}
+            Finalize(self, self.flush, exitpriority=10)
+        return self.db
+
+    def _load(self, db, keys):
+        rows = []
+        for start in range(0, len(keys), QUERY):
+            batch = keys[start : start + QUERY]
+            marks = ",".join("?" * len(batch))
+            rows.extend(db.execute(f"SELECT id, count, used FROM tokens WHERE id IN ({marks})", batch))
+        return rows
+
+    def flush(self):
+        db = self.db
+        if db is None or self.pid != os.getpid() or not (self.pending or self.touched or self.deltas):
+            return
+        now = tick()
+        with db:
+            before = db.total_changes
+            fresh = [(key, value, now) for key, value in self.pending.items()]
+            db.executemany("INSERT OR IGNORE INTO tokens VALUES (?, ?, ?)", fresh)
+            inserted = db.total_changes - before
+            db.executemany("UPDATE tokens SET used = ? WHERE id = ?", [(now, key) for key in self.touched])
+            db.executemany(
+                "INSERT INTO stats VALUES (?, ?, ?, ?) ON CONFLICT(encoding, format) "
+                "DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                [(*key, hits, misses) for key, (hits, misses) in self.deltas.items()],
+            )
+            db.execute(
+                "INSERT INTO meta VALUES ('rows', ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                (inserted,),
+            )
+            rows = db.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()[0]
+            if rows > self.disk_rows:
+                before = db.total_changes
+                db.execute(
+                    "DELETE FROM tokens WHERE id IN (SELECT id FROM tokens ORDER BY used LIMIT ?)",
+                    (rows - int(self.disk_rows * EVICT_TO),),
+                )
+                db.execute("UPDATE meta SET value = value - ? WHERE key = 'rows'", (db.total_changes - before,))
+        self.pending, self.touched, self.deltas = {}, set(), {}
+
+    def _remember(self, memory, text, value):
+        memory[text] = value
+        if len(memory) > self.memory_rows:
+            del memory[next(iter(memory))]
+
+    def counts(self, encoding, fmt, texts, count):
+        memory = self.memory.setdefault((encoding, fmt), OrderedDict())
+        result = [memory.get(text) for text in texts]
+        missing = {}
+        for index, value in enumerate(result):
+            if value is None:
+                missing.setdefault(texts[index], []).append(index)
+            else:
+                memory.move_to_end(texts[index])
+        db = self.connect()
+        keys = {digest(encoding, fmt, text): text for text in missing} if db else {}
+        rows = self._load(db, list(keys)) if keys else []
+        now = tick()
+        stale = [key for key, _, used in rows if used < now]
+        found = {keys[key]: value for key, value, _ in rows}
+        found.update((keys[key], self.pending[key]) for key in keys if key in self.pending)
+        fresh = [text for text in missing if text not in found]
+        computed = dict(zip(fresh, count(fresh))) if fresh else {}
+        for text, value in (*found.items(), *computed.items()):
+            self._remember(memory, text, value)
+            for index in missing[text]:
+                result[index] = value
+        hits, misses = len(texts) - len(fresh), len(fresh)
+        for tallies in (self.stats, self.deltas if db else {}):
+            tally = tallies.setdefault((encoding, fmt), [0, 0])
+            tally[0] += hits
+            tally[1] += misses
+        if db:
+            inverse = {text: key for key, text in keys.items()}
+            self.pending.update((inverse[text], computed[text]) for text in fresh)
+            self.touched.update(stale)
+            if len(self.pending) + len(self.touched) >= FLUSH:
+                self.flush()
+        return result
+
+    def totals(self):
+        db = self.connect()
+        if db is None:
+            return {key: tuple(value) for key, value in self.stats.items()}
+        self.flush()
+        return {(e, f): (h, m) for e, f, h, m in db.execute("SELECT encoding, format, hits, misses FROM stats")}
+
+    def rows(self):
+        db = self.connect()
+        if db is None:
+            return sum(len(memory) for memory in self.memory.values())
+        self.flush()
+        row = db.execute("SELECT value FROM meta WHERE key = 'rows'").fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        if self.db is not None and self.pid == os.getpid():
+            self.flush()
+            self.db.close()
+        self.db = None
+
+
+@lru_cache(maxsize=None)
+def token_cache():
+    setting = os.environ.get(CACHE_ENV, "")
+    if setting == "off":
+        return False
+    return TokenCache(None if setting == "memory" else setting or default_cache_path())
+
+
+def _cached(enc, fmt, texts, threads=None, cache=None):
+    cache = token_cache() if cache is None else cache
+    if cache is False:
+        return _sharded(enc, texts, threads)
+    owners = []
+    pieces = []
+    for index, text in enumerate(texts):
+        parts = segments(text, enc.name)
+        owners.extend([index] * len(parts))
+        pieces.extend(parts)
+    totals = [0] * len(texts)
+    for index, value in zip(owners, cache.counts(enc.name, fmt, pieces, partial(_sharded, enc, threads=threads))):
+        totals[index] += value
+    return totals
+
+
+def count_tokens(text, model=DEFAULT_MODEL, fmt=DEFAULT_FORMAT):
+    return _cached(encoder(model), fmt, [text], threads=1)[0]
+
+
+def get_tokens(text, model=DEFAULT_MODEL):
+    enc = encoder(model)
+    return [enc.decode([t]) for t in enc.encode_ordinary(text)]
+
+
+def _shard(enc, texts):
+    return [len(enc.encode_ordinary(text)) for text in texts]
+
+
+def _sharded(enc, texts, threads=None):
+    threads = min(threads or os.cpu_count() or 1, max(1, len(texts) // SHARD))
+    if threads == 1:
+        return _shard(enc, texts)
+    size = -(-len(texts) // threads)
+    shards = [texts[start : start + size] for start in range(0, len(texts), size)]
+    with ThreadPoolExecutor(threads) as pool:
+        return [count for counts in pool.map(partial(_shard, enc), shards) for count in counts]
+
+
+def count_batch(texts, model=DEFAULT_MODEL, threads=None, fmt=DEFAULT_FORMAT):
+    return _cached(encoder(model), fmt, texts if isinstance(texts, list) else list(texts), threads)
+
+
+def cache_totals():
+    cache = token_cache()
+    if cache is False or cache.path and not os.path.exists(cache.path):
+        return {}
+    return cache.totals()
+
+
+def _rates(totals, before=None):
+    before = before or {}
+    rates = {}
+    for key, (hits, misses) in totals.items():
+        was = before.get(key, (0, 0))
+        rates[key] = (hits - was[0], misses - was[1])
+    return {key: value for key, value in rates.items() if sum(value)}
+
+
+def _rate(hits, misses):
+    return f"{hits + misses:,} lookups, {hits / (hits + misses) * 100:.1f}% hits"
+
+
+def cache_summary(before=None):
+    cache = token_cache()
+    if cache is False or cache.path and not os.path.exists(cache.path):
+        return []
+    rates = _rates(cache.totals(), before)
+    if not rates:
+        return []
+    lines = [f"Token cache ({cache.path or 'memory'}, {cache.rows():,} rows):"]
+    for encoding in sorted({key[0] for key in rates}):
+        picked = [value for key, value in rates.items() if key[0] == encoding]
+        hits, misses = sum(value[0] for value in picked), sum(value[1] for value in picked)
+        lines.append(f"  {encoding}: {_rate(hits, misses)} over {len(picked)} format(s)")
+    return lines
+
+
+def _legacy(text, model):
+    try:
+        enc = tiktoken.encoding_for_model(model)
+    except KeyError:
+        enc = tiktoken.get_encoding(FALLBACK_ENCODING)
+    return len(enc.encode(text))
+
+
+def _per_text(texts, model, threads):
+    encoded = encoder(model).encode_ordinary_batch(texts, num_threads=threads or os.cpu_count() or 1)
+    return [len(tokens) for tokens in encoded]
+
+
+def benchmark(lines, model=DEFAULT_MODEL, threads=None):
+    enc = encoder(model)
+    files = _files(lines, 200)
+    results = []
+    for name, shape, run in [
+        ("Per-call lookup (before)", "lines", lambda: [_legacy(line, model) for line in lines]),
+        ("Cached encoder", "lines", lambda: [len(enc.encode_ordinary(line)) for line in lines]),
+        ("encode_ordinary_batch", "lines", lambda: _per_text(lines, model, threads)),
+        ("Sharded batch (after)", "lines", lambda: _sharded(enc, lines, threads)),
+        ("Batch API, 200-line files", "files", lambda: _per_text(files, model, threads)),
+        ("Sharded, 200-line files", "files", lambda: _sharded(enc, files, threads)),
+    ]:
+        start = time.perf_counter()
+        counts = run()
+        elapsed = time.perf_counter() - start
+        results.append(
+            {"name": name, "shape": shape, "seconds": elapsed, "rate": len(lines) / elapsed, "tokens": sum(counts)}
+        )
+    return results
+
+
+def _files(lines, size):
+    return ["\n".join(lines[start : start + size]) + "\n" for start in range(0, len(lines), size)]
+
+
+def _tally(cache):
+    if not cache:
+        return 0, 0
+    return sum(value[0] for value in cache.stats.values()), sum(value[1] for value in cache.stats.values())
+
+
+def cache_benchmark(lines, model=DEFAULT_MODEL, threads=None, changed=0.01, file_lines=200, seed=0):
+    enc = encoder(model)
+    rng = random.Random(seed)
+    edited = list(lines)
+    for index in rng.sample(range(len(lines)), int(len(lines) * changed)):
+        edited[index] += f" // edited {index}"
+    corpora = {"before": _files(lines, file_lines), "after": _files(edited, file_lines)}
+    expected = {name: sum(_sharded(enc, texts, threads)) for name, texts in corpora.items()}
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "tokens.sqlite")
+        caches = [TokenCache(path), TokenCache(path), TokenCache(path)]
+        stages = [
+            ("No cache (whole files)", False, "before"),
+            ("Cold", caches[0], "before"),
+            ("Warm, memory", caches[0], "before"),
+            ("Warm, disk only", caches[1], "before"),
+            (f"Incremental, {changed:.0%} edited", caches[2], "after"),
+        ]
+        for name, cache, corpus in stages:
+            seen = _tally(cache)
+            start = time.perf_counter()
+            counts = _cached(enc, DEFAULT_FORMAT, corpora[corpus], threads, cache)
+            if cache:
+                cache.flush()
+            elapsed = time.perf_counter() - start
+            hits, misses = (now - was for now, was in zip(_tally(cache), seen))
+            results.append(
+                {
+                    "name": name,
+                    "seconds": elapsed,
+                    "rate": len(lines) / elapsed,
+                    "hits": hits / (hits + misses) if hits + misses else None,
+                    "exact": sum(counts) == expected[corpus],
+                }
+            )
+        rows = caches[0].rows()
+        for cache in caches:
+            cache.close()
+        size = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+    return results, rows, size
+
+
+def main(argv=None):
+    from corpus import synthetic
+
+    parser = argparse.ArgumentParser(
+        description="Compare per-call encoding_for_model lookups against the cached and batched tokenizer layer, "
+        f"then measure the persistent token-count cache (${CACHE_ENV}: a SQLite path, 'memory' or 'off').",
+    )
+    parser.add_argument("--lines", type=int, default=200_000, help="Generated corpus size in lines.")
+    parser.add_argument("--model", action="append", help="Tokenizer model. MAY be repeated. Default gpt-4o.")
+    parser.add_argument("--threads", type=int, default=None, help="Batch threads. Default: CPU count.")
+    parser.add_argument("--changed", type=float, default=0.01, help="Share of lines edited before the incremental run.")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed.")
+    parser.add_argument("--stats", action="store_true", help="Print cumulative hit rates per format and exit.")
+    parser.add_argument("--check", action="store_true", help="Only check cache segment sums against whole texts.")
+    args = parser.parse_args(argv)
+    if args.stats:
+        cache = token_cache()
+        rates = _rates(cache_totals())
+        print(f"Token cache: {'off' if cache is False else cache.path or 'memory'}")
+        for (encoding, fmt), (hits, misses) in sorted(rates.items()):
+            print(f"  {encoding} / {fmt}: {_rate(hits, misses)}")
+        return 0
+    lines = synthetic(args.lines, args.seed)
+    texts = list(EDGES) + ["".join(EDGES)] + _files(lines[:20_000], 200)
+    failed = split_mismatches(texts)
+    print(f"Segment sums vs whole texts: {len(texts):,} texts x {len(tiktoken.list_encoding_names())} encodings, "
+          f"{len(failed)} mismatches.")
+    record("split mismatches", len(failed), "errors", "texts")
+    for name, text, whole, split in failed[:10]:
+        print(f"  {name}: {text[:40]!r} is {whole} tokens whole, {split} split")
+    if failed or args.check:
+        return 1 if failed else 0
+    for model in args.model or [DEFAULT_MODEL]:
+        results = benchmark(lines, model, args.threads)
+        base = results[0]["rate"]
+        print(f"\n--- Tokenizer Throughput for {model} ({len(lines)} Lines) ---")
+        print(f"{'Strategy':<25} | {'Lines/sec':<12} | {'Seconds':<8} | {'Speedup'}")
+        print("-" * 62)
+        for result in results:
+            record("throughput", result["rate"], "throughput", "lines/s", strategy=result["name"], tokenizer=model)
+            print(
+                f"{result['name']:<25} | {result['rate']:<12,.0f} | {result['seconds']:<8.2f} | {result['rate'] / base:.1f}x"
+            )
+        print("-" * 62)
+        if len({(result["shape"], result["tokens"]) for result in results}) != 2:
+            print("WARNING: strategies disagree on total token count.")
+        print(f"Cache misses take the sharded path. encode_ordinary_batch submits one future per text, the shards "
+              f"one per {SHARD:,} texts.")
+        results, rows, size = cache_benchmark(lines, model, args.threads, args.changed, seed=args.seed)
+        base = results[0]["rate"]
+        print(f"\n--- Token-Count Cache for {model} ({len(lines)} Lines in 200-Line Files) ---")
+        print(f"{'Run':<25} | {'Lines/sec':<12} | {'Seconds':<8} | {'Hit rate':<8} | {'Speedup':<7} | {'Exact'}")
+        print("-" * 80)
+        for result in results:
+            hits = "-" if result["hits"] is None else f"{result['hits'] * 100:.1f}%"
+            cell = {"cache": result["name"], "tokenizer": model}
+            record("cache throughput", result["rate"], "throughput", "lines/s", **cell)
+            record("cache hit rate", result["hits"] and result["hits"] * 100, "quality", "%", **cell)
+            record("inexact counts", 0 if result["exact"] else 1, "errors", "runs", **cell)
+            print(
+                f"{result['name']:<25} | {result['rate']:<12,.0f} | {result['seconds']:<8.2f} | {hits:<8} | "
+                f"{result['rate'] / base:<7.1f} | {'yes' if result['exact'] else 'NO'}"
+            )
+        print("-" * 80)
+        print(f"Cache file: {rows:,} rows, {size / 1e6:.1f} MB. cl100k/o200k texts are split only after a newline")
+        print("that ends a pre-token. Other encodings cache whole texts. The segment check above verifies the sums.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from store import DIM, FETCH, get_db, read_matrix, read_only, synthetic
+from vectors import kmeans, normalize
+
+EMBEDDINGS = "embeddings.f32"
+META = "meta.jsonl"
+MANIFEST = "manifest.json"
+BATCH = 10_000
+THRESHOLD = 0.97
+KEEP = ("oldest", "newest")
+
+
+def export_store(path, out, batch=BATCH):
+    db = read_only(path)
+    os.makedirs(out, exist_ok=True)
+    cursor = db.execute("SELECT id, content, timestamp, embedding FROM memories ORDER BY id")
+    rows = 0
+    dim = None
+    with open(os.path.join(out, EMBEDDINGS), "wb") as vectors, open(
+        os.path.join(out, META), "w", encoding="utf-8"
+    ) as meta:
+        while True:
+            chunk = cursor.fetchmany(batch)
+            if not chunk:
+                break
+            for memory_id, content, timestamp, blob in chunk:
+                if dim is None:
+                    dim = len(blob) // 4
+                elif len(blob) != dim * 4:
+                    raise ValueError(f"{path}: row {memory_id} has a {len(blob) // 4}-dim embedding, expected {dim}.")
+                vectors.write(blob)
+                meta.write(json.dumps({"id": memory_id, "timestamp": timestamp, "content": content}) + "\n")
+            rows += len(chunk)
+    db.close()
+    manifest = {"rows": rows, "dim": dim or DIM, "dtype": "<f4", "source": os.path.abspath(path)}
+    with open(os.path.join(out, MANIFEST), "w") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def write_export(out, ids, matrix, timestamps, contents):
+    os.makedirs(out, exist_ok=True)
+    np.ascontiguousarray(matrix, dtype="<f4").tofile(os.path.join(out, EMBEDDINGS))
+    with open(os.path.join(out, META), "w", encoding="utf-8") as meta:
+        for memory_id, timestamp, content in zip(ids, timestamps, contents):
+            meta.write(json.dumps({"id": int(memory_id), "timestamp": timestamp, "content": content}) + "\n")
+    with open(os.path.join(out, MANIFEST), "w") as handle:
+        json.dump({"rows": len(matrix), "dim": matrix.shape[1], "dtype": "<f4", "source": None}, handle, indent=2)
+
+
+def open_export(out):
+    with open(os.path.join(out, MANIFEST)) as handle:
+        manifest = json.load(handle)
+    if not manifest["rows"]:
+        return manifest, np.zeros((0, manifest["dim"]), dtype="<f4")
+    shape = (manifest["rows"], manifest["dim"])
+    vectors = np.memmap(os.path.join(out, EMBEDDINGS), dtype=manifest["dtype"], mode="r", shape=shape)
+    return manifest, vectors
+
+
+def import_store(out, path, renumber=False, batch=BATCH):
+    manifest, vectors = open_export(out)
+    width = manifest["dim"] * 4
+    db = get_db(path)
+    sql = (
+        "INSERT INTO memories (content, timestamp, embedding) VALUES (?, ?, ?)"
+        if renumber
+        else "INSERT OR REPLACE INTO memories (id, content, timestamp, embedding) VALUES (?, ?, ?, ?)"
+    )
+    with open(os.path.join(out, META), encoding="utf-8") as meta, db:
+        for start in range(0, manifest["rows"], batch):
+            view = memoryview(np.ascontiguousarray(vectors[start : start + batch])).cast("B")
+            rows = []
+            for offset in range(len(view) // width):
+                record = json.loads(next(meta))
+                blob = view[offset * width : (offset + 1) * width]
+                row = (record["content"], record["timestamp"], blob)
+                rows.append(row if renumber else (record["id"], *row))
+            db.executemany(sql, rows)
+    db.close()
+    return manifest["rows"]
+
+
+def groups(normed, lists, probes, seed=0):
+    if lists <= 1:
+        return [np.arange(len(normed))]
+    centroids = kmeans(normed, lists, np.random.default_rng(seed))
+    probes = min(probes, lists)
+    members = [[] for _ in range(lists)]
+    block = max(256, (1 << 22) // lists)
+    for start in range(0, len(normed), block):
+        scores = normed[start : start + block] @ centroids.T
+        top = np.argpartition(-scores, probes - 1, axis=1)[:, :probes]
+        rows = np.repeat(np.arange(start, start + len(top)), probes)
+        for centroid, row in zip(top.ravel(), rows):
+            members[centroid].append(row)
+    return [np.asarray(rows, dtype=np.int64) for rows in members if len(rows) > 1]
+
+
+def duplicate_pairs(matrix, threshold=THRESHOLD, lists=1, probes=2, block=2048, seed=0):
+    normed = normalize(matrix)
+    found = []
+    for rows in groups(normed, lists, probes, seed):
+        vectors = normed[rows]
+        for start in range(0, len(rows), block):
+            for column in range(start, len(rows), block):
+                hits = vectors[start : start + block] @ vectors[column : column + block].T >= threshold
+                a, b = np.nonzero(np.triu(hits, k=1) if column == start else hits)
+                if len(a):
+                    found.append(np.stack([rows[start + a], rows[column + b]], axis=1))
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(found)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def select_drops(pairs, count, keep="oldest"):
+    rank = np.arange(count) if keep == "oldest" else np.arange(count)[::-1]
+    if keep == "newest":
+        pairs = pairs[:, ::-1]
+    order = np.argsort(rank[pairs[:, 0]], kind="stable")
+    dropped = np.zeros(count, dtype=bool)
+    for winner, loser in pairs[order]:
+        if not dropped[winner]:
+            dropped[loser] = True
+    return np.flatnonzero(dropped)
+
+
+def delete_rows(path, ids, batch=BATCH):
+    db = get_db(path)
+    with db:
+        for start in range(0, len(ids), batch):
+            db.executemany("DELETE FROM memories WHERE id = ?", ((int(i),) for i in ids[start : start + batch]))
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.execute("VACUUM")
+    db.close()
+
+
+def compact(path, threshold=THRESHOLD, lists=1, probes=2, keep="oldest", dry_run=False):
+    ids, matrix, _, _ = read_matrix(path)
+    pairs = duplicate_pairs(matrix, threshold, lists, probes)
+    drops = ids[select_drops(pairs, len(ids), keep)]
+    if not dry_run and len(drops):
+        delete_rows(path, drops)
+    return {"rows": len(ids), "pairs": len(pairs), "dropped": drops}
+
+
+def _size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def planted(rows, fraction, seed=0, noise=0.02):
+    rng = np.random.default_rng(seed)
+    copies = int(rows * fraction)
+    matrix = synthetic(rows - copies, DIM, seed)
+    sources = rng.integers(0, len(matrix), copies)
+    twins = matrix[sources] + rng.standard_normal((copies, DIM), dtype=np.float32) * (noise / DIM**0.5)
+    return np.concatenate([matrix, twins]), set(range(len(matrix), rows))
+
+
+def _row_by_row(path, vectors, count):
+    db = get_db(path)
+    db.isolation_level = None
+    for i in range(count):
+        db.execute(
+            "INSERT INTO memories (content, timestamp, embedding) VALUES (?, ?, ?)",
+            (f"memory {i}", "2026-01-01T00:00:00.000Z", vectors[i].tobytes()),
+        )
+    db.close()
+
+
+def benchmark(rows, fraction, threshold, lists, probes, root, baseline):
+    matrix, truth = planted(rows, fraction)
+    ids = np.arange(1, rows + 1)
+    stamps = [f"2026-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000Z" for i in range(rows)]
+    write_export(os.path.join(root, "seed"), ids, matrix, stamps, [f"memory {i}" for i in range(rows)])
+    store = os.path.join(root, "memories.sqlite")
+    stages = []
+    if baseline:
+        _, seconds = _timed(lambda: _row_by_row(os.path.join(root, "baseline.sqlite"), matrix, baseline))
+        stages.append(("Row-by-row insert", baseline, seconds, "one transaction per row, as remember does"))
+    _, seconds = _timed(lambda: import_store(os.path.join(root, "seed"), store))
+    stages.append(("Bulk import", rows, seconds, f"{BATCH}-row executemany, one transaction"))
+    _, seconds = _timed(lambda: export_store(store, os.path.join(root, "export")))
+    stages.append(("Export", rows, seconds, f"{EMBEDDINGS} + {META}"))
+    (_, loaded, _, _), seconds = _timed(lambda: read_matrix(store))
+    stages.append(("Load matrix", rows, seconds, f"fetchmany({FETCH}) into a preallocated matrix"))
+    accuracy = []
+    for label, count in [("exact", 1), (f"IVF {lists} lists x {probes}", lists)]:
+        pairs, seconds = _timed(lambda: duplicate_pairs(loaded, threshold, count, probes))
+        drops = set(select_drops(pairs, rows).tolist())
+        stages.append((f"Dedup, {label}", rows, seconds, f"{len(pairs)} pairs >= {threshold}"))
+        right = len(drops & truth)
+        accuracy.append((label, right / (len(drops) or 1), right / (len(truth) or 1), len(drops)))
+    before = _size(store)
+    result, seconds = _timed(lambda: compact(store, threshold, lists, probes))
+    stages.append(("Compact + VACUUM", rows, seconds, f"{before / 1e6:.1f} MB -> {_size(store) / 1e6:.1f} MB"))
+    return stages, accuracy, len(truth), result
+
+
+def report(rows, stages, accuracy, planted_count):
+    print(f"\n--- memories.sqlite Pipeline ({rows:,} Rows x {DIM}, {planted_count:,} Planted Duplicates) ---")
+    print(f"{'Stage':<28} | {'Rows':<9} | {'Seconds':<8} | {'Rows/sec':<11} | {'Notes'}")
+    print("-" * 100)
+    for name, count, seconds, note in stages:
+        print(f"{name:<28} | {count:<9,} | {seconds:<8.2f} | {count / seconds:<11,.0f} | {note}")
+    print("-" * 100)
+    print(f"\n{'Dedup':<28} | {'Precision':<9} | {'Recall':<8} | {'Dropped'}")
+    print("-" * 62)
+    for label, precision, recall, dropped in accuracy:
+        cells = f"{precision * 100:.1f}%", f"{recall * 100:.1f}%"
+        print(f"{label:<28} | {cells[0]:<9} | {cells[1]:<8} | {dropped:,}")
+    print("-" * 62)
+    print("Precision and recall are measured against the planted near-copies; the older original is kept.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export, import, deduplicate and compact pi-remember memories.sqlite stores. "
+        "Exports hold a contiguous float32 embeddings file plus a JSON-lines metadata table.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Stream a store into an export directory.")
+    export.add_argument("store")
+    export.add_argument("out")
+    imported = commands.add_parser("import", help="Bulk-load an export directory into a store.")
+    imported.add_argument("out")
+    imported.add_argument("store")
+    imported.add_argument("--renumber", action="store_true", help="Assign fresh ids instead of keeping exported ones.")
+    dedup = commands.add_parser("compact", help="Drop near-duplicate embeddings, then checkpoint and VACUUM.")
+    dedup.add_argument("store")
+    bench = commands.add_parser("bench", help="Time every stage on a synthetic store with planted duplicates.")
+    bench.add_argument("--rows", type=int, default=100_000, help="Synthetic store size.")
+    bench.add_argument("--duplicates", type=float, default=0.05, help="Fraction of rows planted as near-copies.")
+    bench.add_argument("--baseline", type=int, default=2_000, help="Rows inserted one commit at a time. 0 disables.")
+    bench.add_argument("--dir", help="Keep the generated stores and exports here.")
+    for command in (dedup, bench):
+        command.add_argument("--threshold", type=float, default=THRESHOLD, help="Cosine similarity of a duplicate.")
+        command.add_argument(
+            "--lists", type=int, default=None, help="IVF lists. Default: 1 (exact) for compact, sqrt(rows) for bench."
+        )
+        command.add_argument("--probes", type=int, default=2, help="Lists each row joins, covering list borders.")
+    dedup.add_argument("--keep", choices=KEEP, default="oldest", help="Which row of a duplicate group survives.")
+    dedup.add_argument("--dry-run", action="store_true", help="Report duplicates without deleting them.")
+    args = parser.parse_args(argv)
+    if args.command in ("export", "compact") and not os.path.exists(args.store):
+        parser.error(f"store does not exist: {args.store}")
+    if args.command == "export":
+        manifest, seconds = _timed(lambda: export_store(args.store, args.out))
+        print(f"Exported {manifest['rows']:,} rows x {manifest['dim']} in {seconds:.2f} s.")
+    elif args.command == "import":
+        count, seconds = _timed(lambda: import_store(args.out, args.store, args.renumber))
+        print(f"Imported {count:,} rows in {seconds:.2f} s.")
+    elif args.command == "compact":
+        before = _size(args.store)
+        result, seconds = _timed(
+            lambda: compact(args.store, args.threshold, args.lists or 1, args.probes, args.keep, args.dry_run)
+        )
+        verb = "Would drop" if args.dry_run else "Dropped"
+        dropped = len(result["dropped"])
+        print(f"{verb} {dropped:,} of {result['rows']:,} rows ({result['pairs']:,} pairs) in {seconds:.2f} s.")
+        print(f"Store size: {before / 1e6:.1f} MB -> {_size(args.store) / 1e6:.1f} MB.")
+    else:
+        lists = args.lists or max(1, int(args.rows**0.5))
+        root = args.dir or tempfile.mkdtemp(prefix="pi-remember-")
+        try:
+            stages, accuracy, count, _ = benchmark(
+                args.rows, args.duplicates, args.threshold, lists, args.probes, root, args.baseline
+            )
+        finally:
+            if not args.dir:
+                shutil.rmtree(root, ignore_errors=True)
+        report(args.rows, stages, accuracy, count)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+
+import numpy as np
+
+DIM = 384
+FETCH = 4096
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    embedding BLOB NOT NULL
+)
+"""
+
+
+def global_db_path():
+    return os.path.join(os.path.expanduser("~"), ".pi", "agent", "memory", "memories.sqlite")
+
+
+def project_db_path(cwd):
+    return os.path.join(cwd, ".agents", "memory", "memories.sqlite")
+
+
+def get_db(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute(SCHEMA)
+    return db
+
+
+def encode_embedding(vector):
+    return np.asarray(vector, dtype="<f4").tobytes()
+
+
+def decode_embedding(blob):
+    return np.frombuffer(blob, dtype="<f4")
+
+
+def read_only(path, **options):
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, **options)
+
+
+def read_matrix(path, with_content=False, batch=FETCH):
+    db = read_only(path, isolation_level=None)
+    try:
+        db.execute("BEGIN")
+        count = db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+        first = db.execute("SELECT length(embedding) FROM memories ORDER BY id LIMIT 1").fetchone()
+        dim = first[0] // 4 if first else DIM
+        ids = np.empty(count, dtype=np.int64)
+        matrix = np.empty((count, dim), dtype=np.float32)
+        contents, timestamps = [], []
+        columns = "id, embedding, content, timestamp" if with_content else "id, embedding"
+        cursor = db.execute(f"SELECT {columns} FROM memories ORDER BY id")
+        index = 0
+        while rows := cursor.fetchmany(batch):
+            for row in rows:
+                if len(row[1]) != dim * 4:
+                    raise ValueError(f"{path}: embeddings do not share one dimension.")
+                ids[index] = row[0]
+                matrix[index] = np.frombuffer(row[1], dtype="<f4")
+                index += 1
+            if with_content:
+                contents.extend(row[2] for row in rows)
+                timestamps.extend(row[3] for row in rows)
+    finally:
+        db.close()
+    return ids, matrix, contents, timestamps
+
+
+def synthetic(count, dim=DIM, seed=0, clusters=None, spread=0.35, block=8192):
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(8, int(count**0.5) // 4)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    out = np.empty((count, dim), dtype=np.float32)
+    noise = np.empty((min(block, count), dim), dtype=np.float32)
+    for start in range(0, count, block):
+        size = min(block, count - start)
+        np.take(centers, rng.integers(0, clusters, size), axis=0, out=out[start : start + size])
+        rng.standard_normal(out=noise[:size], dtype=np.float32)
+        noise[:size] *= spread / dim**0.5
+        out[start : start + size] += noise[:size]
+    return out
+
+
+def write_synthetic(path, count, dim=DIM, seed=0):
+    matrix = synthetic(count, dim, seed)
+    db = get_db(path)
+    with db:
+        db.executemany(
+            "INSERT INTO memories (content, timestamp, embedding) VALUES (?, ?, ?)",
+            (
+                (f"synthetic memory {i}", f"2026-01-01T00:00:{i % 60:02d}.000Z", matrix[i].tobytes())
+                for i in range(count)
+            ),
+        )
+    db.close()
+    return matrix
@@ -0,0 +1,206 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from store import DIM, read_matrix, synthetic
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+PROBES = (1, 2, 4, 8, 16, 32)
+BLOCK = 65_536
+
+
+def normalize(matrix, out=None, block=BLOCK):
+    out = np.empty(matrix.shape, dtype=np.float32) if out is None else out
+    for start in range(0, len(matrix), block):
+        rows = matrix[start : start + block]
+        norms = np.sqrt(np.einsum("ij,ij->i", rows, rows, dtype=np.float32))[:, None]
+        np.maximum(norms, np.finfo(np.float32).tiny, out=norms)
+        np.divide(rows, norms, out=out[start : start + block], dtype=np.float32)
+    return out
+
+
+def cosine_loop(matrix, query):
+    scores = []
+    for row in matrix:
+        dot = float(row @ query)
+        norm = float(np.sqrt(row @ row) * np.sqrt(query @ query))
+        scores.append(0.0 if norm == 0 else dot / norm)
+    return sorted(range(len(scores)), key=lambda i: -scores[i])
+
+
+def _select(scores, k):
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, part, axis=1).argsort(axis=1)[:, ::-1]
+    picked = np.take_along_axis(part, order, axis=1)
+    return picked, np.take_along_axis(scores, picked, axis=1)
+
+
+def top_k(normed, queries, k=10, cells=1 << 20):
+    queries = normalize(np.atleast_2d(queries))
+    block = max(1024, cells // len(queries))
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    best = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(normed), block):
+        scores = queries @ normed[start : start + block].T
+        ids, values = _select(scores, k)
+        best_ids = np.concatenate([best_ids, ids + start], axis=1)
+        best = np.concatenate([best, values], axis=1)
+        if best.shape[1] > k:
+            keep, best = _select(best, k)
+            best_ids = np.take_along_axis(best_ids, keep, axis=1)
+    return best_ids, best
+
+
+def nearest(matrix, centroids, cells=1 << 22):
+    block = max(256, cells // len(centroids))
+    assign = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), block):
+        assign[start : start + block] = np.argmax(matrix[start : start + block] @ centroids.T, axis=1)
+    return assign
+
+
+def centroid_sums(matrix, assign, lists, block=8192):
+    sums = np.zeros((lists, matrix.shape[1]), dtype=np.float32)
+    for start in range(0, len(matrix), block):
+        labels = assign[start : start + block]
+        order = np.argsort(labels, kind="stable")
+        ids, first = np.unique(labels[order], return_index=True)
+        sums[ids] += np.add.reduceat(matrix[start : start + block][order], first, axis=0)
+    return sums
+
+
+def kmeans(matrix, lists, rng, iterations=10, sample=65_536):
+    train = matrix[np.sort(rng.choice(len(matrix), min(len(matrix), max(sample, lists * 39)), replace=False))]
+    centroids = train[rng.choice(len(train), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest(train, centroids)
+        sums = centroid_sums(train, assign, lists)
+        empty = np.flatnonzero(np.bincount(assign, minlength=lists) == 0)
+        sums[empty] = train[rng.choice(len(train), len(empty), replace=False)]
+        centroids = normalize(sums, sums)
+    return centroids
+
+
+class IVFIndex:
+    def __init__(self, normed, lists=None, seed=0, iterations=10):
+        rng = np.random.default_rng(seed)
+        self.lists = lists or max(1, int(len(normed) ** 0.5))
+        self.centroids = kmeans(normed, self.lists, rng, iterations)
+        assign = nearest(normed, self.centroids)
+        self.order = np.argsort(assign, kind="stable")
+        self.vectors = normed[self.order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=self.lists))])
+
+    def search(self, queries, k=10, nprobe=8):
+        queries = normalize(np.atleast_2d(queries))
+        nprobe = min(nprobe, self.lists)
+        probed = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for row, (query, lists) in enumerate(zip(queries, probed)):
+            spans = [(self.offsets[c], self.offsets[c + 1]) for c in lists]
+            rows = np.concatenate([np.arange(start, end) for start, end in spans])
+            if not len(rows):
+                continue
+            found = np.concatenate([self.vectors[start:end] @ query for start, end in spans])
+            picked, values = _select(found[None, :], k)
+            ids[row, : picked.shape[1]] = self.order[rows[picked[0]]]
+            scores[row, : picked.shape[1]] = values[0]
+        return ids, scores
+
+
+def recall(found, truth):
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def queries_near(matrix, count, rng, noise=0.2):
+    picked = matrix[rng.choice(len(matrix), count, replace=False)]
+    return picked + rng.standard_normal(picked.shape, dtype=np.float32) * (noise / picked.shape[1] ** 0.5)
+
+
+def _timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def measure(matrix, count, k, probes, lists, seed, loop):
+    rng = np.random.default_rng(seed + 1)
+    queries = queries_near(matrix, min(count, len(matrix)), rng)
+    rows = []
+    if loop:
+        _, seconds = _timed(lambda: [cosine_loop(matrix, query) for query in queries[:loop]])
+        rows.append({"strategy": "Python row loop", "recall": 1.0, "ms": seconds / loop * 1000})
+    normed, prep = _timed(lambda: normalize(matrix, matrix if matrix.flags.writeable else None))
+    _, seconds = _timed(lambda: [top_k(normed, query, k) for query in queries])
+    rows.append({"strategy": "exact, 1 query", "recall": 1.0, "ms": seconds / len(queries) * 1000})
+    (truth, _), seconds = _timed(lambda: top_k(normed, queries, k))
+    rows.append({"strategy": "exact, batched", "recall": 1.0, "ms": seconds / len(queries) * 1000})
+    index, build = _timed(lambda: IVFIndex(normed, lists, seed))
+    for nprobe in probes:
+        (found, _), seconds = _timed(lambda: index.search(queries, k, nprobe))
+        rows.append(
+            {
+                "strategy": f"IVF {index.lists} lists, nprobe {nprobe}",
+                "recall": recall(found, truth),
+                "ms": seconds / len(queries) * 1000,
+            }
+        )
+    return rows, prep, build
+
+
+def report(shape, rows, prep, build, k, label):
+    base = next(row["ms"] for row in rows if row["strategy"] == "exact, 1 query")
+    print(f"\n--- Recall@{k} vs Latency ({label}: {shape[0]:,} x {shape[1]}) ---")
+    print(f"{'Strategy':<28} | {f'Recall@{k}':<9} | {'ms/query':<9} | {'vs 1 query'}")
+    print("-" * 65)
+    for row in rows:
+        cell = f"{row['recall'] * 100:.1f}%"
+        print(f"{row['strategy']:<28} | {cell:<9} | {row['ms']:<9.3f} | {base / row['ms']:.3g}x")
+    print("-" * 65)
+    print(f"Normalize once: {prep * 1000:.1f} ms. IVF build (k-means + reorder): {build * 1000:.1f} ms.")
+    if rows[0]["strategy"] == "Python row loop":
+        print("Python row loop runs cosineSimilarity's per-row arithmetic in the interpreter. It is not a timing of")
+        print("searchMemories under Node, so its ratio mostly reflects interpreter overhead.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Batched NumPy top-k over memories.sqlite float32 embeddings, with an IVF index prototype. "
+        "Benchmarks recall@k against latency on synthetic 384-dim vectors or on real stores.",
+    )
+    parser.add_argument("stores", nargs="*", help="memories.sqlite files to load instead of synthetic vectors.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES[:3])), help="Comma-separated synthetic row counts.")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size, drawn near stored vectors.")
+    parser.add_argument("-k", type=int, default=10, help="Results per query.")
+    parser.add_argument("--nprobe", default=",".join(map(str, PROBES)), help="Comma-separated IVF lists to probe.")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists. Default: sqrt(rows).")
+    parser.add_argument("--loop", type=int, default=5, help="Queries timed with a Python per-row cosine loop. "
+                        "0 disables.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args(argv)
+    probes = tuple(int(value) for value in args.nprobe.split(","))
+    if args.k < 1 or min(probes) < 1:
+        parser.error("k and nprobe MUST be >= 1")
+    if args.stores:
+        sources = [(path, lambda path=path: read_matrix(path)[1]) for path in args.stores]
+    else:
+        sizes = tuple(int(size) for size in args.sizes.split(","))
+        sources = [("synthetic", lambda size=size: synthetic(size, DIM, args.seed)) for size in sizes]
+    for label, load in sources:
+        matrix, seconds = _timed(load)
+        if len(matrix) <= args.k:
+            print(f"\n{label}: {len(matrix)} rows, nothing to rank.")
+            continue
+        print(f"\nLoaded {label} in {seconds * 1000:.1f} ms.")
+        rows, prep, build = measure(matrix, args.queries, args.k, probes, args.lists, args.seed, args.loop)
+        report(matrix.shape, rows, prep, build, args.k, label)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+import json
+import re
+from datetime import datetime, timezone
+
+import yaml
+
+JS_SPACE = (
+    "\t\n\x0B\x0C\r \u00A0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200A"
+    "\u2028\u2029\u202F\u205F\u3000\uFEFF"
+)
+YAML_FRONT_MATTER = re.compile(r"---\r?\n(.*?)\r?\n---\r?\n?", re.S)
+LEADING_NEWLINES = re.compile(r"\A\r?\n+")
+CLOSED = ("closed", "done", "abandoned")
+
+
+class CoreLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+    yaml_implicit_resolvers = {}
+
+    def construct_mapping(self, node, deep=False):
+        seen = set()
+        for key_node, _ in node.value:
+            key = self.construct_object(key_node, deep=True)
+            if key in seen:
+                raise yaml.constructor.ConstructorError(None, None, "Map keys must be unique", key_node.start_mark)
+            seen.add(key)
+        return super().construct_mapping(node, deep)
+
+    def construct_core_int(self, node):
+        value = self.construct_scalar(node)
+        if value.startswith("0o"):
+            return int(value[2:], 8)
+        if value.startswith("0x"):
+            return int(value[2:], 16)
+        return int(value)
+
+
+CoreLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:bool", re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF")
+)
+CoreLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:int", re.compile(r"^(?:[-+]?[0-9]+|0o[0-7]+|0x[0-9a-fA-F]+)$"), list("-+0123456789")
+)
+CoreLoader.add_implicit_resolver(
+    "tag:yaml.org,2002:float",
+    re.compile(r"^(?:[-+]?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?|[-+]?\.(?:inf|Inf|INF)|\.(?:nan|NaN|NAN))$"),
+    list("-+0123456789."),
+)
+CoreLoader.add_implicit_resolver("tag:yaml.org,2002:null", re.compile(r"^(?:~|null|Null|NULL|)$"), ["~", "n", "N", ""])
+CoreLoader.add_constructor("tag:yaml.org,2002:int", CoreLoader.construct_core_int)
+
+
+def _reject_constant(name):
+    raise ValueError(f"Unexpected token {name} in JSON")
+
+
+def parse_front_matter_object(text):
+    try:
+        parsed = json.loads(text, parse_constant=_reject_constant)
+    except ValueError:
+        parsed = yaml.load(text, Loader=CoreLoader)
+    if not parsed or not isinstance(parsed, (dict, list)):
+        return None
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def parse_checklist(items):
+    checklist = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("title"), str):
+            continue
+        item_id = item["id"] if isinstance(item.get("id"), str) and item["id"] else f"{index + 1}"
+        done = item["done"] if isinstance(item.get("done"), bool) else item.get("status") == "checked"
+        status = "checked" if done else "unchecked"
+        checklist.append({"id": item_id, "title": item["title"], "status": status, "done": done})
+    return checklist
+
+
+def parse_string_list(value):
+    if not isinstance(value, list):
+        return None
+    return [item for item in value if isinstance(item, str)]
+
+
+def parse_links(value):
+    if not isinstance(value, (dict, list)):
+        return None
+    value = value if isinstance(value, dict) else {}
+    return {
+        "root_abs": value["root_abs"] if isinstance(value.get("root_abs"), str) else None,
+        "prds": parse_string_list(value.get("prds")),
+        "specs": parse_string_list(value.get("specs")),
+        "todos": parse_string_list(value.get("todos")),
+        "reads": parse_string_list(value.get("reads")),
+    }
+
+
+def parse_worktree(value):
+    if not isinstance(value, (dict, list)):
+        return None
+    value = value if isinstance(value, dict) else {}
+    return {
+        "enabled": value["enabled"] if isinstance(value.get("enabled"), bool) else None,
+        "branch": value["branch"] if isinstance(value.get("branch"), str) else None,
+    }
+
+
+def parse_front_matter(text, id_fallback):
+    data = {
+        "id": id_fallback,
+        "title": "",
+        "tags": [],
+        "status": "open",
+        "created_at": "",
+        "modified_at": None,
+        "assigned_to_session": None,
+        "assigned_to_session_file": None,
+        "checklist": None,
+        "type": None,
+        "template": None,
+        "links": None,
+        "agent_rules": None,
+        "worktree": None,
+    }
+    trimmed = text.strip(JS_SPACE)
+    if not trimmed:
+        return data
+    try:
+        parsed = parse_front_matter_object(trimmed)
+    except Exception:
+        return data
+    if parsed is None:
+        return data
+    if isinstance(parsed.get("id"), str) and parsed["id"]:
+        data["id"] = parsed["id"]
+    if isinstance(parsed.get("title"), str):
+        data["title"] = parsed["title"]
+    if isinstance(parsed.get("status"), str) and parsed["status"]:
+        data["status"] = parsed["status"]
+    if isinstance(parsed.get("created_at"), str):
+        data["created_at"] = parsed["created_at"]
+    if isinstance(parsed.get("modified_at"), str) and parsed["modified_at"]:
+        data["modified_at"] = parsed["modified_at"]
+    if isinstance(parsed.get("assigned_to_session"), str) and parsed["assigned_to_session"].strip(JS_SPACE):
+        data["assigned_to_session"] = parsed["assigned_to_session"]
+    if isinstance(parsed.get("assigned_to_session_file"), str) and parsed["assigned_to_session_file"].strip(JS_SPACE):
+        data["assigned_to_session_file"] = parsed["assigned_to_session_file"]
+    if isinstance(parsed.get("tags"), list):
+        data["tags"] = [tag for tag in parsed["tags"] if isinstance(tag, str)]
+    if isinstance(parsed.get("checklist"), list):
+        data["checklist"] = parse_checklist(parsed["checklist"])
+    if isinstance(parsed.get("type"), str):
+        data["type"] = parsed["type"]
+    if isinstance(parsed.get("template"), bool):
+        data["template"] = parsed["template"]
+    if isinstance(parsed.get("agent_rules"), str):
+        data["agent_rules"] = parsed["agent_rules"]
+    links = parse_links(parsed.get("links"))
+    if links:
+        data["links"] = links
+    worktree = parse_worktree(parsed.get("worktree"))
+    if worktree:
+        data["worktree"] = worktree
+    return data
+
+
+def find_json_object_end(content):
+    depth = 0
+    in_string = False
+    escaped = False
+    for i, char in enumerate(content):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+def split_front_matter(content):
+    match = YAML_FRONT_MATTER.match(content)
+    if match:
+        return match.group(1), content[match.end() :]
+    if not content.startswith("{"):
+        return "", content
+    end = find_json_object_end(content)
+    if end == -1:
+        return "", content
+    return content[: end + 1], LEADING_NEWLINES.sub("", content[end + 1 :], count=1)
+
+
+def to_todo(todo_id, content, modified_at):
+    front, _ = split_front_matter(content)
+    parsed = parse_front_matter(front, todo_id)
+    return {
+        "id": todo_id,
+        "title": parsed["title"],
+        "tags": parsed["tags"] or [],
+        "status": parsed["status"],
+        "created_at": parsed["created_at"],
+        "modified_at": modified_at,
+        "assigned_to_session": parsed["assigned_to_session"],
+        "checklist": parsed["checklist"],
+        "type": parsed["type"],
+        "template": parsed["template"],
+        "links": parsed["links"],
+        "agent_rules": parsed["agent_rules"],
+        "worktree": parsed["worktree"],
+    }
+
+
+def is_todo_closed(status):
+    return status.lower() in CLOSED
+
+
+def derive_todo_status(todo):
+    checklist = todo.get("checklist")
+    if not checklist:
+        return todo["status"]
+    checked = sum(
+        item["done"] if isinstance(item.get("done"), bool) else item.get("status") == "checked" for item in checklist
+    )
+    if checked == 0:
+        return "open"
+    if checked == len(checklist):
+        return "done"
+    return "in-progress"
+
+
+def date_parse(value):
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if parsed.tzinfo is None and "T" not in value:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+def _modified(todo):
+    return date_parse(todo.get("modified_at") or todo.get("created_at") or "")
+
+
+def _rank(status):
+    return {"done": 0, "closed": 1, "abandoned": 2}.get(status.lower(), 3)
+
+
+def _open_rank(status):
+    return {"done": -1, "in-progress": 0, "open": 1}.get(status.lower(), 2)
+
+
+def _sort_key(todo):
+    status = derive_todo_status(todo)
+    if is_todo_closed(status):
+        return (1, _rank(status), 0, -_modified(todo))
+    return (0, _open_rank(status), 0 if todo.get("assigned_to_session") else 1, -_modified(todo))
+
+
+def sort_todos(todos):
+    return sorted(todos, key=_sort_key)
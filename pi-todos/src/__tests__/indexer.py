@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from frontmatter import sort_todos, to_todo
+
+INDEX_NAME = ".index.json"
+VERSION = 1
+RACY_NS = 2_000_000_000
+SIZES = (10_000, 100_000)
+GROUPS = ("", "todos", "prds", "specs")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+VERBS = ("Fix", "Add", "Refactor", "Document")
+NOUNS = ("parser", "menu", "index", "worktree")
+UNSET = dict.fromkeys(to_todo("", "", ""))
+
+
+def iso_mtime(mtime_ns):
+    moment = EPOCH + timedelta(milliseconds=mtime_ns // 1_000_000)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def scan(todos_dir):
+    found = []
+
+    def walk(directory):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    walk(entry.path)
+                elif entry.name.endswith(".md"):
+                    found.append(entry)
+
+    try:
+        walk(todos_dir)
+    except OSError:
+        return []
+    return found
+
+
+def read_todo(path, mtime_ns=None):
+    with open(path, encoding="utf-8", errors="replace", newline="") as handle:
+        content = handle.read()
+    mtime_ns = os.stat(path).st_mtime_ns if mtime_ns is None else mtime_ns
+    return to_todo(os.path.basename(path)[:-3], content, iso_mtime(mtime_ns))
+
+
+def full_rescan(todos_dir):
+    todos = []
+    for entry in scan(todos_dir):
+        try:
+            todos.append(read_todo(entry.path))
+        except OSError:
+            continue
+    return sort_todos(todos)
+
+
+def load_index(path):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        return {"written_ns": 0, "entries": {}}
+    if not isinstance(index, dict) or index.get("version") != VERSION:
+        return {"written_ns": 0, "entries": {}}
+    return index
+
+
+def save_index(path, entries, written_ns):
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "w", encoding="utf-8") as handle:
+        index = {"version": VERSION, "written_ns": written_ns, "entries": entries}
+        handle.write(json.dumps(index, separators=(",", ":")))
+    os.replace(temp, path)
+
+
+def _parse(item):
+    key, path = item
+    try:
+        stat = os.stat(path)
+        todo = {name: value for name, value in read_todo(path, stat.st_mtime_ns).items() if value is not None}
+        return key, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "todo": todo}
+    except OSError:
+        return key, None
+
+
+def refresh(todos_dir, index_path=None, threads=None):
+    index_path = index_path or os.path.join(todos_dir, INDEX_NAME)
+    index = load_index(index_path)
+    cached = index["entries"]
+    trusted_before = index["written_ns"] - RACY_NS
+    started = time.time_ns()
+    prefix = len(os.path.join(todos_dir, ""))
+    entries = {}
+    stale = []
+    for entry in scan(todos_dir):
+        key = entry.path[prefix:]
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        hit = cached.get(key)
+        fresh = hit and hit["mtime_ns"] == stat.st_mtime_ns and hit["size"] == stat.st_size
+        if fresh and stat.st_mtime_ns < trusted_before:
+            entries[key] = hit
+        else:
+            entries[key] = None
+            stale.append((key, entry.path))
+    if stale:
+        with ThreadPoolExecutor(threads) as pool:
+            for key, parsed in pool.map(_parse, stale, chunksize=64):
+                entries[key] = parsed
+    entries = {key: value for key, value in entries.items() if value is not None}
+    removed = len(cached.keys() - entries.keys())
+    if stale or removed or not os.path.exists(index_path):
+        save_index(index_path, entries, started)
+    return entries, {"files": len(entries), "parsed": len(stale), "removed": removed}
+
+
+def list_todos(todos_dir, index_path=None, threads=None):
+    entries, _ = refresh(todos_dir, index_path, threads)
+    return sort_todos([todo(entry) for entry in entries.values()])
+
+
+def todo(entry):
+    return {**UNSET, **entry["todo"]}
+
+
+def _front_matter(rng, todo_id, index):
+    status = rng.choice(("open", "open", "in-progress", "done", "closed", "abandoned"))
+    front = {
+        "id": todo_id,
+        "title": f"Todo {index}: {rng.choice(VERBS)} the {rng.choice(NOUNS)}",
+        "tags": rng.sample(["pi-hash", "pi-todos", "phase-2", "ux", "perf", "docs"], rng.randint(0, 3)),
+        "status": status,
+        "created_at": iso_mtime(1_760_000_000_000_000_000 + index * 60_000_000_000),
+    }
+    if rng.random() < 0.3:
+        front["assigned_to_session"] = f"{rng.getrandbits(128):032x}"
+    if rng.random() < 0.3:
+        front["checklist"] = [
+            {"id": f"{i + 1}", "title": f"Step {i + 1}", "done": rng.random() < 0.5} for i in range(rng.randint(1, 6))
+        ]
+    if rng.random() < 0.2:
+        front["links"] = {"prds": [f"prds/{rng.getrandbits(32):08x}.md"], "reads": ["README.md"]}
+    return front
+
+
+def _yaml(front):
+    lines = []
+    for key, value in front.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            lines.append(f"{key}:")
+            for item in value:
+                done = str(item["done"]).lower()
+                lines.append(f"  - id: \"{item['id']}\"\n    title: {item['title']}\n    done: {done}")
+        elif isinstance(value, list):
+            lines.append(f"{key}:" + "".join(f"\n  - {item}" for item in value) if value else f"{key}: []")
+        elif isinstance(value, dict):
+            nested = "".join(f"\n  {name}:" + "".join(f"\n    - {v}" for v in items) for name, items in value.items())
+            lines.append(f"{key}:{nested}")
+        else:
+            lines.append(f"{key}: {json.dumps(value)}")
+    return "---\n" + "\n".join(lines) + "\n---\n"
+
+
+def generate(root, count, seed=0, yaml_share=0.3):
+    rng = random.Random(seed)
+    for group in GROUPS:
+        os.makedirs(os.path.join(root, group), exist_ok=True)
+    paths = []
+    for index in range(count):
+        todo_id = f"{rng.getrandbits(32):08x}"
+        front = _front_matter(rng, todo_id, index)
+        head = _yaml(front) if rng.random() < yaml_share else json.dumps(front, indent=2) + "\n"
+        sections = [f"## Notes {i}\n\n{'Details. ' * rng.randint(1, 30)}" for i in range(rng.randint(0, 4))]
+        body = "\n".join(sections)
+        path = os.path.join(root, rng.choice(GROUPS), f"{todo_id}.md")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(head + ("\n" + body + "\n" if body else ""))
+        paths.append(path)
+    return paths
+
+
+def touch(rng, paths, share):
+    changed = rng.sample(paths, max(1, int(len(paths) * share)))
+    later = time.time_ns() + RACY_NS
+    for path in changed:
+        with open(path, encoding="utf-8", newline="") as handle:
+            content = handle.read()
+        content = content.replace('"status": "open"', '"status": "done"').replace('status: "open"', 'status: "done"')
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            handle.write(content + "\nUpdated.\n")
+        os.utime(path, ns=(later, later))
+    return len(changed)
+
+
+def _timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def benchmark(root, count, threads, share, seed):
+    paths = generate(root, count, seed)
+    past = time.time_ns() - 10 * RACY_NS
+    for path in paths:
+        os.utime(path, ns=(past, past))
+    index_path = os.path.join(root, INDEX_NAME)
+    stages = []
+    baseline, seconds = _timed(lambda: full_rescan(root))
+    stages.append(("Full rescan (listTodos)", count, seconds))
+    (_, stats), seconds = _timed(lambda: refresh(root, index_path, threads))
+    stages.append(("Index, cold build", stats["parsed"], seconds))
+    indexed, seconds = _timed(lambda: list_todos(root, index_path, threads))
+    stages.append(("Index, warm, no changes", 0, seconds))
+    changed = touch(random.Random(seed + 1), paths, share)
+    (entries, stats), seconds = _timed(lambda: refresh(root, index_path, threads))
+    stages.append((f"Index, warm, {changed} touched", stats["parsed"], seconds))
+    same = indexed == baseline and sort_todos([todo(entry) for entry in entries.values()]) == full_rescan(root)
+    return stages, same, os.path.getsize(index_path)
+
+
+def report(count, stages, same, size):
+    base = stages[0][2]
+    print(f"\n--- Todo Listing ({count:,} Files, Sidecar {size / 1e6:.1f} MB) ---")
+    print(f"{'Stage':<28} | {'Parsed':<8} | {'ms':<9} | {'Speedup'}")
+    print("-" * 60)
+    for name, parsed, seconds in stages:
+        print(f"{name:<28} | {parsed:<8,} | {seconds * 1000:<9.1f} | {base / seconds:.1f}x")
+    print("-" * 60)
+    print(f"Indexed listing equals full rescan: {'yes' if same else 'NO'}")
+    print("Warm runs still walk the tree and stat every file; only changed (path, mtime, size) keys are re-read.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Incremental, mtime-keyed index for the pi-todos markdown store. Lists a todos directory "
+        "through the sidecar index, or benchmarks it against the full rescan listTodos performs.",
+    )
+    parser.add_argument("todos_dir", nargs="?", help="Todos directory to list. Omit to run the benchmark.")
+    parser.add_argument("--index", help=f"Sidecar path. Default: <todos_dir>/{INDEX_NAME}.")
+    parser.add_argument("--threads", type=int, default=None, help="Parser threads. Default: Python's pool default.")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated generated store sizes.")
+    parser.add_argument("--touch", type=float, default=0.01, help="Share of files modified before the warm rerun.")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed.")
+    args = parser.parse_args(argv)
+    if args.todos_dir:
+        (entries, stats), seconds = _timed(lambda: refresh(args.todos_dir, args.index, args.threads))
+        for item in sort_todos([todo(entry) for entry in entries.values()]):
+            print(f"TODO-{item['id']}  {item['status']:<12} {item['title']}")
+        print(f"\n{stats['files']} todos, {stats['parsed']} re-parsed, {stats['removed']} removed", end="")
+        print(f" in {seconds * 1000:.1f} ms.")
+        return 0
+    for count in (int(size) for size in args.sizes.split(",")):
+        root = tempfile.mkdtemp(prefix="pi-todos-")
+        try:
+            stages, same, size = benchmark(root, count, args.threads, args.touch, args.seed)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        report(count, stages, same, size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())